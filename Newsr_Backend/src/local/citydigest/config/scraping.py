@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+import os
+
+# Directory for scraper state that has to survive between runs
+# (kept outside the dated output directories the scheduler creates)
+STATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "output",
+    "state"
+)
+
+# Directory for the compressed cache of raw fetched article HTML
+HTML_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "output",
+    "html_cache"
+)
+
+# Scraping configuration dictionary
+SCRAPING = {
+    "http": {
+        "timeout": 15,
+        "pool_connections": 10,
+        "pool_maxsize": 20,
+        "max_retries": 1,
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+    },
+    "browser_pool": {
+        "max_sessions": 4,       # Upper bound on concurrently open Chrome sessions
+        "warm_sessions": 1,      # Sessions started ahead of a scheduled run
+        "idle_timeout": 300,     # Seconds an unused session is kept before it is quit
+        "max_uses": 50,          # Leases per session before it is replaced with a fresh one
+        "acquire_timeout": 600   # Seconds to wait for a free session when the pool is full
+    },
+    "browser_recycling": {
+        "enabled": True,
+        "max_rss_mb": 1500,      # Replace a city's Chrome session once its process tree uses this much memory
+        "max_pages": 200,        # ...or once it has loaded this many pages
+        "check_every": 5         # Pages between memory samples
+    },
+    "browser_tabs": {
+        "max_tabs": 4,           # Articles loaded at once in tabs of one Chrome session (1 disables tabs)
+        "per_domain": 2          # Tabs loading pages from the same site at the same time
+    },
+    "rate_limits": {
+        "default_rate": 1.0,           # Requests per second per host
+        "default_burst": 3,            # Requests a host may get back-to-back
+        "respect_crawl_delay": True,   # Use robots.txt Crawl-delay when a host sets one
+        "max_crawl_delay": 30,         # Ignore crawl delays longer than this many seconds
+        "hosts": {
+            # "statesman.com": {"rate": 0.5, "burst": 2},
+        }
+    },
+    "listing_cache": {
+        "enabled": True          # Send conditional requests for source homepages and skip unchanged ones
+    },
+    "link_snapshots": {
+        "enabled": True,         # Only fetch links that weren't on a source's homepage last run
+        "max_links": 500         # Links remembered per source
+    },
+    "frontier": {
+        "enabled": True,
+        "lease_minutes": 60,          # A pulled URL is handed out again if its run never reported back
+        "retry_backoff_minutes": 15,  # Wait before retrying a failed URL, doubled after each attempt
+        "max_attempts": 5,            # Failed attempts before a URL is given up on
+        "recrawl_hours": 0            # Fetch scraped URLs again after this long (0 never recrawls)
+    },
+    "state_store": {
+        "commit_every": 50,          # Writes batched into one SQLite transaction
+        "commit_seconds": 5,         # Longest a write stays uncommitted
+        "duplicate_hours": 48,       # A URL scraped this recently is skipped
+        "scraped_ttl_days": 7,       # Scraped URLs are forgotten after this long
+        "similar_hours": 48,         # Content seen this recently counts as a duplicate
+        "block_after_failures": 5    # Failed scrapes before a URL is blocklisted
+    },
+    "seen_filter": {
+        "enabled": True,
+        "partitions": 4,         # Time slices of the duplicate window; the oldest is dropped whole
+        "capacity": 10000,       # URLs per slice the Bloom filters are sized for
+        "error_rate": 0.01       # Target false-positive rate per slice
+    },
+    "near_duplicates": {
+        "enabled": True,
+        "threshold": 0.8,        # Estimated Jaccard similarity of word shingles at which articles are duplicates
+        "num_perm": 128,         # MinHash signature length
+        "bands": 32,             # LSH bands; more bands find candidates at lower similarity
+        "shingle_size": 5        # Words per shingle
+    },
+    "global_dedup": {
+        "enabled": True,
+        "ttl_days": 7,           # Articles are kept this long after any scraper last saw them
+        "min_words": 50          # Shorter bodies aren't fingerprinted, as they don't identify a story
+    },
+    "structured_data": {
+        "enabled": True,
+        "min_content_length": 200  # Shorter JSON-LD articleBody values (teasers) fall through to selectors
+    },
+    "canonical_urls": {
+        "follow_rel_canonical": True  # Store articles under the same-site rel=canonical URL their page declares
+    },
+    "selector_cache": {
+        "enabled": True,
+        "drop_after_runs": 5,    # Skip a fallback selector after this many runs without a match
+        "reprobe_every": 10      # Try the full fallback chain again every this many runs
+    },
+    "latency": {
+        "enabled": True,
+        "window": 100,            # Recent samples kept per host for time to first byte and page load
+        "min_samples": 5,         # Samples a host needs before its own timeouts replace the defaults
+        "multiplier": 2.0,        # Timeout as a multiple of the host's p95
+        "request_floor": 3,       # Bounds in seconds for HTTP request timeouts
+        "request_ceiling": 30,
+        "page_load_floor": 8,     # Bounds in seconds for browser page-load timeouts
+        "page_load_ceiling": 60
+    },
+    "circuit_breaker": {
+        "enabled": True,
+        "window": 10,            # Recent requests per host the failure rate is taken over
+        "min_requests": 4,       # Requests needed in the window before a circuit can open
+        "failure_rate": 0.5,     # Share of failed requests that opens a host's circuit
+        "cooldown": 900,         # Seconds a host is skipped before a probe request
+        "max_cooldown": 21600    # Cooldown doubles after each failed probe, up to this
+    },
+    "feeds": {
+        "lookback_hours": 24,    # How far back to read a feed the first time a source is seen
+        "max_child_sitemaps": 3  # Most recent child sitemaps read from a sitemap index
+    },
+    "page_readiness": {
+        "ready_timeout": 10,      # Seconds to wait for a page's target selectors
+        "quiet_ms": 500,          # DOM and network quiet time that counts as loaded
+        "max_scrolls": 4,         # Upper bound on scrolls when loading more links
+        "scroll_settle_ms": 1000  # Time to wait for new links after each scroll
+    },
+    "resource_blocking": {
+        "enabled": True,
+        "default_profile": "lean",  # Sources can pick another profile with "block_profile"
+        "profiles": {
+            # Media, fonts and known ad/analytics hosts; image src attributes stay in the DOM
+            "lean": [
+                "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+                "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+                "*.woff", "*.woff2", "*.ttf", "*.otf",
+                "*doubleclick.net*", "*googlesyndication.com*", "*googletagservices.com*",
+                "*google-analytics.com*", "*googletagmanager.com*", "*amazon-adsystem.com*",
+                "*adnxs.com*", "*facebook.net*", "*scorecardresearch.com*", "*chartbeat.com*",
+                "*quantserve.com*", "*taboola.com*", "*outbrain.com*", "*criteo.com*", "*hotjar.com*"
+            ],
+            # For sites whose scripts break when trackers are missing
+            "media_only": [
+                "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+                "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+                "*.woff", "*.woff2", "*.ttf", "*.otf"
+            ],
+            "none": []
+        }
+    },
+    "html_cache": {
+        "enabled": True,
+        "compression": "zstd",   # Falls back to gzip when zstandard isn't installed
+        "ttl_days": 30,          # Days a page is kept after it was last fetched
+        "max_megabytes": 1024    # Oldest pages are evicted beyond this compressed size
+    },
+    "pipeline": {
+        "queue_size": 16,        # Articles waiting between two stages, which bounds memory per city
+        "fetch_workers": 4,      # Concurrent article downloads, still subject to per-host rate limits
+        "extract_workers": 2,    # HTML parsing threads
+        "clean_workers": 2       # Content cleaning threads; browser, dedup and persist use one each
+    },
+    "scheduler": {
+        "max_workers": 4         # Cities scraped concurrently, each with its own browser lease
+    }
+}
+
+def get_scraping_config(section):
+    """Get configuration for a specific scraping component"""
+    return SCRAPING.get(section, {})
@@ -9,6 +9,7 @@ from dotenv import load_dotenv
 
 # Import city configuration
 from ..config.cities import get_city_config, CITIES
+from ..utils.url_canonical import canonical_url
 
 # Load environment variables
 load_dotenv()
@@ -246,7 +247,7 @@ class SupabaseIntegration:
                     'city_code': city_code,
                     'archived_date': current_date,
                     'title': article.get('title', ''),
-                    'url': article.get('url', ''),
+                    'url': canonical_url(article.get('url', '')),
                     'source': article.get('source', ''),
                     'published_date': article.get('published_date'),
                     'content_preview': article.get('content', '')[:500] if article.get('content') else '',
@@ -258,6 +259,9 @@ class SupabaseIntegration:
                 }
                 upload_data.append(article_data)
             
+            # Keep the last copy of articles that share a URL key, since a batch can't upsert a row twice
+            upload_data = list({article_data['url']: article_data for article_data in upload_data}.values())
+            
             # Batch upload to save API calls
             if upload_data:
                 # Handle conflict on unique constraint - update if article already exists
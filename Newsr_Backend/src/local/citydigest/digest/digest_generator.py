@@ -20,6 +20,7 @@ from ..scrapers.base_scraper import Article
 
 # Import city configuration system
 from ..config.cities import CITIES, get_city_config
+from ..utils.url_canonical import canonical_url
 
 # Load environment variables
 load_dotenv()
@@ -114,11 +115,11 @@ class DigestGenerator:
             except Exception as e:
                 logger.error(f"Error loading articles from {json_file}: {str(e)}")
         
-        # Deduplicate articles by URL
+        # Deduplicate articles by URL key, so AMP, mobile and tracking-tagged variants count once
         unique_articles = {}
         for article in all_articles:
-            if article.get('url') and article.get('url') not in unique_articles:
-                unique_articles[article.get('url')] = article
+            if article.get('url') and canonical_url(article.get('url')) not in unique_articles:
+                unique_articles[canonical_url(article.get('url'))] = article
         
         articles_list = list(unique_articles.values())
         
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 import argparse
+import json
 import logging
 import importlib
 import sys
 import os
+import tempfile
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # Add the package to the Python path
@@ -14,6 +18,7 @@ from .config.cities import CITIES, get_city_config
 from .digest.digest_generator import DigestGenerator
 from .db.supabase_integration import SupabaseIntegration
 from .scheduler.scheduler import CityScheduler
+from .utils.url_backfill import backfill_url_keys
 
 # Configure logging
 logging.basicConfig(
@@ -52,9 +57,9 @@ def scrape_city(city_code, headless=True, output_dir=None):
             scraper.init_driver()
             
             # Run the scraper
-            articles = scraper.scrape_all_sources()
+            article_count = scraper.scrape_all_sources()
             
-            logger.info(f"Scraped {len(articles)} articles for {scraper.city_name}")
+            logger.info(f"Scraped {article_count} articles for {scraper.city_name}")
             return True
             
         finally:
@@ -65,6 +70,168 @@ def scrape_city(city_code, headless=True, output_dir=None):
         logger.error(f"Error scraping city {city_code}: {str(e)}")
         return False
 
+def load_scraper_class(city_code, city_config):
+    """Import the scraper class for a city from its region's package"""
+    region = city_config['region'].lower().replace(' ', '_')
+    scraper_module = importlib.import_module(
+        f".scrapers.states.{region}.{city_code}_scraper",
+        package=__package__
+    )
+    return getattr(scraper_module, city_config["scraper_class"])
+
+def record_or_replay_city(city_code, mode, archive_dir, headless=True):
+    """Scrape a city through the record/replay proxy and report how the run went
+    
+    In record mode every HTTP exchange of the run, from both the HTTP fetcher
+    and Chrome, is written to {archive_dir}/{city_code}.warc.gz. In replay mode
+    the same run is served from that archive without network access, so the
+    two runs can be compared on wall time, pages fetched and articles extracted.
+    
+    Args:
+        city_code: City to scrape
+        mode: 'record' or 'replay'
+        archive_dir: Directory holding the archive and run stats
+        headless: Whether to run browser in headless mode
+    """
+    from .utils.browser_pool import shutdown_browser_pools
+    from .utils.circuit_breaker import get_circuit_breaker
+    from .utils.latency_tracker import get_latency_tracker
+    from .utils.rate_limiter import get_rate_limiter
+    from .utils.replay_proxy import ReplayProxy
+    
+    city_config = get_city_config(city_code)
+    if not city_config:
+        logger.error(f"No configuration found for city: {city_code}")
+        return False
+    
+    archive_path = os.path.join(archive_dir, f"{city_code}.warc.gz")
+    if mode == "replay" and not os.path.exists(archive_path):
+        logger.error(f"No recording found at {archive_path}, run the record command first")
+        return False
+    if mode == "record" and os.path.exists(archive_path):
+        os.remove(archive_path)
+    
+    # Offline runs have no site to be polite to, and neither run should trip the live
+    # circuit breakers or feed replayed load times into the live per-host timeouts
+    if mode == "replay":
+        get_rate_limiter().enabled = False
+    get_circuit_breaker().enabled = False
+    get_latency_tracker().enabled = False
+    
+    proxy = ReplayProxy(mode, archive_path).start()
+    try:
+        scraper_class = load_scraper_class(city_code, city_config)
+        
+        # Start every run from empty state so listing caches and feed cut-offs don't differ
+        run_dir = tempfile.mkdtemp(prefix=f"citydigest-{mode}-")
+        scraper = scraper_class(headless=headless, output_dir=os.path.join(run_dir, "output"))
+        scraper.init_state(os.path.join(run_dir, "state"), import_legacy=False)
+        scraper.html_cache = None
+        # Articles other cities extracted would be reused instead of going through the proxy,
+        # and recorded articles would leak into the live cross-city index
+        scraper.global_index = None
+        
+        start = time.time()
+        try:
+            article_count = scraper.scrape_all_sources()
+        finally:
+            scraper.close_driver()
+            shutdown_browser_pools()
+        
+        stats = {
+            "city": city_code,
+            "mode": mode,
+            "wall_seconds": round(time.time() - start, 2),
+            "pages_fetched": proxy.stats["exchanges"],
+            "bytes": proxy.stats["bytes"],
+            "replay_misses": proxy.stats["misses"],
+            "upstream_errors": proxy.stats["errors"],
+            "articles": article_count,
+            "finished_at": datetime.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error during {mode} run for {city_code}: {str(e)}")
+        return False
+    finally:
+        proxy.stop()
+    
+    stats_path = os.path.join(archive_dir, f"{city_code}_{mode}_stats.json")
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    
+    logger.info(f"{mode.capitalize()} run for {city_config['name']}: {stats['wall_seconds']}s, "
+                f"{stats['pages_fetched']} pages, {stats['articles']} articles, {stats['replay_misses']} replay misses")
+    
+    # Compare against the recording
+    record_stats_path = os.path.join(archive_dir, f"{city_code}_record_stats.json")
+    if mode == "replay" and os.path.exists(record_stats_path):
+        with open(record_stats_path, 'r', encoding='utf-8') as f:
+            recorded = json.load(f)
+        for key in ("wall_seconds", "pages_fetched", "articles"):
+            logger.info(f"  {key}: recorded {recorded.get(key)}, replayed {stats[key]}")
+    
+    return True
+
+def reparse_city(city_code, since=None, until=None, output_dir=None):
+    """Re-extract a city's articles from the HTML cache without any network access
+    
+    Args:
+        city_code: City to reparse
+        since: First fetch date to include (YYYY-MM-DD)
+        until: Last fetch date to include (YYYY-MM-DD)
+        output_dir: Directory for the reparsed articles
+    """
+    city_config = get_city_config(city_code)
+    if not city_config:
+        logger.error(f"No configuration found for city: {city_code}")
+        return False
+    
+    try:
+        since_date = datetime.strptime(since, "%Y-%m-%d") if since else None
+        # Include the whole of the last day
+        until_date = datetime.strptime(until, "%Y-%m-%d") + timedelta(days=1) if until else None
+    except ValueError as e:
+        logger.error(f"Invalid date, expected YYYY-MM-DD: {str(e)}")
+        return False
+    
+    try:
+        scraper_class = load_scraper_class(city_code, city_config)
+        
+        if not output_dir:
+            output_dir = os.path.join("output", f"{city_code}_news", "reparsed")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        scraper = scraper_class(output_dir=output_dir)
+        articles = scraper.reparse_cached_articles(since=since_date, until=until_date)
+        
+        logger.info(f"Reparsed {len(articles)} articles for {city_config['name']} into {output_dir}")
+        return True
+    except Exception as e:
+        logger.error(f"Error reparsing city {city_code}: {str(e)}")
+        return False
+
+def backfill_urls(use_supabase=True, dry_run=False):
+    """Rewrite the URL keys of local state, caches and Supabase to canonical URLs
+    
+    Args:
+        use_supabase: Whether to rewrite the Supabase tables as well
+        dry_run: Only count what would be rewritten
+    """
+    supabase_client = None
+    if use_supabase:
+        try:
+            supabase_client = SupabaseIntegration().client
+        except Exception as e:
+            logger.error(f"Error connecting to Supabase, only rewriting local state: {str(e)}")
+    
+    try:
+        totals = backfill_url_keys(supabase_client=supabase_client, dry_run=dry_run)
+        logger.info(f"URL backfill {'dry run ' if dry_run else ''}finished: {totals}")
+        return True
+    except Exception as e:
+        logger.error(f"Error backfilling URL keys: {str(e)}")
+        return False
+
 def generate_digest(city_code, input_dir=None, output_dir=None, upload=False):
     """Generate news digest for a specific city"""
     city_config = get_city_config(city_code)
@@ -164,10 +331,34 @@ def main():
     digest_parser.add_argument("--output", default="digests", help="Output directory for digest")
     digest_parser.add_argument("--upload", action="store_true", help="Upload digest to Supabase")
     
+    # Reparse cached HTML command
+    reparse_parser = subparsers.add_parser("reparse", help="Re-extract articles from cached HTML without fetching")
+    reparse_parser.add_argument("city", help="City code to reparse")
+    reparse_parser.add_argument("--since", help="First fetch date to include (YYYY-MM-DD)")
+    reparse_parser.add_argument("--until", help="Last fetch date to include (YYYY-MM-DD)")
+    reparse_parser.add_argument("--output", help="Output directory for reparsed articles")
+    
+    # Record and replay commands
+    record_parser = subparsers.add_parser("record", help="Scrape a city live and record every HTTP exchange")
+    record_parser.add_argument("city", help="City code to record")
+    record_parser.add_argument("--archive", default=os.path.join("output", "recordings"), help="Directory for archives and run stats")
+    record_parser.add_argument("--visible", action="store_true", help="Run browser in visible mode")
+    
+    replay_parser = subparsers.add_parser("replay", help="Re-run a recorded city scrape offline and compare it to the recording")
+    replay_parser.add_argument("city", help="City code to replay")
+    replay_parser.add_argument("--archive", default=os.path.join("output", "recordings"), help="Directory for archives and run stats")
+    replay_parser.add_argument("--visible", action="store_true", help="Run browser in visible mode")
+    
+    # Canonical URL backfill command
+    backfill_parser = subparsers.add_parser("backfill-urls", help="Rewrite stored URL keys to canonical URLs")
+    backfill_parser.add_argument("--no-supabase", action="store_true", help="Only rewrite local state and caches")
+    backfill_parser.add_argument("--dry-run", action="store_true", help="Count what would be rewritten without writing")
+    
     # Run scheduler command
     scheduler_parser = subparsers.add_parser("schedule", help="Run the scheduler")
     scheduler_parser.add_argument("--no-supabase", action="store_true", help="Disable Supabase integration")
     scheduler_parser.add_argument("--run-now", action="store_true", help="Run tasks immediately instead of scheduling")
+    scheduler_parser.add_argument("--workers", type=int, help="Number of cities to process concurrently")
     
     # Parse arguments
     args = parser.parse_args()
@@ -179,8 +370,14 @@ def main():
         scrape_city(args.city, headless=not args.visible, output_dir=args.output)
     elif args.command == "digest":
         generate_digest(args.city, input_dir=args.input, output_dir=args.output, upload=args.upload)
+    elif args.command == "reparse":
+        reparse_city(args.city, since=args.since, until=args.until, output_dir=args.output)
+    elif args.command in ("record", "replay"):
+        record_or_replay_city(args.city, args.command, args.archive, headless=not args.visible)
+    elif args.command == "backfill-urls":
+        backfill_urls(use_supabase=not args.no_supabase, dry_run=args.dry_run)
     elif args.command == "schedule":
-        scheduler = CityScheduler(use_supabase=not args.no_supabase)
+        scheduler = CityScheduler(use_supabase=not args.no_supabase, max_workers=args.workers)
         if args.run_now:
             scheduler.run_daily_tasks()
         else:
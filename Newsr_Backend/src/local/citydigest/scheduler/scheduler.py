@@ -9,12 +9,18 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import importlib
 import glob
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import from city configuration
 from ..config.cities import CITIES, get_active_cities, get_cities_by_frequency
+from ..config.scraping import get_scraping_config
 from ..digest.digest_generator import DigestGenerator
 from ..db.supabase_integration import SupabaseIntegration
 from ..models.article import Article
+from ..utils.browser_pool import get_browser_pool
+from ..utils.circuit_breaker import get_circuit_breaker
+from ..utils.global_index import get_global_index
 
 # Configure logging
 logging.basicConfig(
@@ -28,9 +34,15 @@ logging.basicConfig(
 logger = logging.getLogger("city_scheduler")
 
 class CityScheduler:
-    def __init__(self, use_supabase=True):
-        """Initialize the City Scheduler"""
+    def __init__(self, use_supabase=True, max_workers=None):
+        """Initialize the City Scheduler
+        
+        Args:
+            use_supabase: Whether to store articles and digests in Supabase
+            max_workers: Number of cities processed concurrently
+        """
         self.use_supabase = use_supabase
+        self.max_workers = max_workers or get_scraping_config("scheduler").get("max_workers", 4)
         
         # Initialize digest generator
         self.digest_generator = DigestGenerator()
@@ -54,34 +66,6 @@ class CityScheduler:
         
         logger.info("City Scheduler initialized")
     
-    def get_previous_urls(self, city_code, days=1):
-        """Get URLs from previous days to avoid duplication"""
-        urls = set()
-        
-        # Look for URLs in previous day directories
-        for i in range(1, days+1):
-            day = datetime.now() - timedelta(days=i)
-            day_str = day.strftime("%Y-%m-%d")
-            
-            # Check regular output directory
-            url_files = [
-                os.path.join("output", f"{city_code}_news", day_str, "*_urls.json"),
-                os.path.join("output", f"{city_code}_news", "*_urls.json"),
-                os.path.join("output", f"{city_code}_continuous", day_str, "*_urls.json")
-            ]
-            
-            for pattern in url_files:
-                for file_path in glob.glob(pattern):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            file_urls = json.load(f)
-                            if isinstance(file_urls, list):
-                                urls.update(file_urls)
-                    except Exception as e:
-                        logger.error(f"Error loading URLs from {file_path}: {str(e)}")
-        
-        return urls
-    
     def get_scraper_module(self, city_code, city_config):
         """Get the correct scraper module based on the city's region"""
         region = city_config['region'].lower().replace(' ', '_')
@@ -93,18 +77,27 @@ class CityScheduler:
         except ImportError as e:
             raise ImportError(f"Could not import scraper for {city_code} from {region}: {str(e)}")
     
-    def scrape_city(self, city_code, output_dir=None, target_date=None):
-        """Scrape news for a specific city with duplication prevention"""
-        # Get previously seen URLs to avoid
-        previous_urls = self.get_previous_urls(city_code, days=2)
+    def scrape_city(self, city_code, output_dir=None, target_date=None, stats=None):
+        """Scrape news for a specific city with duplication prevention
+        
+        Args:
+            city_code: City to scrape
+            output_dir: Directory for the scraper output
+            target_date: Date the scrape focuses on
+            stats: Optional dict that receives the article count or error message
+        """
+        if stats is None:
+            stats = {}
         
         city_config = CITIES.get(city_code)
         if not city_config:
             logger.error(f"No configuration found for city: {city_code}")
+            stats["error"] = "no configuration"
             return False
         
         if not city_config.get("active", False):
             logger.warning(f"City {city_code} is not active, skipping")
+            stats["error"] = "city not active"
             return False
         
         try:
@@ -130,17 +123,24 @@ class CityScheduler:
                 safe_json_handling=True
             )
             
-            # Run the scraper
-            articles = scraper.scrape_all_sources()
+            # Run the scraper, always handing its browser session back to the pool
+            try:
+                article_count = scraper.scrape_all_sources()
+            finally:
+                scraper.close_driver()
             
             # Log successful scrape
-            logger.info(f"Successfully scraped {len(articles)} articles for {city_config['name']}")
+            stats["articles"] = article_count
+            if scraper.selector_cache:
+                stats["selector_hit_rates"] = scraper.selector_cache.hit_rates()
+            stats["browser"] = scraper.browser_memory.summary()
+            logger.info(f"Successfully scraped {article_count} articles for {city_config['name']}")
             
             # Return success
             return True
         except Exception as e:
+            stats["error"] = str(e)
             logger.error(f"Error scraping {city_code}: {str(e)}")
-            import traceback
             logger.error(traceback.format_exc())
             return False
     
@@ -287,50 +287,54 @@ class CityScheduler:
         # Get cities with daily frequency
         daily_cities = get_cities_by_frequency("daily")
         
-        for city_code in daily_cities:
-            try:
-                success = False
-                
-                # For Monday, include weekend news (scrape if needed)
-                if include_weekend:
-                    weekend_output_dir = os.path.join("output", f"{city_code}_weekend_news")
-                    os.makedirs(weekend_output_dir, exist_ok=True)
-                    
-                    # Get weekend dates
-                    today = datetime.now()
-                    saturday = today - timedelta(days=2)
-                    sunday = today - timedelta(days=1)
-                    weekend_dates = [saturday, sunday]
-                    
-                    # Add weekend scraping and capture success state
-                    for date in weekend_dates:
-                        date_str = date.strftime("%Y-%m-%d")
-                        specific_output_dir = os.path.join(weekend_output_dir, date_str)
-                        os.makedirs(specific_output_dir, exist_ok=True)
-                        
-                        # Scrape news for this specific date (focus on weekend content)
-                        success |= self.scrape_city(city_code, output_dir=specific_output_dir, target_date=date)
-                    
-                    # Generate digest including weekend content
-                    if success:
-                        self.generate_digest_for_city(city_code, input_dir=weekend_output_dir)
-                
-                # Now handle regular weekday scraping
-                yesterday = datetime.now() - timedelta(days=1)
-                yesterday_str = yesterday.strftime("%Y-%m-%d")
-                weekday_output_dir = os.path.join("output", f"{city_code}_news", yesterday_str)
-                os.makedirs(weekday_output_dir, exist_ok=True)
-                
-                # Scrape news focused on previous day
-                scrape_success = self.scrape_city(city_code, output_dir=weekday_output_dir, 
-                                                target_date=yesterday)
-                
-                if scrape_success:
-                    # Generate digest
-                    self.generate_digest_for_city(city_code, input_dir=weekday_output_dir)
+        # Each city's digest starts as soon as its own scrape finishes
+        return self.run_cities_concurrently(
+            daily_cities,
+            lambda city_code, result: self.process_weekday_city(city_code, result, include_weekend=include_weekend),
+            run_name="weekday"
+        )
+    
+    def process_weekday_city(self, city_code, result, include_weekend=False):
+        """Scrape one city and generate its digest, recording outcomes in result"""
+        success = False
+        
+        # For Monday, include weekend news (scrape if needed)
+        if include_weekend:
+            weekend_output_dir = os.path.join("output", f"{city_code}_weekend_news")
+            os.makedirs(weekend_output_dir, exist_ok=True)
+            
+            # Get weekend dates
+            today = datetime.now()
+            saturday = today - timedelta(days=2)
+            sunday = today - timedelta(days=1)
+            weekend_dates = [saturday, sunday]
+            
+            # Add weekend scraping and capture success state
+            for date in weekend_dates:
+                date_str = date.strftime("%Y-%m-%d")
+                specific_output_dir = os.path.join(weekend_output_dir, date_str)
+                os.makedirs(specific_output_dir, exist_ok=True)
                 
-            except Exception as e:
-                logger.error(f"Error processing daily tasks for {city_code}: {str(e)}")
+                # Scrape news for this specific date (focus on weekend content)
+                success |= self.timed_scrape(city_code, result, output_dir=specific_output_dir, target_date=date)
+            
+            # Generate digest including weekend content
+            if success:
+                self.timed_digest(city_code, result, input_dir=weekend_output_dir)
+        
+        # Now handle regular weekday scraping
+        yesterday = datetime.now() - timedelta(days=1)
+        yesterday_str = yesterday.strftime("%Y-%m-%d")
+        weekday_output_dir = os.path.join("output", f"{city_code}_news", yesterday_str)
+        os.makedirs(weekday_output_dir, exist_ok=True)
+        
+        # Scrape news focused on previous day
+        scrape_success = self.timed_scrape(city_code, result, output_dir=weekday_output_dir,
+                                           target_date=yesterday)
+        
+        if scrape_success:
+            # Generate digest
+            self.timed_digest(city_code, result, input_dir=weekday_output_dir)
     
     def scrape_without_digest(self):
         """Scrape cities continuously throughout the day without generating digests"""
@@ -339,19 +343,165 @@ class CityScheduler:
         # Get active cities
         active_cities = get_active_cities()
         
-        for city_code in active_cities:
+        return self.run_cities_concurrently(active_cities, self.process_continuous_city, run_name="continuous")
+    
+    def process_continuous_city(self, city_code, result):
+        """Scrape one city for the continuous run, recording outcomes in result"""
+        # Use today's date for continuous scraping
+        today = datetime.now()
+        today_str = today.strftime("%Y-%m-%d")
+        scraping_output_dir = os.path.join("output", f"{city_code}_continuous", today_str)
+        os.makedirs(scraping_output_dir, exist_ok=True)
+        
+        # Scrape without generating digest
+        self.timed_scrape(city_code, result, output_dir=scraping_output_dir, target_date=today)
+    
+    def timed_scrape(self, city_code, result, output_dir=None, target_date=None):
+        """Scrape a city and add its outcome and timing to a run result"""
+        started = time.time()
+        stats = {}
+        success = self.scrape_city(city_code, output_dir=output_dir, target_date=target_date, stats=stats)
+        
+        result["scrape_seconds"] += time.time() - started
+        result["articles"] += stats.get("articles", 0)
+        result["selector_hit_rates"].update(stats.get("selector_hit_rates", {}))
+        if stats.get("browser"):
+            result["browser"] = stats["browser"]
+        result["scraped"] = result["scraped"] or success
+        if not success:
+            result["errors"].append(stats.get("error", "scrape failed"))
+        return success
+    
+    def timed_digest(self, city_code, result, input_dir=None):
+        """Generate a city digest and add its outcome and timing to a run result"""
+        started = time.time()
+        success = self.generate_digest_for_city(city_code, input_dir=input_dir)
+        
+        result["digest_seconds"] += time.time() - started
+        result["digest"] = success
+        if not success:
+            result["errors"].append("digest generation failed")
+        return success
+    
+    def run_cities_concurrently(self, city_codes, process_city, run_name="run"):
+        """Run a per-city task for every city on a bounded pool of worker threads
+        
+        Each worker builds its own scraper, so every city gets its own browser
+        lease and HTTP client. Results are collected into one run summary.
+        
+        Args:
+            city_codes: Cities to process
+            process_city: Callable taking (city_code, result) that fills in the result dict
+            run_name: Name used for the summary file
+        
+        Returns:
+            dict: Run summary with per-city results
+        """
+        started_at = datetime.now()
+        started = time.time()
+        
+        results = []
+        workers = max(1, min(self.max_workers, len(city_codes) or 1))
+        logger.info(f"Processing {len(city_codes)} cities with {workers} workers")
+        
+        # Let every worker hold its own browser lease, and start sessions before the first city needs one
+        browser_pool = get_browser_pool()
+        pool_capacity = browser_pool.max_sessions
+        browser_pool.set_capacity(max(pool_capacity, workers))
+        browser_pool.warm()
+        
+        def run_city(city_code):
+            result = {
+                "city": city_code,
+                "scraped": False,
+                "articles": 0,
+                "digest": None,
+                "errors": [],
+                "scrape_seconds": 0.0,
+                "digest_seconds": 0.0,
+                "total_seconds": 0.0,
+                "selector_hit_rates": {},
+                "browser": {}
+            }
+            city_started = time.time()
             try:
-                # Use today's date for continuous scraping
-                today = datetime.now()
-                today_str = today.strftime("%Y-%m-%d")
-                scraping_output_dir = os.path.join("output", f"{city_code}_continuous", today_str)
-                os.makedirs(scraping_output_dir, exist_ok=True)
-                
-                # Scrape without generating digest
-                self.scrape_city(city_code, output_dir=scraping_output_dir, target_date=today)
-                
+                process_city(city_code, result)
             except Exception as e:
-                logger.error(f"Error in continuous scraping for {city_code}: {str(e)}")
+                logger.error(f"Error processing {run_name} tasks for {city_code}: {str(e)}")
+                logger.error(traceback.format_exc())
+                result["errors"].append(str(e))
+            result["total_seconds"] = time.time() - city_started
+            logger.info(f"Finished {city_code} in {result['total_seconds']:.1f}s ({result['articles']} articles)")
+            return result
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="city") as executor:
+                futures = {executor.submit(run_city, city_code): city_code for city_code in city_codes}
+                for future in as_completed(futures):
+                    results.append(future.result())
+        finally:
+            browser_pool.set_capacity(pool_capacity)
+        
+        global_index = get_global_index()
+        summary = {
+            "run": run_name,
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "workers": workers,
+            "wall_seconds": time.time() - started,
+            "cities": len(results),
+            "succeeded": sum(1 for r in results if r["scraped"] and not r["errors"]),
+            "failed": sum(1 for r in results if r["errors"]),
+            "articles": sum(r["articles"] for r in results),
+            "open_circuits": get_circuit_breaker().open_hosts(),
+            "global_dedup": global_index.daily_counts() if global_index else {},
+            "browser_recycles": sum(r["browser"].get("recycles", 0) for r in results),
+            "peak_browser_rss_mb": max((r["browser"].get("peak_rss_mb") or 0 for r in results), default=0),
+            "results": sorted(results, key=lambda r: r["city"])
+        }
+        
+        self.save_run_summary(summary)
+        return summary
+    
+    def save_run_summary(self, summary):
+        """Log a run summary and save it next to the scraper output"""
+        logger.info(
+            f"{summary['run'].capitalize()} run finished in {summary['wall_seconds']:.1f}s: "
+            f"{summary['succeeded']}/{summary['cities']} cities succeeded, "
+            f"{summary['articles']} articles scraped"
+        )
+        for host, seconds_left in summary.get("open_circuits", {}).items():
+            logger.warning(f"Circuit open for {host} ({seconds_left}s until the next probe)")
+        for day, counts in summary.get("global_dedup", {}).items():
+            logger.info(f"Cross-city dedup on {day}: {counts['fetch']} fetches avoided, {counts['copy']} syndicated copies found")
+        if summary.get("browser_recycles"):
+            logger.info(
+                f"Browser sessions recycled {summary['browser_recycles']} times, "
+                f"peak memory {summary['peak_browser_rss_mb']} MB"
+            )
+        
+        for result in summary["results"]:
+            if result["errors"]:
+                logger.warning(f"{result['city']} failed: {'; '.join(result['errors'])}")
+            
+            # Fields found on under half the pages point at broken selectors
+            for source_id, fields in result.get("selector_hit_rates", {}).items():
+                weak = [f"{field} {counts['rate']:.0%}" for field, counts in fields.items() if counts["attempts"] and counts["rate"] < 0.5]
+                if weak:
+                    logger.warning(f"{result['city']}/{source_id} selector hit rates: {', '.join(weak)}")
+        
+        summaries_dir = os.path.join(self.output_dir, "run_summaries")
+        os.makedirs(summaries_dir, exist_ok=True)
+        summary_path = os.path.join(
+            summaries_dir,
+            f"{summary['run']}_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json"
+        )
+        try:
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            logger.info(f"Saved run summary to {summary_path}")
+        except Exception as e:
+            logger.error(f"Error saving run summary: {str(e)}")
     
     def schedule_tasks(self):
         """Schedule recurring tasks"""
@@ -378,6 +528,9 @@ class CityScheduler:
         logger.info("Starting scheduler loop")
         while True:
             schedule.run_pending()
+            
+            # Quit browser sessions left idle between scheduled runs
+            get_browser_pool().reap_idle()
             time.sleep(60)  # Check every minute
     
     def archive_old_digests(self):
@@ -416,34 +569,15 @@ class CityScheduler:
         # Get active cities
         active_cities = get_active_cities()
         
-        for city_code in active_cities:
-            try:
-                # Determine if this is a Monday to include weekend content
-                today = datetime.now()
-                is_monday = today.weekday() == 0
-                
-                if is_monday:
-                    # If Monday, include weekend content
-                    self.run_weekday_tasks(include_weekend=True)
-                else:
-                    # Regular weekday processing
-                    yesterday = datetime.now() - timedelta(days=1)
-                    yesterday_str = yesterday.strftime("%Y-%m-%d")
-                    output_dir = os.path.join("output", f"{city_code}_news", yesterday_str)
-                    os.makedirs(output_dir, exist_ok=True)
-                    
-                    # Scrape news focused on previous day
-                    scrape_success = self.scrape_city(city_code, output_dir=output_dir, 
-                                                   target_date=yesterday)
-                    
-                    if scrape_success:
-                        # Generate digest
-                        self.generate_digest_for_city(city_code, input_dir=output_dir)
-                    
-            except Exception as e:
-                logger.error(f"Error processing daily tasks for {city_code}: {str(e)}")
+        # Determine if this is a Monday to include weekend content
+        is_monday = datetime.now().weekday() == 0
         
-        return True
+        # Every city is scraped once, concurrently, with its digest started as soon as its scrape finishes
+        return self.run_cities_concurrently(
+            active_cities,
+            lambda city_code, result: self.process_weekday_city(city_code, result, include_weekend=is_monday),
+            run_name="daily"
+        )
 
 def main():
     """Main entry point for the City Scheduler"""
@@ -454,10 +588,11 @@ def main():
     parser.add_argument("--scrape-only", action="store_true", help="Only scrape, don't generate digest")
     parser.add_argument("--digest-only", action="store_true", help="Only generate digest, don't scrape")
     parser.add_argument("--archive-all", action="store_true", help="Archive all active digests")
+    parser.add_argument("--workers", type=int, help="Number of cities to process concurrently")
     args = parser.parse_args()
     
     # Initialize the scheduler
-    scheduler = CityScheduler(use_supabase=not args.no_supabase)
+    scheduler = CityScheduler(use_supabase=not args.no_supabase, max_workers=args.workers)
     
     if args.archive_all:
         logger.info("Archiving all active digests")
@@ -3,22 +3,41 @@ import os
 import time
 import json
 import logging
-import random
 import re
+import threading
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from pathlib import Path
-import traceback
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from ..config.scraping import STATE_DIR, get_scraping_config
+from ..utils.browser_memory import BrowserMemoryMonitor
+from ..utils.browser_pool import get_browser_pool
+from ..utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from ..utils.crawl_frontier import CrawlFrontier
+from ..utils.feed_discovery import FeedDiscovery
+from ..utils.global_index import get_global_index
+from ..utils.html_cache import get_html_cache
+from ..utils.http_fetcher import HttpFetcher
+from ..utils.latency_tracker import get_latency_tracker
+from ..utils.link_snapshots import LinkSnapshots
+from ..utils.listing_cache import ListingCache
+from ..utils.near_duplicates import MinHasher, NearDuplicateIndex
+from ..utils.page_extraction import extract_fields
+from ..utils.page_readiness import scroll_until_stable, wait_for_page_ready
+from ..utils.rate_limiter import get_rate_limiter
+from ..utils.seen_filter import SeenFilter
+from ..utils.selector_cache import SelectorCache
+from ..utils.state_store import StateStore
+from ..utils.structured_data import extract_structured_fields, has_required_fields
+from ..utils.url_canonical import canonical_url, extract_canonical_link, normalize_url, same_site, unique_urls
+from ..utils.resource_blocking import apply_block_patterns, get_block_patterns, measure_page_load
+from .pipeline import ScrapePipeline
+
 @dataclass
 class Article:
     url: str
@@ -44,7 +63,7 @@ class Article:
 class BaseCityScraper:
     """Base class for city-specific news scrapers"""
     
-    def __init__(self, city_code, city_name, region, headless=True, output_dir=None, timeout=30, retry_count=2, use_supabase=False, supabase_client=None, safe_json_handling=False):
+    def __init__(self, city_code, city_name, region, headless=True, output_dir=None, timeout=30, retry_count=2, use_supabase=False, supabase_client=None, safe_json_handling=False, fetch_mode="auto"):
         """Initialize the Base City Scraper
         
         Args:
@@ -58,6 +77,7 @@ class BaseCityScraper:
             use_supabase: Whether to use Supabase for storage
             supabase_client: Supabase client for storage
             safe_json_handling: Whether to safely handle JSON serialization for Supabase responses
+            fetch_mode: 'auto' to try plain HTTP first and fall back to the browser, 'http' or 'browser' to force one
         """
         self.city_code = city_code
         self.city_name = city_name
@@ -69,6 +89,41 @@ class BaseCityScraper:
         self.use_supabase = use_supabase
         self.supabase_client = supabase_client
         self.safe_json_handling = safe_json_handling
+        self.fetch_mode = fetch_mode
+        self.page_wait_seconds = []
+        self.page_metrics = {}
+        self.block_profile = None
+        self.driver = None
+        
+        # The scrape pipeline runs stages on worker threads: the webdriver and
+        # the JSON state files in output_dir are only touched under these locks
+        self.browser_lock = threading.RLock()
+        self.state_lock = threading.RLock()
+        
+        # Replaces the browser session between articles once it has grown too large
+        recycle_config = get_scraping_config("browser_recycling")
+        self.browser_memory = BrowserMemoryMonitor(
+            max_rss_mb=recycle_config.get("max_rss_mb", 1500),
+            max_pages=recycle_config.get("max_pages", 200),
+            check_every=recycle_config.get("check_every", 5),
+            enabled=recycle_config.get("enabled", True)
+        )
+        
+        # Per-host politeness shared by the browser and the HTTP client
+        self.rate_limiter = get_rate_limiter()
+        
+        # Hosts that keep failing are skipped for a cooldown, across runs
+        self.circuit_breaker = get_circuit_breaker()
+        
+        # Articles already extracted by any city or topic scraper, shared across processes
+        self.global_index = get_global_index()
+        
+        # Per-host response times that page-load and request timeouts are derived from
+        self.latency = get_latency_tracker()
+        self.page_load_timeout = timeout
+        
+        # Pooled HTTP client for sources that serve static HTML
+        self.http_fetcher = HttpFetcher(rate_limiter=self.rate_limiter)
         
         # Set up output directory with consistent path
         if output_dir is None:
@@ -101,61 +156,287 @@ class BaseCityScraper:
         # Define sources (to be overridden by subclasses)
         self.sources = {}
         
+        # Raw HTML of fetched articles, kept so they can be re-extracted offline
+        self.html_cache = get_html_cache()
+        
+        # JSON-LD/OpenGraph metadata tried before the CSS selectors
+        self.structured_data = get_scraping_config("structured_data")
+        self.structured_hits = 0
+        
+        # Whether articles are stored under the canonical URL their page declares
+        self.canonical_config = get_scraping_config("canonical_urls")
+        
+        # Near-duplicate articles skipped this run and the stored article each matched
+        self.near_duplicate_matches = []
+        
+        # State carried between runs
+        self.init_state(STATE_DIR)
+        
         self.logger.info(f"{self.city_name} News Scraper initialized")
     
+    def init_state(self, state_dir, import_legacy=True):
+        """Set up the helpers that keep per-city state between runs in state_dir
+        
+        Args:
+            state_dir: Directory the state is kept in
+            import_legacy: Whether to import the JSON state older versions kept in the output directories
+        """
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_dir = state_dir
+        
+        # Fetch mode that worked for each source on previous runs
+        self.fetch_modes_path = os.path.join(state_dir, f"{self.city_code}_fetch_modes.json")
+        self.fetch_modes = self.load_fetch_modes()
+        
+        # RSS/Atom and news-sitemap link discovery for sources that publish one
+        self.feed_discovery = FeedDiscovery(self.http_fetcher, os.path.join(state_dir, f"{self.city_code}_feed_runs.json"))
+        
+        # Conditional-GET cache for source homepages
+        self.listing_cache = None
+        if get_scraping_config("listing_cache").get("enabled", True):
+            self.listing_cache = ListingCache(os.path.join(state_dir, f"{self.city_code}_listing_cache.json"))
+        
+        # Which fallback selectors actually find each field, per source and page template
+        self.selector_cache = None
+        selector_config = get_scraping_config("selector_cache")
+        if selector_config.get("enabled", True):
+            self.selector_cache = SelectorCache(
+                os.path.join(state_dir, f"{self.city_code}_selectors.json"),
+                drop_after_runs=selector_config.get("drop_after_runs", 5),
+                reprobe_every=selector_config.get("reprobe_every", 10)
+            )
+        
+        # Links seen on each source homepage, so only new ones are fetched
+        self.link_snapshots = None
+        snapshot_config = get_scraping_config("link_snapshots")
+        if snapshot_config.get("enabled", True):
+            self.link_snapshots = LinkSnapshots(
+                os.path.join(state_dir, f"{self.city_code}_link_snapshots.json"),
+                max_links=snapshot_config.get("max_links", 500)
+            )
+        
+        # Every article URL the sources have linked to, with its status and next due time
+        self.frontier = None
+        frontier_config = get_scraping_config("frontier")
+        if frontier_config.get("enabled", True):
+            self.frontier = CrawlFrontier(
+                os.path.join(state_dir, f"{self.city_code}_frontier.db"),
+                lease_seconds=frontier_config.get("lease_minutes", 60) * 60,
+                retry_backoff=frontier_config.get("retry_backoff_minutes", 15) * 60,
+                max_attempts=frontier_config.get("max_attempts", 5),
+                recrawl_seconds=frontier_config.get("recrawl_hours", 0) * 3600
+            )
+        
+        # Scraped URLs, content hashes, failure counts and the blocklist
+        self.state_config = get_scraping_config("state_store")
+        self.state_store = StateStore(
+            os.path.join(state_dir, f"{self.city_code}_state.db"),
+            commit_every=self.state_config.get("commit_every", 50),
+            commit_seconds=self.state_config.get("commit_seconds", 5)
+        )
+        imported = self.state_store.import_json_dirs(self.legacy_state_dirs()) if import_legacy else 0
+        self.state_store.expire(
+            self.state_config.get("scraped_ttl_days", 7) * 86400,
+            self.state_config.get("similar_hours", 48) * 3600
+        )
+        
+        # MinHash signatures of recent articles, to catch re-edited and re-headlined copies
+        self.near_duplicates = None
+        near_config = get_scraping_config("near_duplicates")
+        if near_config.get("enabled", True):
+            self.minhasher = MinHasher(num_perm=near_config.get("num_perm", 128), shingle_size=near_config.get("shingle_size", 5))
+            self.near_duplicates = NearDuplicateIndex(
+                os.path.join(state_dir, f"{self.city_code}_near_duplicates.db"),
+                bands=near_config.get("bands", 32),
+                threshold=near_config.get("threshold", 0.8)
+            )
+            self.near_duplicates.expire(time.time() - self.state_config.get("similar_hours", 48) * 3600)
+        
+        # In-memory filter of the URLs scraped within the duplicate window, so
+        # only possible repeats are looked up in the state store or Supabase
+        self.seen_urls = None
+        filter_config = get_scraping_config("seen_filter")
+        if filter_config.get("enabled", True):
+            window = self.state_config.get("duplicate_hours", 48) * 3600
+            self.seen_urls = SeenFilter(
+                os.path.join(state_dir, f"{self.city_code}_seen_urls.json"),
+                window_seconds=window,
+                partitions=filter_config.get("partitions", 4),
+                capacity=filter_config.get("capacity", 10000),
+                error_rate=filter_config.get("error_rate", 0.01)
+            )
+            # Catch up on URLs stored after the checkpoint was written, or rebuild without one.
+            # Imported rows carry their original times, so they need a full rebuild too
+            if imported:
+                self.seen_urls.clear()
+            since = self.seen_urls.saved_at - 60 if self.seen_urls.saved_at and not imported else time.time() - window
+            self.seen_urls.add_many(self.state_store.scraped_since(since))
+    
+    def legacy_state_dirs(self):
+        """Get the directories older versions kept this city's JSON scrape state in
+        
+        That state was written to each run's output directory, which the
+        scheduler dates per run under {city}_news, {city}_continuous and
+        {city}_weekend_news, both next to this package and in src/local.
+        """
+        src_local_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        directories = [self.output_dir]
+        for root in (os.path.join(src_local_path, "output"), os.path.join(os.path.dirname(src_local_path), "output")):
+            for name in ("news", "continuous", "weekend_news"):
+                directories.append(os.path.join(root, f"{self.city_code}_{name}"))
+        return directories
+    
     def init_driver(self):
-        """Initialize the Selenium WebDriver"""
+        """Lease a pre-warmed Chrome session from the shared browser pool"""
         try:
-            options = Options()
-            if self.headless:
-                options.add_argument("--headless=new")
-            
-            options.add_argument("--disable-gpu")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("--disable-notifications")
-            options.add_argument("--disable-popup-blocking")
-            
-            # Add user agent to avoid detection
-            options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
-            
-            # Disable WebGL to avoid errors
-            options.add_argument("--disable-webgl")
-            options.add_argument("--disable-3d-apis")
-            
-            # Use a simpler approach that should work on Windows
-            try:
-                # Try using the built-in selenium manager
-                self.driver = webdriver.Chrome(options=options)
-            except Exception as e:
-                self.logger.warning(f"Default Chrome initialization failed: {str(e)}")
-                
-                # Try with explicit import of webdriver_manager
-                from webdriver_manager.chrome import ChromeDriverManager
-                from selenium.webdriver.chrome.service import Service
-                
-                # Install the driver and create a service
-                driver_path = ChromeDriverManager().install()
-                self.logger.info(f"ChromeDriver installed at: {driver_path}")
-                
-                # Create service with the installed driver
-                service = Service(executable_path=driver_path)
-                
-                # Initialize Chrome with the service
-                self.driver = webdriver.Chrome(service=service, options=options)
-            
-            self.driver.set_page_load_timeout(self.timeout)
-            self.logger.info("WebDriver initialized successfully")
+            self.driver = get_browser_pool(self.headless).acquire(page_load_timeout=self.timeout)
+            self.block_profile = None
+            self.page_load_timeout = self.timeout
+            self.browser_memory.session_started()
+            self.logger.info("WebDriver leased from browser pool")
         except Exception as e:
             self.logger.error(f"Error initializing WebDriver: {str(e)}")
             raise
     
+    def ensure_driver(self):
+        """Start the browser the first time a source or article needs it"""
+        if not self.driver:
+            self.init_driver()
+        return self.driver
+    
+    def navigate(self, url):
+        """Load a URL in the browser once the host's rate limit allows it
+        
+        Raises:
+            CircuitOpenError: If the host's circuit is open
+        """
+        self.ensure_driver()
+        if not self.circuit_breaker.allow(url):
+            raise CircuitOpenError(f"Circuit open for {url}")
+        
+        # Give each host a page-load timeout based on how long its pages usually take
+        page_load_timeout = self.latency.page_load_timeout(url, self.timeout)
+        if page_load_timeout != self.page_load_timeout:
+            self.driver.set_page_load_timeout(page_load_timeout)
+            self.page_load_timeout = page_load_timeout
+        
+        self.rate_limiter.acquire(url)
+        self.browser_memory.page_loaded()
+        started = time.time()
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            self.latency.record(url, load=page_load_timeout)
+            self.circuit_breaker.record(url, False)
+            raise
+        except Exception:
+            self.circuit_breaker.record(url, False)
+            raise
+        self.latency.record(url, load=time.time() - started)
+        self.circuit_breaker.record(url, True)
+    
     def close_driver(self):
-        """Close the webdriver"""
-        if hasattr(self, 'driver'):
-            self.driver.quit()
-            self.logger.info("Chrome webdriver closed")
+        """Return the webdriver to the browser pool"""
+        if self.driver:
+            get_browser_pool(self.headless).release(self.driver)
+            self.driver = None
+            self.block_profile = None
+            self.logger.info("Chrome webdriver returned to pool")
+    
+    def recycle_browser_if_needed(self):
+        """Swap the browser session for a fresh one if it has grown past its memory or page limit
+        
+        Called between articles; the next page load leases the new session, so
+        scraping carries on with the next URL.
+        
+        Returns:
+            bool: True if the session was recycled
+        """
+        with self.browser_lock:
+            reason = self.browser_memory.recycle_reason(self.driver)
+            if not reason:
+                return False
+            
+            self.logger.info(f"Recycling browser session: {reason}")
+            get_browser_pool(self.headless).release(self.driver, discard=True)
+            self.driver = None
+            self.block_profile = None
+            self.browser_memory.recycled(reason)
+            return True
+    
+    def apply_block_profile(self, source_config):
+        """Block the resources a source doesn't need before loading its pages"""
+        self.ensure_driver()
+        profile, patterns = get_block_patterns(source_config)
+        
+        # Only talk to DevTools when the profile actually changes
+        if profile != self.block_profile:
+            if apply_block_patterns(self.driver, patterns):
+                self.block_profile = profile
+                self.logger.debug(f"Applied block profile {profile} ({len(patterns)} patterns)")
+    
+    def record_page_metrics(self, source_config, url=None):
+        """Add the current page's transfer size and load time to the source's totals"""
+        metrics = measure_page_load(self.driver)
+        if not metrics:
+            return
+        
+        if url and metrics.get("ttfb_ms"):
+            self.latency.record(url, ttfb=metrics["ttfb_ms"] / 1000)
+        
+        totals = self.page_metrics.setdefault(source_config["name"], {"pages": 0, "bytes": 0, "requests": 0, "load_ms": 0})
+        totals["pages"] += 1
+        totals["bytes"] += metrics.get("bytes", 0)
+        totals["requests"] += metrics.get("requests", 0)
+        totals["load_ms"] += metrics.get("load_ms", 0)
+    
+    def log_page_metrics(self, source_config):
+        """Log bytes transferred and average load time for a source's browser pages"""
+        totals = self.page_metrics.get(source_config["name"])
+        if not totals or not totals["pages"]:
+            return
+        
+        self.logger.info(
+            f"{source_config['name']}: {totals['pages']} browser pages, "
+            f"{totals['bytes'] / 1024:.0f} KB transferred in {totals['requests']} requests, "
+            f"average load {totals['load_ms'] / totals['pages']:.0f} ms "
+            f"(block profile: {self.block_profile or 'none'})"
+        )
+    
+    def load_fetch_modes(self):
+        """Load the fetch mode recorded for each source on previous runs"""
+        if not os.path.exists(self.fetch_modes_path):
+            return {}
+        
+        try:
+            with open(self.fetch_modes_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+    
+    def record_fetch_mode(self, source_id, mode):
+        """Remember which fetch mode worked for a source so later runs skip the failed one"""
+        if self.fetch_modes.get(source_id) == mode:
+            return
+        
+        self.fetch_modes[source_id] = mode
+        with open(self.fetch_modes_path, 'w', encoding='utf-8') as f:
+            json.dump(self.fetch_modes, f, ensure_ascii=False, indent=2)
+        
+        self.logger.info(f"Recorded fetch mode '{mode}' for source {source_id}")
+    
+    def get_source_fetch_mode(self, source_id, source_config):
+        """Decide whether a source should be fetched over plain HTTP or with the browser"""
+        # Explicit per-source configuration wins
+        configured = source_config.get("fetch_mode")
+        if configured in ("http", "browser"):
+            return configured
+        
+        if self.fetch_mode in ("http", "browser"):
+            return self.fetch_mode
+        
+        # Otherwise use whatever worked last time, trying HTTP first
+        return self.fetch_modes.get(source_id, "http")
     
     def clean_content(self, content):
         """Clean article content to make it more usable"""
@@ -163,7 +444,7 @@ class BaseCityScraper:
         # ... (Keep the existing implementation)
         if not content:
             return ""
-            
+        
         # Remove excessive whitespace
         content = re.sub(r'\n\s*\n', '\n\n', content)
         
@@ -238,7 +519,7 @@ class BaseCityScraper:
         
         Args:
             text: Text to clean
-            
+        
         Returns:
             str: Cleaned text
         """
@@ -287,11 +568,57 @@ class BaseCityScraper:
         except:
             return []
     
+    def extract_text_from_soup(self, soup, selector):
+        """Extract text from elements matching the selector in parsed HTML"""
+        try:
+            texts = []
+            for element in soup.select(selector):
+                # Keep paragraphs on separate lines like the browser's rendered text
+                paragraphs = element.find_all('p')
+                if paragraphs:
+                    text = "\n".join(p.get_text(" ", strip=True) for p in paragraphs if p.get_text(strip=True))
+                else:
+                    text = element.get_text(" ", strip=True)
+                if text:
+                    texts.append(text)
+            return " ".join(texts)
+        except:
+            return ""
+    
+    def extract_images_from_soup(self, soup, selector, base_url):
+        """Extract image URLs from elements matching the selector in parsed HTML"""
+        try:
+            image_urls = []
+            for element in soup.select(selector):
+                src = element.get("src") or element.get("data-src")
+                if not src:
+                    continue
+                src = urljoin(base_url, src)
+                if src.startswith("http") and not src.endswith(".svg"):
+                    image_urls.append(src)
+            return image_urls
+        except:
+            return []
+    
     def scroll_page(self, num_scrolls=3):
-        """Scroll down the page to load more content"""
-        for _ in range(num_scrolls):
-            self.driver.execute_script("window.scrollBy(0, window.innerHeight);")
-            time.sleep(1)
+        """Scroll down the page to load more content, stopping once no new links appear"""
+        result = scroll_until_stable(self.driver, max_scrolls=num_scrolls)
+        self.page_wait_seconds.append(result["seconds"])
+        self.logger.debug(f"Scrolled {result.get('scrolls', 0)} times in {result['seconds']}s, {result.get('anchors', 0)} links on page")
+    
+    def wait_until_ready(self, *chains):
+        """Wait for every selector chain to have a match, or for the page to go idle
+        
+        Args:
+            chains: Lists of CSS selectors; the page is ready once one selector of each is present
+        
+        Returns:
+            bool: False if the page neither matched nor settled before the timeout
+        """
+        result = wait_for_page_ready(self.driver, groups=chains)
+        self.page_wait_seconds.append(result["seconds"])
+        self.logger.debug(f"Page ready ({result['state']}) after {result['seconds']}s")
+        return result["state"] != "timeout"
     
     def handle_popups(self):
         """Handle common cookie/privacy popups"""
@@ -342,76 +669,252 @@ class BaseCityScraper:
         except:
             return ""
     
+    def check_listing_unchanged(self, source_config):
+        """Send a conditional request for a source homepage
+        
+        Only meaningful for sources whose links are found over HTTP: the static
+        response of a page that renders its links with JavaScript stays the
+        same while its stories change.
+        
+        Returns:
+            tuple: (unchanged, html) where html is the fetched page when the server sent one
+        """
+        if not self.listing_cache:
+            return False, None
+        
+        url = source_config["url"]
+        response = self.http_fetcher.fetch(url, headers=self.listing_cache.conditional_headers(url))
+        if response is None or response.status_code not in (200, 304):
+            return False, None
+        
+        unchanged = self.listing_cache.check(url, response)
+        html = self.http_fetcher.response_html(url, response) if response.status_code == 200 else None
+        return unchanged, html
+    
+    def find_article_links_http(self, source_config, html=None):
+        """Find article links on a source homepage using a plain HTTP request
+        
+        Args:
+            source_config: Configuration of the source
+            html: Homepage HTML if it has already been fetched
+        """
+        if html is None:
+            html = self.http_fetcher.fetch_html(source_config["url"])
+        if not html:
+            return []
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        article_links = []
+        matched = None
+        
+        for selector in self.get_link_selectors(source_config):
+            elements = soup.select(selector)
+            if elements:
+                self.logger.info(f"Found {len(elements)} elements with selector: {selector}")
+                for element in elements:
+                    href = element.get("href")
+                    if not href:
+                        continue
+                    href = normalize_url(href, source_config["url"])
+                    if self.is_article_link(href):
+                        article_links.append(href)
+                
+                if article_links:
+                    matched = selector
+                    break
+        
+        # A miss over HTTP falls back to the browser, which records the outcome instead
+        if matched:
+            self.record_selector_matches(source_config, "listing", {"links": matched})
+        return article_links
+    
+    def find_article_links_browser(self, source_config):
+        """Find article links on a source homepage by rendering it in the browser
+        
+        Returns:
+            list: Article links, or None if the page could not be loaded
+        """
+        self.apply_block_profile(source_config)
+        
+        # Navigate to the source URL with retry
+        success = False
+        for attempt in range(self.retry_count):
+            try:
+                self.navigate(source_config["url"])
+                self.logger.info(f"Navigated to {source_config['url']}")
+                success = True
+                break
+            except Exception as e:
+                self.logger.warning(f"Attempt {attempt+1} failed to navigate to {source_config['url']}: {str(e)}")
+        
+        if not success:
+            self.logger.error(f"Failed to navigate to {source_config['url']} after {self.retry_count} attempts")
+            return None
+        
+        # Handle cookie/privacy popups
+        self.handle_popups()
+        
+        # Wait for the link list to render, then scroll down to load more content
+        self.wait_until_ready(self.get_link_selectors(source_config))
+        self.scroll_page(get_scraping_config("page_readiness").get("max_scrolls", 4))
+        self.record_page_metrics(source_config)
+        
+        article_links = []
+        matched = None
+        
+        for selector in self.get_link_selectors(source_config):
+            elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                self.logger.info(f"Found {len(elements)} elements with selector: {selector}")
+                for element in elements:
+                    try:
+                        href = normalize_url(element.get_attribute("href"))
+                        if self.is_article_link(href):
+                            article_links.append(href)
+                    except:
+                        continue
+                
+                if article_links:
+                    matched = selector
+                    break
+        
+        self.record_selector_matches(source_config, "listing", {"links": matched})
+        return article_links
+    
+    def get_link_selectors(self, source_config):
+        """Get the article link selectors to try for a source, proven selectors first"""
+        chain = [
+            source_config["article_selector"],
+            "a.headline, a.title, a.article-title, h2 a, h3 a",  # Generic fallback selectors
+            "article a, .story a, .post a, .entry a"  # More generic fallback
+        ]
+        return self.order_selectors(source_config, "listing", "links", chain)
+    
+    def order_selectors(self, source_config, template, field, chain):
+        """Reorder a fallback chain using what worked for this source before"""
+        if not self.selector_cache:
+            return chain
+        return self.selector_cache.order(self.get_source_id(source_config), template, field, chain)
+    
+    def record_selector_matches(self, source_config, template, matched):
+        """Record which selector found each field, None meaning the whole chain missed
+        
+        Args:
+            source_config: Source the page belongs to
+            template: Page template, or 'listing' for the homepage
+            matched: Dict of field to the selector that found it
+        """
+        if not self.selector_cache:
+            return
+        source_id = self.get_source_id(source_config)
+        for field, selector in matched.items():
+            self.selector_cache.record(source_id, template, field, selector)
+    
+    def is_article_link(self, href):
+        """Check if a link looks like an article rather than a tag or category page"""
+        return bool(href) and href.startswith("http") and "/tag/" not in href and "/category/" not in href
+    
     def scrape_source(self, source_id, source_config):
-        """Scrape a specific news source"""
-        articles = []
-        source_failed_urls = []
+        """Scrape a specific news source
         
+        Returns:
+            int: Number of articles scraped
+        """
+        return ScrapePipeline(self).run({source_id: source_config})
+    
+    def discover_source(self, source_id, source_config):
+        """Find the article links of a source that should be scraped this run
+        
+        Returns:
+            dict: Links to scrape and the listing state needed by finish_source(),
+                  or None if the source should be skipped this run
+        """
         # Store current source_id for use in other methods
         self.current_source_id = source_id
         
+        # Skip the whole source while its site is known to be down or blocking us
+        if self.circuit_breaker.is_open(source_config["url"]):
+            self.logger.warning(f"Circuit open for {source_config['name']}, skipping source")
+            return None
+        
+        if self.selector_cache:
+            self.selector_cache.begin_run(source_id)
+        
         try:
-            # Navigate to the source URL with retry
-            success = False
-            for attempt in range(self.retry_count):
-                try:
-                    self.driver.get(source_config["url"])
-                    self.logger.info(f"Navigated to {source_config['url']}")
-                    success = True
-                    break
-                except Exception as e:
-                    self.logger.warning(f"Attempt {attempt+1} failed to navigate to {source_config['url']}: {str(e)}")
-                    time.sleep(2)
-            
-            if not success:
-                self.logger.error(f"Failed to navigate to {source_config['url']} after {self.retry_count} attempts")
-                return articles
+            mode = self.get_source_fetch_mode(source_id, source_config)
+            listing_mode = mode
+            article_links = None
             
-            # Handle cookie/privacy popups
-            self.handle_popups()
+            # Prefer the source's feed or news sitemap over rendering its homepage
+            if self.feed_discovery.has_feed(source_config):
+                article_links = self.feed_discovery.discover(source_id, source_config)
+                if article_links is not None:
+                    listing_mode = "feed"
+                else:
+                    self.logger.info(f"No usable feed for {source_config['name']}, falling back to homepage")
             
-            # Scroll down to load more content
-            self.scroll_page(4)
+            if article_links is None:
+                # Skip link extraction entirely when the homepage hasn't changed since the last run,
+                # which only the static HTML of an HTTP-mode source can tell
+                listing_unchanged, listing_html = False, None
+                if mode == "http":
+                    listing_unchanged, listing_html = self.check_listing_unchanged(source_config)
+                if listing_unchanged and not self.frontier:
+                    self.logger.info(f"Listing page unchanged since last run, skipping {source_config['name']}")
+                    return None
+                if listing_unchanged:
+                    # Nothing new to discover, but links left over from earlier runs may be due
+                    self.logger.info(f"Listing page unchanged since last run, only pulling queued links for {source_config['name']}")
+                    listing_mode = "queued"
+                article_links = []
             
-            # Find article links
-            article_links = []
+            # Find article links, trying plain HTTP before rendering the page
+            if listing_mode == "http":
+                article_links = self.find_article_links_http(source_config, html=listing_html)
+                if not article_links:
+                    self.logger.info(f"No article links found over HTTP for {source_config['name']}, falling back to browser")
+                    listing_mode = "browser"
             
-            # Try multiple selectors if the primary one fails
-            selectors = [
-                source_config["article_selector"],
-                "a.headline, a.title, a.article-title, h2 a, h3 a",  # Generic fallback selectors
-                "article a, .story a, .post a, .entry a"  # More generic fallback
-            ]
+            if listing_mode == "browser":
+                with self.browser_lock:
+                    article_links = self.find_article_links_browser(source_config)
+                    self.recycle_browser_if_needed()
+                if article_links is None:
+                    return None
             
-            for selector in selectors:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    self.logger.info(f"Found {len(elements)} elements with selector: {selector}")
-                    for element in elements:
-                        try:
-                            href = element.get_attribute("href")
-                            if href and href.startswith("http") and "/tag/" not in href and "/category/" not in href:
-                                article_links.append(href)
-                        except:
-                            continue
-                    
-                    if article_links:
-                        break
+            # Deduplicate links and their AMP, mobile and tracking-tagged variants, keeping
+            # page order (feed links are already ordered newest first)
+            listing_links = unique_urls(article_links)
+            article_links = listing_links
             
-            # Deduplicate links
-            article_links = list(set(article_links))
+            # Only queue links that weren't on the homepage last run
+            if listing_mode not in ("feed", "queued") and self.link_snapshots:
+                article_links = self.link_snapshots.diff(source_id, listing_links)
+                self.logger.info(f"{len(article_links)} of {len(listing_links)} links on {source_config['name']} are new since last run")
             
             # Limit the number of articles to process
             max_articles = source_config.get("max_articles", 15)
-            article_links = article_links[:max_articles]
+            if self.frontier:
+                # Links over the limit wait in the frontier, which hands out the most urgent ones first
+                self.frontier.add(article_links, source_id, priority=source_config.get("priority", 0))
+                article_links = self.frontier.next_batch(source_id, max_articles)
+                deferred_links = []
+            else:
+                deferred_links = article_links[max_articles:]
+                article_links = article_links[:max_articles]
             
             self.logger.info(f"Found {len(article_links)} article links for {source_config['name']}")
             
+            # Links the seen filter has certainly not scraped don't need checking
+            candidate_links = article_links
+            if self.seen_urls:
+                candidate_links = [url for url in article_links if self.seen_urls.might_contain(canonical_url(url))]
+            
             # Batch check URLs in a single request where possible
-            if self.use_supabase and article_links:
+            if self.use_supabase and candidate_links:
                 try:
-                    # Create a comma-separated list of URLs for the 'in' operator
-                    url_list = ",".join([f"'{url}'" for url in article_links])
+                    # Create a comma-separated list of URL keys for the 'in' operator
+                    url_list = ",".join([f"'{canonical_url(url)}'" for url in candidate_links])
                     
                     # Get status of all URLs in one request
                     query = f"url.in.({url_list}),status.eq.scraped"
@@ -421,313 +924,537 @@ class BaseCityScraper:
                         .execute()
                     
                     # Create a set of already scraped URLs for fast lookups
-                    scraped_urls = {item['url'] for item in response.data} if response.data else set()
-                    
+                    scraped_keys = {item['url'] for item in response.data} if response.data else set()
+                    scraped_urls = {url for url in candidate_links if canonical_url(url) in scraped_keys}
+                    if self.seen_urls:
+                        for url in candidate_links:
+                            self.seen_urls.confirm(url in scraped_urls)
+                
                 except Exception as e:
                     self.logger.warning(f"Error batch checking URLs: {str(e)}")
                     scraped_urls = set()
             else:
                 scraped_urls = set()
             
-            # Process each article link
-            for url in article_links:
-                # Skip already scraped URLs
-                if url in scraped_urls:
-                    self.logger.info(f"Skipping already scraped URL: {url}")
-                    continue
-                
-                try:
-                    # Scrape the article
-                    article = self.scrape_article(url, source_config)
-                    
-                    if article:
-                        # Add metadata
-                        article.source = source_config["name"]
-                        article.city = self.city_name
-                        article.region = self.region
-                        
-                        # Save article to Supabase if enabled
-                        if self.use_supabase:
-                            self.save_article_to_supabase(article)
-                        
-                        articles.append(article)
-                except Exception as e:
-                    self.logger.error(f"Error scraping article {url}: {str(e)}")
-                    source_failed_urls.append(url)
-            
-            # Add failed URLs to the overall list
-            self.failed_urls.extend(source_failed_urls)
-            
-            return articles
+            return {
+                "listing_mode": listing_mode,
+                "article_mode": mode if listing_mode in ("feed", "queued") else listing_mode,
+                "listing_links": listing_links,
+                "article_links": article_links,
+                "deferred_links": deferred_links,
+                "scraped_urls": scraped_urls
+            }
         except Exception as e:
             self.logger.error(f"Error scraping source {source_id}: {str(e)}")
-            return articles
-    
-    def scrape_article(self, url, source_config):
-        """Scrape a single article with retry logic and deduplication"""
-        # Check if URL is in the blocklist
-        if self.is_url_blocklisted(url):
-            self.logger.warning(f"Skipping blocklisted URL: {url}")
             return None
+    
+    def finish_source(self, source_id, source_config, discovery, failed_urls, fetch_mode_counts):
+        """Record listing state once every discovered article of a source has been processed
+        
+        Args:
+            source_id: Source that was scraped
+            source_config: Configuration of the source
+            discovery: Result of discover_source()
+            failed_urls: Article URLs that raised or came back empty while being scraped
+            fetch_mode_counts: Articles produced per fetch mode, {"http": ..., "browser": ...}
+        """
+        listing_mode = discovery["listing_mode"]
+        
+        # Links over the limit or that failed stay new for the next run
+        if listing_mode not in ("feed", "queued") and self.link_snapshots:
+            self.link_snapshots.commit(source_id, discovery["listing_links"], unprocessed=discovery["deferred_links"] + failed_urls)
+        
+        # Remember which mode worked for this source
+        with self.state_lock:
+            if listing_mode == "browser" and discovery["article_links"]:
+                self.record_fetch_mode(source_id, "browser")
+            elif fetch_mode_counts["http"]:
+                self.record_fetch_mode(source_id, "http")
+            elif fetch_mode_counts["browser"]:
+                self.record_fetch_mode(source_id, "browser")
+        
+        # The listing has been fully processed, so later runs may skip it while it stays the same
+        if listing_mode == "feed":
+            self.feed_discovery.mark_success(source_id)
+        elif self.listing_cache:
+            # Links that only turned up in the browser mean the static fingerprint can't be trusted
+            if listing_mode == "browser":
+                self.listing_cache.discard(source_config["url"])
+            else:
+                self.listing_cache.commit(source_config["url"])
         
-        # Check if we've already scraped this URL recently
-        if self.is_duplicate_url(url):
-            self.logger.info(f"Skipping already scraped URL: {url}")
+        # Add failed URLs to the overall list
+        self.failed_urls.extend(failed_urls)
+        self.state_store.flush()
+        if self.seen_urls:
+            self.seen_urls.save()
+        
+        self.log_page_metrics(source_config)
+    
+    def extract_fields_from_html(self, html, url, source_config, matched=None):
+        """Extract article fields from a page's HTML without touching the network
+        
+        Args:
+            html: Page HTML
+            url: Page URL, used to resolve image links
+            source_config: Source the page belongs to
+            matched: Optional dict that receives the selector that found each field
+        
+        Returns:
+            dict: Extracted fields, or None if no title or content was found
+        """
+        if matched is None:
+            matched = {}
+        
+        # The URL the page declares for itself names the article across its variants
+        canonical = extract_canonical_link(html, url)
+        
+        # Pages that describe themselves in JSON-LD need no DOM or selectors at all
+        structured, complete = self.extract_structured_article(html, url)
+        if complete:
+            structured["canonical_url"] = canonical
+            return structured
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        for tag in soup(["script", "style", "noscript"]):
+            tag.decompose()
+        
+        text_selectors, image_selectors = self.get_field_selectors(source_config, url)
+        fields = {}
+        for field, chain in text_selectors.items():
+            fields[field] = ""
+            matched[field] = None
+            for selector in chain:
+                fields[field] = self.extract_text_from_soup(soup, selector)
+                if fields[field]:
+                    matched[field] = selector
+                    break
+        
+        fields["image_urls"] = []
+        matched["image_urls"] = None
+        for selector in image_selectors:
+            fields["image_urls"] = self.extract_images_from_soup(soup, selector, url)
+            if fields["image_urls"]:
+                matched["image_urls"] = selector
+                break
+        
+        self.fill_missing_fields_from_soup(soup, fields)
+        self.fill_missing_fields_from_structured(structured, fields)
+        
+        if not fields["title"] or not fields["content"]:
             return None
         
+        fields["canonical_url"] = canonical
+        return fields
+    
+    def extract_structured_article(self, html, url):
+        """Extract article fields from a page's JSON-LD or OpenGraph metadata
+        
+        Returns:
+            tuple: (fields or None when disabled, whether the title and content
+                   are complete enough to skip selector extraction)
+        """
+        if not self.structured_data.get("enabled", True):
+            return None, False
+        
+        structured = extract_structured_fields(html)
+        fields = {field: structured[field] for field in ("title", "content", "author", "published_date", "image_urls")}
+        if not has_required_fields(fields, self.structured_data.get("min_content_length", 200)):
+            return fields, False
+        
+        self.structured_hits += 1
+        self.logger.debug(f"Extracted article from {structured['structured_source']} metadata: {url}")
+        return fields, True
+    
+    def fill_missing_fields_from_structured(self, structured, fields):
+        """Fill in fields the selectors missed from partial structured metadata"""
+        if not structured:
+            return
+        
+        for field, value in structured.items():
+            if value and not fields.get(field):
+                fields[field] = value
+    
+    def scrape_article_browser_fields(self, url, source_config):
+        """Extract article fields by rendering the page in the browser
+        
+        Returns:
+            dict: Extracted fields, or None if no title or content was found
+        """
+        self.apply_block_profile(source_config)
+        
         # Attempt to scrape with retry logic
         for attempt in range(self.retry_count):
             try:
                 # Navigate to the article URL
-                self.driver.get(url)
+                self.navigate(url)
                 self.logger.info(f"Navigating to article: {url}")
                 
-                # Handle cookie/privacy popups
-                self.handle_popups()
-                
-                # Wait for the content to load
-                try:
-                    # Try multiple selectors for content
-                    selectors = [
-                        source_config["title_selector"],
-                        "h1, .headline, .title, .article-title",  # Generic fallback
-                    ]
-                    
-                    for selector in selectors:
-                        try:
-                            WebDriverWait(self.driver, 10).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                            )
-                            break
-                        except:
-                            continue
-                except TimeoutException:
-                    self.logger.warning(f"Timeout waiting for article content: {url}")
-                    if attempt < self.retry_count - 1:
-                        self.logger.info(f"Retrying article {url}, attempt {attempt+2}/{self.retry_count}")
-                        time.sleep(2)
-                        continue
-                
-                # Extract article information
-                title = self.extract_text(source_config["title_selector"]) or self.extract_text("h1, .headline, .title")
-                content = self.extract_text(source_config["content_selector"]) or self.extract_text(".content, .article-body, .entry-content")
-                author = self.extract_text(source_config["author_selector"]) or self.extract_text(".author, .byline")
-                published_date = self.extract_text(source_config["date_selector"]) or self.extract_text(".date, time, .published")
-                
-                # Extract images
-                image_urls = self.extract_images(source_config["image_selector"]) or self.extract_images("img")
-                
-                # If no title or content, try to extract from page source
-                if not title or not content:
-                    soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                    
-                    # Try to find title
-                    if not title:
-                        title_tag = soup.find('h1') or soup.find('title')
-                        if title_tag:
-                            title = title_tag.text.strip()
-                    
-                    # Try to find content
-                    if not content:
-                        content_tags = soup.find_all(['p', 'article', 'div'], class_=['content', 'article', 'entry', 'story'])
-                        if content_tags:
-                            content = "\n\n".join([tag.text.strip() for tag in content_tags if tag.text.strip()])
+                # Learn from the final attempt only, so retries don't count twice
+                fields = self.extract_loaded_article(url, source_config, record_misses=attempt == self.retry_count - 1)
                 
                 # Skip if still no title or content
-                if not title or not content:
+                if not fields["title"] or not fields["content"]:
                     self.logger.warning(f"Skipping article with no title or content: {url}")
                     if attempt < self.retry_count - 1:
                         self.logger.info(f"Retrying article {url}, attempt {attempt+2}/{self.retry_count}")
-                        time.sleep(2)
                         continue
                     return None
                 
-                # Clean the content
-                content = self.clean_content(content)
-                
-                # Extract slug from URL for reference
-                slug = self.extract_slug_from_url(url)
-                
-                # Create article object with city metadata
-                article = Article(
-                    url=url,
-                    title=title,
-                    content=content,
-                    author=author,
-                    published_date=published_date,
-                    source=source_config["name"],
-                    image_urls=image_urls,
-                    slug=slug,
-                    city=self.city_name,
-                    region=self.region
-                )
-                
-                # New: Add the content similarity check
-                if self.is_similar_to_existing_article(title, content):
-                    self.logger.info(f"Skipping article with similar content: {url}")
-                    return None
-                
-                return article
-                
+                return fields
+            
             except Exception as e:
                 self.logger.error(f"Error scraping article {url} (attempt {attempt+1}/{self.retry_count}): {str(e)}")
                 if attempt == self.retry_count - 1:
                     # Track consistently failing URL
-                    self.track_failed_url(url)
+                    with self.state_lock:
+                        self.track_failed_url(url)
                 
                 if attempt < self.retry_count - 1:
-                    time.sleep(2)
                     continue
                 return None
         
         return None
     
-    def is_url_blocklisted(self, url):
-        """Check if URL is in the blocklist"""
-        blocklist_path = os.path.join(self.output_dir, "blocklist.json")
-        if not os.path.exists(blocklist_path):
-            return False
+    def extract_loaded_article(self, url, source_config, record_misses=True):
+        """Extract article fields from the page loaded in the browser's current window
         
-        try:
-            with open(blocklist_path, 'r', encoding='utf-8') as f:
-                blocklist = json.load(f)
-            return url in blocklist
-        except:
-            return False
-    
-    def track_failed_url(self, url):
-        """Track a failed URL and potentially add to blocklist"""
-        failed_tracking_path = os.path.join(self.output_dir, "failed_url_count.json")
+        Args:
+            url: URL of the loaded page
+            source_config: Source the page belongs to
+            record_misses: Whether fields no selector found count against the selector cache
         
-        # Load existing tracking data
-        if os.path.exists(failed_tracking_path):
-            try:
-                with open(failed_tracking_path, 'r', encoding='utf-8') as f:
-                    failed_counts = json.load(f)
-            except:
-                failed_counts = {}
+        Returns:
+            dict: Extracted fields; title or content are empty if they weren't found
+        """
+        # Handle cookie/privacy popups
+        self.handle_popups()
+        
+        # Wait for the title and the body to render or the page to settle; client-rendered
+        # pages often show the headline well before the article text
+        text_selectors, image_selectors = self.get_field_selectors(source_config, url)
+        if not self.wait_until_ready(text_selectors["title"], text_selectors["content"]):
+            self.logger.warning(f"Timeout waiting for article content: {url}")
+        self.record_page_metrics(source_config, url)
+        html = self.driver.page_source
+        self.cache_html(url, source_config, html)
+        canonical = extract_canonical_link(html, url)
+        
+        # Rendered pages carry the same JSON-LD, and reading it skips the selector round trip
+        structured, complete = self.extract_structured_article(html, url)
+        if complete:
+            structured["canonical_url"] = canonical
+            return structured
+        
+        # Extract every field and its fallbacks in a single round trip
+        extracted = extract_fields(self.driver, text_selectors, image_selectors)
+        if extracted:
+            fields = dict(extracted["fields"])
+            fields["image_urls"] = extracted["image_urls"]
+            matched = extracted["matched"]
+            self.logger.debug(f"Matched selectors for {url}: {matched}")
         else:
-            failed_counts = {}
+            fields = {field: "" for field in text_selectors}
+            fields["image_urls"] = []
+            matched = {field: None for field in fields}
         
-        # Update count
-        failed_counts[url] = failed_counts.get(url, 0) + 1
+        if self.selector_cache and ((fields["title"] and fields["content"]) or record_misses):
+            self.record_selector_matches(source_config, self.selector_cache.page_template(url), matched)
         
-        # Save updated tracking
-        with open(failed_tracking_path, 'w', encoding='utf-8') as f:
-            json.dump(failed_counts, f, ensure_ascii=False, indent=2)
+        # If no title or content, try to extract from page source
+        if not fields["title"] or not fields["content"]:
+            soup = BeautifulSoup(html, 'html.parser')
+            self.fill_missing_fields_from_soup(soup, fields)
+        self.fill_missing_fields_from_structured(structured, fields)
+        fields["canonical_url"] = canonical
         
-        # If a URL has failed more than 5 times, add to blocklist
-        if failed_counts[url] >= 5:
-            self.add_to_blocklist(url)
+        return fields
     
-    def add_to_blocklist(self, url):
-        """Add a URL to the blocklist"""
-        blocklist_path = os.path.join(self.output_dir, "blocklist.json")
+    def scrape_articles_in_tabs(self, articles):
+        """Render several articles at once in background tabs of the leased browser
+        
+        Every page is opened in its own tab so their network loads overlap,
+        then the tabs are extracted in the order they were opened while the
+        later ones keep loading. Each tab is opened blank and given the
+        source's block profile (a new tab is its own DevTools target) before it
+        is pointed at the article, and its load is held to the host's
+        page-load timeout and recorded in the latency tracker like navigate()
+        does. Pages that fail, time out or come back empty in a tab get the
+        usual one-page-at-a-time retries.
+        
+        Args:
+            articles: List of (url, source_config) pairs
         
-        # Load existing blocklist
-        if os.path.exists(blocklist_path):
+        Returns:
+            dict: URL to extracted fields, or None if no title or content was found
+        """
+        results = {}
+        if len(articles) < 2:
+            for url, source_config in articles:
+                results[url] = self.scrape_article_browser_fields(url, source_config)
+            return results
+        
+        self.ensure_driver()
+        main_window = self.driver.current_window_handle
+        
+        # Start every load before waiting on any of them
+        tabs = []
+        for url, source_config in articles:
+            if not self.circuit_breaker.allow(url):
+                self.logger.warning(f"Circuit open, not opening tab for {url}")
+                results[url] = None
+                continue
+            
+            self.rate_limiter.acquire(url)
             try:
-                with open(blocklist_path, 'r', encoding='utf-8') as f:
-                    blocklist = json.load(f)
-            except:
-                blocklist = []
-        else:
-            blocklist = []
+                known_handles = set(self.driver.window_handles)
+                self.driver.execute_script("window.open('about:blank', '_blank');")
+                handle = next(handle for handle in self.driver.window_handles if handle not in known_handles)
+                self.driver.switch_to.window(handle)
+                apply_block_patterns(self.driver, get_block_patterns(source_config)[1])
+                page_load_timeout = self.latency.page_load_timeout(url, self.timeout)
+                
+                self.browser_memory.page_loaded()
+                self.driver.execute_script("window.location.href = arguments[0];", url)
+                tabs.append((handle, url, source_config, time.time(), page_load_timeout))
+                self.logger.info(f"Opening article in new tab: {url}")
+            except Exception as e:
+                self.logger.warning(f"Could not open tab for {url}: {str(e)}")
+                self.circuit_breaker.record(url, False)
         
-        # Add URL if not already in blocklist
-        if url not in blocklist:
-            blocklist.append(url)
+        for handle, url, source_config, started, page_load_timeout in tabs:
+            try:
+                self.driver.switch_to.window(handle)
+                if not self.wait_for_tab_load(url, started, page_load_timeout):
+                    self.logger.warning(f"Timeout loading article in tab after {page_load_timeout}s: {url}")
+                    self.circuit_breaker.record(url, False)
+                    continue
+                
+                fields = self.extract_loaded_article(url, source_config, record_misses=False)
+                self.circuit_breaker.record(url, True)
+                if fields["title"] and fields["content"]:
+                    results[url] = fields
+            except Exception as e:
+                self.logger.warning(f"Error loading article in tab {url}: {str(e)}")
+                self.circuit_breaker.record(url, False)
+            finally:
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except Exception:
+                    pass
         
-        # Save updated blocklist
-        with open(blocklist_path, 'w', encoding='utf-8') as f:
-            json.dump(blocklist, f, ensure_ascii=False, indent=2)
+        self.driver.switch_to.window(main_window)
         
-        self.logger.warning(f"Added URL to blocklist after repeated failures: {url}")
+        # Whatever didn't come through in a tab gets the usual retries
+        for url, source_config in articles:
+            if url not in results:
+                results[url] = self.scrape_article_browser_fields(url, source_config)
+        
+        return results
     
-    def is_duplicate_url(self, url):
-        """Check if URL has been recently scraped"""
-        # Path to store previously scraped URLs
-        scraped_urls_path = os.path.join(self.output_dir, "scraped_urls.json")
+    def wait_for_tab_load(self, url, started, page_load_timeout):
+        """Wait for the page in the current tab to finish loading, recording its load time
         
-        # Load existing scraped URLs
-        if os.path.exists(scraped_urls_path):
-            try:
-                with open(scraped_urls_path, 'r', encoding='utf-8') as f:
-                    scraped_data = json.load(f)
-            except:
-                scraped_data = {"urls": {}}
-        else:
-            scraped_data = {"urls": {}}
-        
-        # Check if URL exists and is recent (within last 48 hours)
-        current_time = datetime.now().timestamp()
-        if url in scraped_data["urls"]:
-            timestamp = scraped_data["urls"][url]
-            time_diff = current_time - timestamp
-            if time_diff < 172800:  # 48 hours in seconds
-                return True
+        Args:
+            url: URL the tab was pointed at
+            started: When the tab was pointed at it
+            page_load_timeout: Seconds the host's pages are given to load
+        
+        Returns:
+            bool: False if the page didn't load within the timeout, which is recorded as its load time
+        """
+        while True:
+            # The tab shows about:blank, already complete, until the navigation commits
+            loaded = self.driver.execute_script(
+                "return document.readyState === 'complete' && location.href !== 'about:blank';"
+            )
+            if loaded:
+                break
+            if time.time() - started >= page_load_timeout:
+                self.driver.execute_script("window.stop();")
+                self.latency.record(url, load=page_load_timeout)
+                return False
+            time.sleep(0.1)
+        
+        # Later tabs finish loading while earlier ones are extracted, so take the page's own timing
+        load_ms = self.driver.execute_script(
+            "const timing = performance.timing; return timing.loadEventEnd - timing.navigationStart;"
+        )
+        self.latency.record(url, load=load_ms / 1000 if load_ms and load_ms > 0 else time.time() - started)
+        return True
+    
+    def get_field_selectors(self, source_config, url=None):
+        """Get the selector chain for each article field, source-specific selectors first
         
-        # Record this URL as scraped
-        scraped_data["urls"][url] = current_time
+        Args:
+            source_config: Source the article belongs to
+            url: Article URL; when given, chains are reordered by what worked on its page template
         
-        # Prune old entries (older than 1 week)
-        for scraped_url in list(scraped_data["urls"].keys()):
-            if current_time - scraped_data["urls"][scraped_url] > 604800:  # 7 days in seconds
-                del scraped_data["urls"][scraped_url]
+        Returns:
+            tuple: (dict of text field to selector chain, image selector chain)
+        """
+        text_selectors = {
+            "title": [source_config["title_selector"], "h1, .headline, .title"],
+            "content": [source_config["content_selector"], ".content, .article-body, .entry-content"],
+            "author": [source_config["author_selector"], ".author, .byline"],
+            "published_date": [source_config["date_selector"], ".date, time, .published"]
+        }
+        image_selectors = [source_config["image_selector"], "img"]
+        
+        if url and self.selector_cache:
+            template = self.selector_cache.page_template(url)
+            for field, chain in text_selectors.items():
+                text_selectors[field] = self.order_selectors(source_config, template, field, chain)
+            image_selectors = self.order_selectors(source_config, template, "image_urls", image_selectors)
+        
+        return text_selectors, image_selectors
+    
+    def get_source_id(self, source_config):
+        """Get the key a source config is registered under in self.sources"""
+        for source_id, config in self.sources.items():
+            if config is source_config:
+                return source_id
+        return None
+    
+    def cache_html(self, url, source_config, html):
+        """Keep the raw HTML of a fetched article for offline re-extraction"""
+        if self.html_cache and html:
+            self.html_cache.put(url, html, city_code=self.city_code, source_id=self.get_source_id(source_config))
+    
+    def fill_missing_fields_from_soup(self, soup, fields):
+        """Fill in a missing title or content from generic page structure"""
+        # Try to find title
+        if not fields["title"]:
+            title_tag = soup.find('h1') or soup.find('title')
+            if title_tag:
+                fields["title"] = title_tag.text.strip()
+        
+        # Try to find content
+        if not fields["content"]:
+            content_tags = soup.find_all(['p', 'article', 'div'], class_=['content', 'article', 'entry', 'story'])
+            if content_tags:
+                fields["content"] = "\n\n".join([tag.text.strip() for tag in content_tags if tag.text.strip()])
+    
+    def build_article(self, url, source_config, fields, check_similar=True):
+        """Create an Article from extracted fields, or None if it duplicates recent content"""
+        title = fields["title"]
+        
+        # Store the article under the URL its site calls canonical; canonicals on
+        # other sites (syndicated copies) are only used as dedup keys
+        declared = fields.get("canonical_url")
+        if declared and self.canonical_config.get("follow_rel_canonical", True) and same_site(url, declared):
+            url = declared
+        
+        # Clean the content
+        content = self.clean_content(fields["content"])
+        
+        # Extract slug from URL for reference
+        slug = self.extract_slug_from_url(url)
+        
+        # Create article object with city metadata
+        article = Article(
+            url=url,
+            title=title,
+            content=content,
+            author=fields.get("author"),
+            published_date=fields.get("published_date"),
+            source=source_config["name"],
+            image_urls=fields.get("image_urls") or [],
+            slug=slug,
+            city=self.city_name,
+            region=self.region
+        )
         
-        # Save updated scraped URLs
-        with open(scraped_urls_path, 'w', encoding='utf-8') as f:
-            json.dump(scraped_data, f, ensure_ascii=False, indent=2)
+        # New: Add the content similarity check
+        if check_similar and self.is_similar_to_existing_article(title, content, url=url):
+            self.logger.info(f"Skipping article with similar content: {url}")
+            return None
         
-        return False
+        return article
     
-    def is_similar_to_existing_article(self, title, content):
-        """Check if article content is similar to existing articles"""
-        # Path to store content hashes for similarity detection
-        content_hashes_path = os.path.join(self.output_dir, "content_hashes.json")
+    def is_url_blocklisted(self, url):
+        """Check if URL is in the blocklist"""
+        return self.state_store.is_blocked(url)
+    
+    def track_failed_url(self, url):
+        """Track a failed URL and potentially add to blocklist"""
+        failures = self.state_store.record_failure(url)
         
-        # Create a simple hash of title and first 500 chars of content
-        import hashlib
-        content_sample = (title + " " + content[:500]).lower()
-        content_hash = hashlib.md5(content_sample.encode()).hexdigest()
+        # If a URL has failed too many times, add to blocklist
+        if failures >= self.state_config.get("block_after_failures", 5):
+            self.add_to_blocklist(url)
+    
+    def add_to_blocklist(self, url):
+        """Add a URL to the blocklist"""
+        self.state_store.block(url)
+        self.logger.warning(f"Added URL to blocklist after repeated failures: {url}")
+    
+    def is_duplicate_url(self, url):
+        """Check if URL has been recently scraped
         
-        # For more advanced similarity detection, implement a function that:
-        # 1. Tokenizes content
-        # 2. Removes stop words
-        # 3. Creates a TF-IDF or word embedding representation
-        # 4. Compares using cosine similarity
-        # But this simple hash approach works for exact duplicates
+        Nothing is recorded here: a URL only counts as scraped once its
+        article was saved (see mark_url_scraped()), so a fetch that fails
+        leaves it free to be retried.
+        """
+        key = canonical_url(url)
+        if not self.seen_urls:
+            return self.state_store.was_scraped(key, self.state_config.get("duplicate_hours", 48) * 3600)
         
-        # Load existing content hashes
-        if os.path.exists(content_hashes_path):
-            try:
-                with open(content_hashes_path, 'r', encoding='utf-8') as f:
-                    hash_data = json.load(f)
-            except:
-                hash_data = {"hashes": [], "timestamps": []}
-        else:
-            hash_data = {"hashes": [], "timestamps": []}
+        # A filter miss is certain, so the store isn't read
+        if not self.seen_urls.might_contain(key):
+            return False
         
-        # Check if similar content exists (within last 48 hours)
-        current_time = datetime.now().timestamp()
+        duplicate = self.state_store.was_scraped(key, self.state_config.get("duplicate_hours", 48) * 3600)
+        self.seen_urls.confirm(duplicate)
+        return duplicate
+    
+    def mark_url_scraped(self, url):
+        """Record a URL as scraped without checking it, once its article was saved"""
+        key = canonical_url(url)
+        self.state_store.mark_scraped(key)
+        if self.seen_urls:
+            self.seen_urls.add(key)
+    
+    def is_similar_to_existing_article(self, title, content, url=None):
+        """Check if article content is the same as or nearly the same as a recent article
         
-        # Prune old entries first (older than 48 hours)
-        while hash_data["timestamps"] and current_time - hash_data["timestamps"][0] > 172800:
-            hash_data["hashes"].pop(0)
-            hash_data["timestamps"].pop(0)
+        Args:
+            title: Article title
+            content: Cleaned article content
+            url: Article URL, stored so later near-duplicates can name it
+        """
+        window = self.state_config.get("similar_hours", 48) * 3600
         
-        # Check for similarity
-        if content_hash in hash_data["hashes"]:
+        # Create a simple hash of title and first 500 chars of content, which catches exact copies
+        import hashlib
+        content_sample = (title + " " + content[:500]).lower()
+        content_hash = hashlib.md5(content_sample.encode()).hexdigest()
+        if self.state_store.check_content_hash(content_hash, window):
             return True
         
-        # Store new hash
-        hash_data["hashes"].append(content_hash)
-        hash_data["timestamps"].append(current_time)
+        if not self.near_duplicates:
+            return False
+        
+        # Re-edited or re-headlined copies share most of their word shingles
+        signature = self.minhasher.signature(title + " " + content)
+        if signature is None:
+            return False
         
-        # Save updated hashes
-        with open(content_hashes_path, 'w', encoding='utf-8') as f:
-            json.dump(hash_data, f, ensure_ascii=False, indent=2)
+        match = self.near_duplicates.find(signature, since=time.time() - window)
+        if match:
+            self.logger.info(f"Near-duplicate ({match['similarity']:.0%} similar) of {match['url']}: {url or title}")
+            self.near_duplicate_matches.append({
+                "url": url,
+                "title": title,
+                "matched_url": match["url"],
+                "matched_title": match["title"],
+                "similarity": match["similarity"],
+                "matched_at": datetime.now().isoformat()
+            })
+            return True
         
+        self.near_duplicates.add(signature, url=url, title=title)
         return False
     
     def save_articles(self, articles, filename):
@@ -763,13 +1490,13 @@ class BaseCityScraper:
         """Save article URLs to Supabase scraped_urls table"""
         if not self.use_supabase or not self.supabase_client or not urls:
             return False
-            
+        
         try:
             current_time = datetime.now().isoformat()
             
-            # Prepare data for bulk insertion
+            # Prepare data for bulk insertion, one row per URL key so a batch never upserts a row twice
             url_data = []
-            for url in urls:
+            for url in dict.fromkeys(canonical_url(url) for url in urls):
                 url_data.append({
                     'url': url,
                     'city_code': self.city_code,
@@ -794,7 +1521,7 @@ class BaseCityScraper:
                 self.logger.info(f"Stored {len(url_data)} URLs for {source_id} in Supabase")
                 return True
             return False
-            
+        
         except Exception as e:
             self.logger.error(f"Error storing URLs to Supabase: {str(e)}")
             return False
@@ -814,7 +1541,8 @@ class BaseCityScraper:
         """
         if not self.use_supabase or not self.supabase_client:
             return False
-            
+        
+        url = canonical_url(url)
         try:
             # Extract source from metadata if available
             meta = metadata or {}
@@ -867,15 +1595,15 @@ class BaseCityScraper:
                 # Add content hash if available
                 if content_hash:
                     data['content_hash'] = content_hash
-                    
+                
                 # Add source if available
                 if source_name:
                     data['source'] = source_name
-                    
+                
                 # Add metadata if available
                 if meta:
                     data['metadata'] = meta
-                    
+                
                 try:
                     self.supabase_client.table('scraped_urls')\
                         .update(data)\
@@ -906,15 +1634,15 @@ class BaseCityScraper:
                 # Add content hash if available
                 if content_hash:
                     data['content_hash'] = content_hash
-                    
+                
                 # Add source if available
                 if source_name:
                     data['source'] = source_name
-                    
+                
                 # Add metadata if available
                 if meta:
                     data['metadata'] = meta
-                    
+                
                 try:
                     self.supabase_client.table('scraped_urls')\
                         .insert(data)\
@@ -925,7 +1653,7 @@ class BaseCityScraper:
                 except Exception as insert_error:
                     self.logger.warning(f"Error inserting URL: {str(insert_error)}")
                     return False
-                
+            
             # Don't downgrade status from 'scraped' to 'failed'
             if status == 'failed' or status == 'error':
                 # Check current status first
@@ -942,7 +1670,7 @@ class BaseCityScraper:
                     self.logger.warning(f"Error checking URL status: {str(check_error)}")
             
             return True
-            
+        
         except Exception as e:
             self.logger.error(f"Error updating URL status in Supabase: {str(e)}")
             return False
@@ -952,7 +1680,7 @@ class BaseCityScraper:
         if not self.use_supabase or not self.supabase_client:
             self.logger.warning("Supabase integration not configured for direct storage")
             return False
-            
+        
         try:
             # Format articles for upload
             current_date = datetime.now().strftime('%Y-%m-%d')
@@ -978,7 +1706,7 @@ class BaseCityScraper:
                     'city_code': city_code,
                     'archived_date': current_date,
                     'title': article.get('title', ''),
-                    'url': article.get('url', ''),
+                    'url': canonical_url(article.get('url', '')),
                     'source': article.get('source', ''),
                     'published_date': article.get('published_date'),
                     'content_preview': article.get('content', '')[:500] if article.get('content') else '',
@@ -992,6 +1720,9 @@ class BaseCityScraper:
                 }
                 upload_data.append(article_data)
             
+            # Keep the last copy of articles that share a URL key, since a batch can't upsert a row twice
+            upload_data = list({article_data['url']: article_data for article_data in upload_data}.values())
+            
             # Batch upload to save API calls
             if upload_data:
                 # Use batches of 50 to avoid payload size limits
@@ -1022,7 +1753,7 @@ class BaseCityScraper:
         """Save article to Supabase"""
         if not self.use_supabase or not self.supabase_client:
             return False
-            
+        
         try:
             # Convert article to dict
             if hasattr(article, 'asdict'):
@@ -1040,6 +1771,10 @@ class BaseCityScraper:
             if 'region' not in article_data or not article_data['region']:
                 article_data['region'] = self.region
             
+            # Upsert on the URL key, so variants of the same link update one row
+            if article_data.get('url'):
+                article_data['url'] = canonical_url(article_data['url'])
+            
             # Convert image_urls to JSON string if it's a list
             if 'image_urls' in article_data and isinstance(article_data['image_urls'], list):
                 # Convert to JSON string only if needed
@@ -1093,7 +1828,7 @@ class BaseCityScraper:
                 )
             
             return True
-            
+        
         except Exception as e:
             self.logger.error(f"Error saving article to Supabase: {str(e)}")
             return False
@@ -1108,7 +1843,7 @@ class BaseCityScraper:
             output_dir: Directory to save outputs
             timeout: Page load timeout in seconds
             retry_count: Number of retries for failed requests
-            
+        
         Returns:
             An instance of the appropriate city scraper class
         """
@@ -1144,45 +1879,130 @@ class BaseCityScraper:
             raise
     
     def scrape_all_sources(self):
-        """Scrape all news sources defined for this city"""
-        # First initialize the browser driver if not already done
-        if not hasattr(self, 'driver'):
-            self.init_driver()
+        """Scrape all news sources defined for this city
         
-        all_articles = []
-        
-        for source_id, source_config in self.sources.items():
-            try:
-                self.logger.info(f"Scraping {source_config['name']}...")
-                articles = self.scrape_source(source_id, source_config)
-                all_articles.extend(articles)
-                
-                # Save source-specific articles
-                self.save_articles(articles, f"{source_id}_articles.json")
-                
-                # Add a small delay between sources
-                time.sleep(random.uniform(2, 5))
-                
-            except Exception as e:
-                self.logger.error(f"Error scraping {source_config['name']}: {str(e)}")
-                traceback.print_exc()
+        Articles stream through the scrape pipeline and are written to the
+        per-source and combined JSON files as they are persisted, so memory
+        stays flat however many sources a city has.
         
-        # Save all articles combined
-        self.save_articles(all_articles, f"all_{self.city_code}_articles.json")
+        Returns:
+            int: Number of articles scraped
+        """
+        # The browser is started lazily, only for sources that can't be fetched over plain HTTP
+        pipeline = ScrapePipeline(self, combined_filename=f"all_{self.city_code}_articles.json")
+        article_count = pipeline.run(self.sources)
         
         # Save all failed URLs
         if self.failed_urls:
             self.save_article_urls(self.failed_urls, f"all_{self.city_code}_failed_urls.json")
         
-        return all_articles
-
+        if self.page_wait_seconds:
+            average_wait = sum(self.page_wait_seconds) / len(self.page_wait_seconds)
+            self.logger.info(f"Average browser page wait: {average_wait:.2f}s over {len(self.page_wait_seconds)} waits")
+        
+        if self.listing_cache:
+            cache_stats = self.listing_cache.stats()
+            self.logger.info(f"Listing cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        
+        if self.structured_hits:
+            self.logger.info(f"Structured data: {self.structured_hits} articles extracted without selectors")
+        
+        browser_summary = self.browser_memory.summary()
+        if browser_summary["pages"]:
+            self.logger.info(
+                f"Browser loaded {browser_summary['pages']} pages, peak memory "
+                f"{browser_summary['peak_rss_mb'] or 'unknown'} MB, recycled {browser_summary['recycles']} times"
+            )
+        
+        if self.frontier:
+            frontier_stats = ", ".join(f"{count} {status}" for status, count in sorted(self.frontier.stats().items()))
+            self.logger.info(f"Crawl frontier: {frontier_stats or 'empty'}")
+        
+        self.state_store.flush()
+        
+        # Keep an audit trail of which stored article each skipped near-duplicate matched
+        if self.near_duplicate_matches:
+            with open(os.path.join(self.output_dir, "near_duplicates.json"), 'w', encoding='utf-8') as f:
+                json.dump(self.near_duplicate_matches, f, ensure_ascii=False, indent=2)
+            self.logger.info(f"Skipped {len(self.near_duplicate_matches)} near-duplicate articles")
+        
+        if self.global_index:
+            today = self.global_index.daily_counts(days=1, scope=self.city_code)
+            for counts in today.values():
+                self.logger.info(f"Cross-city dedup today: {counts['fetch']} fetches avoided, {counts['copy']} copies of other cities' stories found")
+        
+        if self.seen_urls:
+            self.seen_urls.save()
+            filter_stats = self.seen_urls.stats()
+            self.logger.info(
+                f"Seen-URL filter: {filter_stats['keys']} URLs, {filter_stats['possible_hits']} of {filter_stats['checks']} "
+                f"checks went to storage, {filter_stats['false_positives']} false positives "
+                f"(observed rate {filter_stats['observed_fp_rate']}, estimated {filter_stats['estimated_fp_rate']})"
+            )
+        
+        if self.html_cache:
+            self.html_cache.evict()
+        
+        self.latency.save()
+        
+        # Surface fields that no selector found, which usually means a site redesign
+        if self.selector_cache:
+            self.selector_cache.save()
+            for source_id, fields in self.selector_cache.hit_rates().items():
+                for field, counts in fields.items():
+                    if counts["attempts"] >= 3 and counts["hits"] == 0:
+                        self.logger.warning(f"No selector matched {field} on {source_id} in {counts['attempts']} pages")
+        
+        return article_count
+    
+    def reparse_cached_articles(self, since=None, until=None):
+        """Re-run extraction on cached article HTML without any network access
+        
+        Args:
+            since: Only reparse pages fetched at or after this datetime
+            until: Only reparse pages fetched before this datetime
+        
+        Returns:
+            list: Articles rebuilt from the cache
+        """
+        if not self.html_cache:
+            self.logger.error("HTML cache is disabled, nothing to reparse")
+            return []
+        
+        articles = []
+        entries = self.html_cache.entries(city_code=self.city_code, since=since, until=until)
+        self.logger.info(f"Reparsing {len(entries)} cached pages for {self.city_name}")
+        
+        for url, entry in entries:
+            source_config = self.sources.get(entry.get("source"))
+            if not source_config:
+                self.logger.warning(f"Skipping cached page from unknown source {entry.get('source')}: {url}")
+                continue
+            
+            html = self.html_cache.read(entry)
+            if not html:
+                continue
+            
+            fields = self.extract_fields_from_html(html, url, source_config)
+            if not fields:
+                self.logger.warning(f"No title or content extracted from cached page: {url}")
+                continue
+            
+            # The pages were deduplicated when they were first scraped
+            article = self.build_article(url, source_config, fields, check_similar=False)
+            if article:
+                articles.append(article)
+        
+        self.save_articles(articles, f"reparsed_{self.city_code}_articles.json")
+        return articles
+    
     def store_articles_to_supabase(self, articles, city_code=None):
         """Store a list of articles to Supabase
         
         Args:
             articles: List of Article objects
             city_code: City code override
-            
+        
         Returns:
             bool: Success status
         """
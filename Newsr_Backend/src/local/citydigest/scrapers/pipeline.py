@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import queue
+import threading
+import traceback
+from dataclasses import dataclass, asdict
+from urllib.parse import urlparse
+
+from ..config.scraping import get_scraping_config
+from ..utils.crawl_frontier import DUPLICATE
+from ..utils.global_index import SHARED_FIELDS
+from ..utils.url_canonical import canonical_url
+
+logger = logging.getLogger("pipeline")
+
+# Queued after the last item to stop a stage's workers
+STOP = object()
+
+# Items the current worker thread has passed on or finished while handling its batch
+worker_state = threading.local()
+
+def mark_settled(item):
+    """Record that the item being handled has left this stage, so a later error in its batch doesn't fail it again"""
+    settled = getattr(worker_state, "settled", None)
+    if settled is not None:
+        settled.add(id(item))
+
+class JsonArrayWriter:
+    """Writes a JSON array one item at a time, laid out like json.dump(..., indent=2)
+    
+    The file is only created once the first item is written, so a source that
+    produced nothing doesn't overwrite the output of an earlier run.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.count = 0
+        self.lock = threading.Lock()
+    
+    def write(self, item):
+        """Append an item to the array"""
+        text = json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, 'w', encoding='utf-8')
+                self.file.write("[")
+            self.file.write(("," if self.count else "") + "\n  " + text)
+            self.file.flush()
+            self.count += 1
+    
+    def close(self):
+        """Close the array, returning the number of items written"""
+        with self.lock:
+            if self.file is not None:
+                self.file.write("\n]")
+                self.file.close()
+                self.file = None
+            return self.count
+
+class Stage:
+    """A pool of worker threads fed by a bounded queue
+    
+    A full queue blocks the stage feeding it, so a slow stage holds back the
+    ones before it instead of letting articles pile up in memory.
+    """
+    
+    def __init__(self, name, handler, workers=1, queue_size=16, on_error=None, batch_size=1):
+        """Initialize the stage
+        
+        Args:
+            name: Stage name, used for thread names and logs
+            handler: Called with each item; passes it on to the next stage itself
+            workers: Number of worker threads
+            queue_size: Items that may wait for a worker before put() blocks
+            on_error: Called with (item, exception) when the handler raises
+            batch_size: When above 1, the handler is called with a list of up to
+                this many items that were waiting in the queue together
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.on_error = on_error
+        self.threads = []
+    
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self.work, name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+    
+    def put(self, item):
+        """Queue an item, waiting while the stage is saturated"""
+        mark_settled(item)
+        self.queue.put(item)
+    
+    def work(self):
+        while True:
+            item = self.queue.get()
+            if item is STOP:
+                self.queue.task_done()
+                return
+            
+            items = [item]
+            stopping = False
+            while len(items) < self.batch_size:
+                try:
+                    extra = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is STOP:
+                    self.queue.task_done()
+                    stopping = True
+                    break
+                items.append(extra)
+            
+            worker_state.settled = set()
+            try:
+                self.handler(items if self.batch_size > 1 else item)
+            except Exception as e:
+                # Items the handler already passed on or finished belong to another stage now
+                for failed in [item for item in items if id(item) not in worker_state.settled]:
+                    if self.on_error:
+                        self.on_error(failed, e)
+                    else:
+                        logger.error(f"Unhandled error in {self.name} stage: {str(e)}")
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+            
+            if stopping:
+                return
+    
+    def stop(self):
+        """Wait until every queued item has been handled, then stop the workers"""
+        self.queue.join()
+        for _ in self.threads:
+            self.queue.put(STOP)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+@dataclass
+class ArticleTask:
+    """An article URL on its way through the pipeline"""
+    url: str
+    run: object
+    html: str = ""
+    fields: dict = None
+    article: object = None
+    admitted: bool = False
+    reused: bool = False
+    canonical_url: str = None
+
+class SourceRun:
+    """Bookkeeping for one source while its articles are in the pipeline"""
+    
+    def __init__(self, source_id, source_config, discovery, writer):
+        self.source_id = source_id
+        self.source_config = source_config
+        self.discovery = discovery
+        self.writer = writer
+        self.failed_urls = []
+        self.fetch_mode_counts = {"http": 0, "browser": 0}
+        self.pending = 0
+        self.discovered = False
+        self.finished = False
+        self.lock = threading.Lock()
+    
+    def add(self):
+        with self.lock:
+            self.pending += 1
+    
+    def count_mode(self, mode):
+        with self.lock:
+            self.fetch_mode_counts[mode] += 1
+    
+    def fail(self, url):
+        with self.lock:
+            self.failed_urls.append(url)
+    
+    def defer(self, url):
+        with self.lock:
+            self.discovery["deferred_links"].append(url)
+    
+    def done(self, discovered=False):
+        """Mark an article (or, with discovered=True, link discovery) as finished
+        
+        Returns:
+            bool: True exactly once, when discovery and every article are finished
+        """
+        with self.lock:
+            if discovered:
+                self.discovered = True
+            else:
+                self.pending -= 1
+            if self.discovered and self.pending == 0 and not self.finished:
+                self.finished = True
+                return True
+            return False
+
+class ScrapePipeline:
+    """Streams a city's articles through discover → fetch → extract → clean → dedup → persist
+    
+    Link discovery runs on the calling thread, one source after another, and
+    every later stage has its own workers connected by bounded queues, so
+    network waits overlap parsing, cleaning and database writes. Articles are
+    written out as they are persisted rather than collected, which keeps
+    memory flat however many sources a city has.
+    
+    Pages that come back empty over HTTP, and sources that need rendering, go
+    through a single browser worker since the webdriver isn't thread-safe.
+    Dedup and persist are single workers too, as they update shared state
+    files and the output JSON.
+    """
+    
+    def __init__(self, scraper, combined_filename=None):
+        """Initialize the pipeline
+        
+        Args:
+            scraper: City scraper whose fetch and extraction methods the stages use
+            combined_filename: File in the scraper's output directory that receives every article
+        """
+        config = get_scraping_config("pipeline")
+        queue_size = config.get("queue_size", 16)
+        
+        self.scraper = scraper
+        self.logger = scraper.logger
+        self.frontier = scraper.frontier
+        self.global_index = scraper.global_index
+        self.combined_writer = None
+        if combined_filename:
+            self.combined_writer = JsonArrayWriter(os.path.join(scraper.output_dir, combined_filename))
+        self.article_count = 0
+        self.finish_lock = threading.Lock()
+        # Canonical URLs admitted this run, since a URL only counts as scraped once it is persisted
+        self.admitted_urls = set()
+        
+        self.fetch_stage = Stage("fetch", self.fetch, config.get("fetch_workers", 4), queue_size, self.fail)
+        self.extract_stage = Stage("extract", self.extract, config.get("extract_workers", 2), queue_size, self.fail)
+        tab_config = get_scraping_config("browser_tabs")
+        self.tabs_per_domain = tab_config.get("per_domain", 2)
+        self.browser_stage = Stage("browser", self.render, 1, queue_size, self.fail, batch_size=tab_config.get("max_tabs", 4))
+        self.clean_stage = Stage("clean", self.clean, config.get("clean_workers", 2), queue_size, self.fail)
+        self.dedup_stage = Stage("dedup", self.dedup, 1, queue_size, self.fail)
+        self.persist_stage = Stage("persist", self.persist, 1, queue_size, self.fail)
+        
+        # Upstream first, so stopping them in order drains every queue
+        self.stages = [
+            self.fetch_stage, self.extract_stage, self.browser_stage,
+            self.clean_stage, self.dedup_stage, self.persist_stage
+        ]
+    
+    def run(self, sources):
+        """Scrape the given sources
+        
+        Args:
+            sources: Dict of source ID to source configuration
+        
+        Returns:
+            int: Number of articles persisted
+        """
+        for stage in self.stages:
+            stage.start()
+        
+        try:
+            for source_id, source_config in sources.items():
+                try:
+                    self.logger.info(f"Scraping {source_config['name']}...")
+                    self.discover(source_id, source_config)
+                except Exception as e:
+                    self.logger.error(f"Error scraping {source_config['name']}: {str(e)}")
+                    traceback.print_exc()
+        finally:
+            for stage in self.stages:
+                stage.stop()
+            if self.combined_writer:
+                self.close_writer(self.combined_writer)
+        
+        return self.article_count
+    
+    def discover(self, source_id, source_config):
+        """Find a source's article links and queue them for the stage their fetch mode starts at"""
+        discovery = self.scraper.discover_source(source_id, source_config)
+        if discovery is None:
+            return
+        
+        writer = JsonArrayWriter(os.path.join(self.scraper.output_dir, f"{source_id}_articles.json"))
+        run = SourceRun(source_id, source_config, discovery, writer)
+        first_stage = self.fetch_stage if discovery["article_mode"] == "http" else self.browser_stage
+        
+        try:
+            for url in discovery["article_links"]:
+                # Skip already scraped URLs
+                if url in discovery["scraped_urls"]:
+                    self.logger.info(f"Skipping already scraped URL: {url}")
+                    if self.frontier:
+                        self.frontier.complete(url)
+                    continue
+                
+                run.add()
+                task = ArticleTask(url=url, run=run)
+                if not self.reuse(task):
+                    first_stage.put(task)
+        finally:
+            if run.done(discovered=True):
+                self.finish(run)
+    
+    def reuse(self, task):
+        """Take an article another city or topic already extracted instead of fetching it again
+        
+        Returns:
+            bool: True if the article was handled without queueing a fetch
+        """
+        if not self.global_index:
+            return False
+        
+        shared = self.global_index.lookup_url(task.url)
+        if shared is None:
+            return False
+        
+        if not self.admit(task):
+            self.done(task)
+            return True
+        
+        self.logger.info(f"Reusing article already extracted for {', '.join(shared['scopes'])}: {task.url}")
+        self.global_index.count_avoided(self.scraper.city_code)
+        task.reused = True
+        task.fields = {field: shared.get(field) for field in SHARED_FIELDS}
+        self.clean_stage.put(task)
+        return True
+    
+    def admit(self, task):
+        """Check whether an article should still be fetched
+        
+        Articles whose site's circuit has opened stay queued for the next run.
+        The blocklist and recently scraped URLs are checked once per article,
+        right before its first fetch. The check records nothing, so a frontier
+        retry of a URL that failed before is admitted again; it is only
+        completed here if its article was persisted since.
+        """
+        scraper = self.scraper
+        if scraper.circuit_breaker.is_open(task.url):
+            self.logger.warning(f"Circuit open, leaving article for later: {task.url}")
+            task.run.defer(task.url)
+            if self.frontier:
+                self.frontier.release(task.url)
+            return False
+        
+        if task.admitted:
+            return True
+        
+        with scraper.state_lock:
+            # Check if URL is in the blocklist
+            if scraper.is_url_blocklisted(task.url):
+                self.logger.warning(f"Skipping blocklisted URL: {task.url}")
+                if self.frontier:
+                    self.frontier.block(task.url)
+                return False
+            
+            # Check if we've already scraped this URL recently
+            if scraper.is_duplicate_url(task.url):
+                self.logger.info(f"Skipping already scraped URL: {task.url}")
+                if self.frontier:
+                    self.frontier.complete(task.url)
+                return False
+            
+            # Another source linked the same article earlier in this run. It isn't
+            # scraped yet, so the link stays new for this source in case that fetch fails
+            key = canonical_url(task.url)
+            if key in self.admitted_urls:
+                self.logger.info(f"Skipping URL already being scraped: {task.url}")
+                task.run.defer(task.url)
+                if self.frontier:
+                    self.frontier.release(task.url)
+                return False
+            self.admitted_urls.add(key)
+        
+        task.admitted = True
+        return True
+    
+    def fetch(self, task):
+        """Download an article's static HTML"""
+        if not self.admit(task):
+            self.done(task)
+            return
+        
+        html = self.scraper.http_fetcher.fetch_html(task.url)
+        if not html:
+            self.escalate(task)
+            return
+        
+        self.scraper.cache_html(task.url, task.run.source_config, html)
+        task.html = html
+        self.extract_stage.put(task)
+    
+    def extract(self, task):
+        """Extract article fields from downloaded HTML"""
+        source_config = task.run.source_config
+        matched = {}
+        fields = self.scraper.extract_fields_from_html(task.html, task.url, source_config, matched=matched)
+        task.html = ""
+        if not fields:
+            self.escalate(task)
+            return
+        
+        # A miss over HTTP falls back to the browser, which records the outcome instead
+        if self.scraper.selector_cache:
+            self.scraper.record_selector_matches(source_config, self.scraper.selector_cache.page_template(task.url), matched)
+        
+        task.run.count_mode("http")
+        task.fields = fields
+        self.clean_stage.put(task)
+    
+    def escalate(self, task):
+        self.logger.info(f"Static extraction came back empty, escalating to browser: {task.url}")
+        self.browser_stage.put(task)
+    
+    def render(self, tasks):
+        """Extract article fields by rendering the pages in browser tabs
+        
+        Articles waiting for the browser together are loaded in parallel tabs,
+        with at most tabs_per_domain of them from the same site at a time.
+        """
+        waiting = []
+        for task in tasks:
+            if self.admit(task):
+                waiting.append(task)
+            else:
+                self.done(task)
+        
+        while waiting:
+            batch, waiting = self.take_tab_batch(waiting)
+            with self.scraper.browser_lock:
+                results = self.scraper.scrape_articles_in_tabs([(task.url, task.run.source_config) for task in batch])
+            
+            for task in batch:
+                fields = results.get(task.url)
+                if not fields:
+                    # Kept new in the link snapshot, like an article that raised
+                    task.run.fail(task.url)
+                    if self.frontier:
+                        self.frontier.fail(task.url, "No title or content extracted")
+                    self.done(task)
+                    continue
+                
+                task.run.count_mode("browser")
+                task.fields = fields
+                self.clean_stage.put(task)
+            
+            # Between batches is the one point no tab is mid-load
+            self.scraper.recycle_browser_if_needed()
+    
+    def take_tab_batch(self, tasks):
+        """Split off the tasks that can load together without exceeding the per-domain tab limit
+        
+        Returns:
+            tuple: (tasks to load now, tasks left for the next batch)
+        """
+        batch = []
+        rest = []
+        per_host = {}
+        for task in tasks:
+            host = urlparse(task.url).netloc.lower()
+            if per_host.get(host, 0) < self.tabs_per_domain:
+                per_host[host] = per_host.get(host, 0) + 1
+                batch.append(task)
+            else:
+                rest.append(task)
+        return batch, rest
+    
+    def clean(self, task):
+        """Clean the extracted content into an Article"""
+        task.article = self.scraper.build_article(task.url, task.run.source_config, task.fields, check_similar=False)
+        task.canonical_url = task.fields.get("canonical_url")
+        task.fields = None
+        self.dedup_stage.put(task)
+    
+    def dedup(self, task):
+        """Drop articles whose content was already scraped recently"""
+        with self.scraper.state_lock:
+            similar = self.scraper.is_similar_to_existing_article(task.article.title, task.article.content, url=task.url)
+        if similar:
+            self.logger.info(f"Skipping article with similar content: {task.url}")
+            if self.frontier:
+                self.frontier.complete(task.url, status=DUPLICATE)
+            self.done(task)
+            return
+        
+        self.persist_stage.put(task)
+    
+    def persist(self, task):
+        """Save an article to Supabase and append it to the output files"""
+        article = task.article
+        if self.scraper.use_supabase:
+            self.scraper.save_article_to_supabase(article)
+        
+        article_data = asdict(article)
+        task.run.writer.write(article_data)
+        if self.combined_writer:
+            self.combined_writer.write(article_data)
+        if self.frontier:
+            self.frontier.complete(task.url, content_hash=self.scraper.generate_content_hash(article.content))
+        with self.scraper.state_lock:
+            self.scraper.mark_url_scraped(task.url)
+            if task.canonical_url:
+                # Links straight to the canonical page are skipped from now on too
+                self.scraper.mark_url_scraped(task.canonical_url)
+        if self.global_index:
+            self.share(task)
+        self.article_count += 1
+        self.done(task)
+    
+    def share(self, task):
+        """Add a persisted article to the cross-city index, tagged with this city"""
+        city_code = self.scraper.city_code
+        if task.reused:
+            self.global_index.tag(task.url, city_code)
+            return
+        
+        earlier = self.global_index.record(task.url, asdict(task.article), city_code, aliases=[task.article.url, task.canonical_url])
+        if earlier:
+            # Fetched this time, but the next city to meet this URL can skip it
+            self.logger.info(f"Same story as {earlier['first_url']} ({', '.join(earlier['scopes'])}): {task.url}")
+            self.global_index.count_avoided(city_code, kind="copy")
+    
+    def fail(self, task, error):
+        self.logger.error(f"Error scraping article {task.url}: {str(error)}")
+        task.run.fail(task.url)
+        if self.frontier:
+            self.frontier.fail(task.url, error)
+        self.done(task)
+    
+    def done(self, task):
+        """Mark an article as finished, finishing its source if it was the last one"""
+        mark_settled(task)
+        task.html = ""
+        task.fields = None
+        task.article = None
+        if task.run.done():
+            self.finish(task.run)
+    
+    def finish(self, run):
+        """Record a source's listing state and close its output file"""
+        with self.finish_lock:
+            self.scraper.finish_source(run.source_id, run.source_config, run.discovery, run.failed_urls, run.fetch_mode_counts)
+        
+        self.close_writer(run.writer)
+    
+    def close_writer(self, writer):
+        article_count = writer.close()
+        if article_count:
+            self.logger.info(f"Saved {article_count} articles to {writer.path}")
+        else:
+            self.logger.warning(f"No articles to save to {os.path.basename(writer.path)}")
@@ -58,6 +58,7 @@ class AustinNewsScraper(BaseCityScraper):
             "austinmonitor": {
                 "name": "Austin Monitor",
                 "url": "https://www.austinmonitor.com/",
+                "feed_url": "https://www.austinmonitor.com/feed/",
                 "article_selector": ".entry-title a, .article-title a",
                 "title_selector": ".entry-title, h1",
                 "content_selector": ".entry-content, .article-content",
@@ -69,6 +70,7 @@ class AustinNewsScraper(BaseCityScraper):
             "kxan": {
                 "name": "KXAN",
                 "url": "https://www.kxan.com/",
+                "feed_url": "https://www.kxan.com/feed/",
                 "article_selector": ".article-list a, .story-list a",
                 "title_selector": ".article-headline, h1",
                 "content_selector": ".article-content, .rich-text",
@@ -0,0 +1,4 @@
+#!/usr/bin/env python3
+"""
+Shared infrastructure used by the CityDigest scrapers
+"""
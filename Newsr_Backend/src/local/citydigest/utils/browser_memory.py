@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+import logging
+import os
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger("browser_memory")
+
+def driver_process_id(driver):
+    """Get the PID of the chromedriver process behind a WebDriver, or None"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+def process_tree_rss(pid):
+    """Get the resident memory in bytes of a process and all its descendants
+    
+    Uses psutil when it is installed and reads /proc otherwise. Shared pages
+    are counted once per process, so for Chrome this overstates real usage,
+    which errs on the side of recycling early.
+    
+    Returns:
+        int: Total RSS in bytes, or None if the process can't be inspected
+    """
+    if psutil:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+    
+    if not os.path.isdir("/proc"):
+        return None
+    
+    # Map every process to its children from /proc/<pid>/stat
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                stat = f.read()
+            parent = int(stat.rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = None
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm", 'r') as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        total = (total or 0) + resident_pages * page_size
+        pending.extend(children.get(current, []))
+    return total
+
+class BrowserMemoryMonitor:
+    """Decides when a scraper's Chrome session has grown enough to be replaced
+    
+    Every page load is counted, and every `check_every` pages the memory of
+    the browser's whole process tree is sampled. Once the tree passes
+    `max_rss_mb` or the session has loaded `max_pages` pages, the scraper
+    swaps the session for a fresh one before its next article. Recycle events
+    and the highest memory seen are kept for the run summary.
+    """
+    
+    def __init__(self, max_rss_mb=1500, max_pages=200, check_every=5, enabled=True):
+        """Initialize the monitor
+        
+        Args:
+            max_rss_mb: Process-tree RSS in MB above which the browser is recycled
+            max_pages: Pages loaded in one session before it is recycled (0 for no limit)
+            check_every: Pages between memory samples
+            enabled: Whether sessions are recycled at all
+        """
+        self.max_rss_mb = max_rss_mb
+        self.max_pages = max_pages
+        self.check_every = max(1, check_every)
+        self.enabled = enabled
+        self.pages = 0
+        self.sampled_at_page = 0
+        self.total_pages = 0
+        self.last_rss_mb = None
+        self.peak_rss_mb = None
+        self.events = []
+    
+    def session_started(self):
+        """Start counting pages for a newly leased session"""
+        self.pages = 0
+        self.sampled_at_page = 0
+        self.last_rss_mb = None
+    
+    def page_loaded(self, count=1):
+        """Count pages loaded in the current session"""
+        self.pages += count
+        self.total_pages += count
+    
+    def sample(self, driver):
+        """Measure the browser's process-tree memory and update the high-water mark
+        
+        Returns:
+            float: RSS in MB, or None if it couldn't be measured
+        """
+        self.sampled_at_page = self.pages
+        pid = driver_process_id(driver)
+        rss = process_tree_rss(pid) if pid else None
+        if rss is None:
+            return None
+        
+        self.last_rss_mb = round(rss / (1024 * 1024), 1)
+        if self.peak_rss_mb is None or self.last_rss_mb > self.peak_rss_mb:
+            self.peak_rss_mb = self.last_rss_mb
+        return self.last_rss_mb
+    
+    def recycle_reason(self, driver):
+        """Check whether the session should be replaced before the next article
+        
+        Returns:
+            str: Why the session should be recycled, or None to keep it
+        """
+        if not self.enabled or not driver or not self.pages:
+            return None
+        
+        if self.max_pages and self.pages >= self.max_pages:
+            self.sample(driver)
+            return f"{self.pages} pages loaded"
+        
+        if self.pages - self.sampled_at_page >= self.check_every:
+            rss_mb = self.sample(driver)
+            if rss_mb is not None and self.max_rss_mb and rss_mb >= self.max_rss_mb:
+                return f"browser using {rss_mb:.0f} MB"
+        return None
+    
+    def recycled(self, reason):
+        """Record a recycle event"""
+        self.events.append({
+            "at": datetime.now().isoformat(),
+            "reason": reason,
+            "pages": self.pages,
+            "rss_mb": self.last_rss_mb
+        })
+        self.session_started()
+    
+    def summary(self):
+        """Get recycle events and memory high-water mark for the run summary"""
+        return {
+            "pages": self.total_pages,
+            "peak_rss_mb": self.peak_rss_mb,
+            "recycles": len(self.events),
+            "recycle_events": list(self.events)
+        }
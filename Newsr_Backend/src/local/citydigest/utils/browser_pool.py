@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from ..config.scraping import get_scraping_config
+from .replay_proxy import get_active_proxy
+
+logger = logging.getLogger("browser_pool")
+
+class PooledSession:
+    """A Chrome session owned by the pool along with its usage bookkeeping"""
+    
+    def __init__(self, driver):
+        self.driver = driver
+        # The window the session started with, which every lease gets back
+        self.main_handle = driver.current_window_handle
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.uses = 0
+
+class BrowserPool:
+    """Process-wide pool of reusable headless Chrome sessions
+    
+    Scrapers lease a session with acquire() and hand it back with release().
+    Sessions are reset between leases so no cookies or storage leak from one
+    city or topic to the next, and are replaced after max_uses leases or when
+    they have been idle for longer than idle_timeout seconds.
+    """
+    
+    def __init__(self, headless=True, max_sessions=None, warm_sessions=None, idle_timeout=None, max_uses=None, acquire_timeout=None):
+        """Initialize the browser pool
+        
+        Args:
+            headless: Whether to run the browsers in headless mode
+            max_sessions: Maximum number of sessions open at the same time
+            warm_sessions: Number of sessions started by warm()
+            idle_timeout: Seconds an idle session is kept before it is quit
+            max_uses: Number of leases after which a session is replaced
+            acquire_timeout: Seconds to wait for a free session before giving up
+        """
+        config = get_scraping_config("browser_pool")
+        self.headless = headless
+        self.max_sessions = max_sessions or config.get("max_sessions", 4)
+        self.warm_sessions = warm_sessions if warm_sessions is not None else config.get("warm_sessions", 1)
+        self.idle_timeout = idle_timeout or config.get("idle_timeout", 300)
+        self.max_uses = max_uses or config.get("max_uses", 50)
+        self.acquire_timeout = acquire_timeout or config.get("acquire_timeout", 600)
+        
+        self.idle = []
+        self.leased = {}
+        self.starting = 0
+        self.condition = threading.Condition()
+    
+    def create_driver(self):
+        """Start a new Chrome WebDriver session"""
+        options = Options()
+        if self.headless:
+            options.add_argument("--headless=new")
+        
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--disable-notifications")
+        options.add_argument("--disable-popup-blocking")
+        
+        # Add user agent to avoid detection
+        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
+        
+        # Disable WebGL to avoid errors
+        options.add_argument("--disable-webgl")
+        options.add_argument("--disable-3d-apis")
+        
+        # Route through the record/replay proxy during harness runs
+        proxy = get_active_proxy()
+        if proxy:
+            options.add_argument(f"--proxy-server={proxy}")
+            options.add_argument("--ignore-certificate-errors")
+        
+        try:
+            # Try using the built-in selenium manager
+            driver = webdriver.Chrome(options=options)
+        except Exception as e:
+            logger.warning(f"Default Chrome initialization failed: {str(e)}")
+            
+            # Try with explicit import of webdriver_manager
+            from webdriver_manager.chrome import ChromeDriverManager
+            from selenium.webdriver.chrome.service import Service
+            
+            driver_path = ChromeDriverManager().install()
+            logger.info(f"ChromeDriver installed at: {driver_path}")
+            driver = webdriver.Chrome(service=Service(executable_path=driver_path), options=options)
+        
+        logger.info("Started new Chrome session for the pool")
+        return driver
+    
+    def warm(self, count=None):
+        """Start sessions ahead of time so the first lease doesn't pay the cold start"""
+        count = self.warm_sessions if count is None else count
+        with self.condition:
+            needed = min(count, self.max_sessions - len(self.leased) - self.starting) - len(self.idle)
+            self.starting += max(needed, 0)
+        
+        for _ in range(max(needed, 0)):
+            try:
+                session = PooledSession(self.create_driver())
+                with self.condition:
+                    self.idle.append(session)
+            except Exception as e:
+                logger.error(f"Error warming browser pool: {str(e)}")
+            finally:
+                with self.condition:
+                    self.starting -= 1
+                    self.condition.notify()
+    
+    def set_capacity(self, max_sessions):
+        """Change how many sessions may be open at the same time
+        
+        Idle sessions over a lowered limit are quit; leased ones are left to
+        their holders and not replaced once released.
+        
+        Returns:
+            int: The previous limit, so a caller can restore it
+        """
+        with self.condition:
+            previous = self.max_sessions
+            self.max_sessions = max(1, max_sessions)
+            excess = max(0, len(self.idle) + len(self.leased) + self.starting - self.max_sessions)
+            surplus = self.idle[:excess]
+            self.idle = self.idle[excess:]
+            # Callers waiting for capacity may fit now
+            self.condition.notify_all()
+        
+        for session in surplus:
+            self.quit_driver(session.driver)
+        return previous
+    
+    def acquire(self, page_load_timeout=30):
+        """Lease a Chrome session from the pool, starting a new one if none is idle"""
+        self.reap_idle()
+        deadline = time.time() + self.acquire_timeout
+        
+        with self.condition:
+            while True:
+                if self.idle:
+                    session = self.idle.pop()
+                    break
+                
+                if len(self.leased) + self.starting < self.max_sessions:
+                    session = None
+                    self.starting += 1
+                    break
+                
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No browser session became available within {self.acquire_timeout} seconds")
+                self.condition.wait(remaining)
+        
+        started = session is None
+        if started:
+            try:
+                session = PooledSession(self.create_driver())
+            except Exception:
+                with self.condition:
+                    self.starting -= 1
+                    # The slot is free again, so wake a caller waiting for capacity
+                    self.condition.notify()
+                raise
+        
+        session.uses += 1
+        
+        with self.condition:
+            if started:
+                self.starting -= 1
+            self.leased[id(session.driver)] = session
+        
+        session.driver.set_page_load_timeout(page_load_timeout)
+        return session.driver
+    
+    def release(self, driver, discard=False):
+        """Return a leased session to the pool
+        
+        Args:
+            driver: The WebDriver returned by acquire()
+            discard: Quit the session instead of reusing it (e.g. after a crash)
+        """
+        with self.condition:
+            session = self.leased.pop(id(driver), None)
+        
+        if session is None:
+            logger.warning("Released a browser session that the pool does not own, quitting it")
+            self.quit_driver(driver)
+            return
+        
+        if not discard and session.uses < self.max_uses and self.reset_session(session):
+            session.last_used = time.time()
+            with self.condition:
+                self.idle.append(session)
+                self.condition.notify()
+            return
+        
+        if session.uses >= self.max_uses:
+            logger.info(f"Retiring Chrome session after {session.uses} uses")
+        self.quit_driver(driver)
+        with self.condition:
+            self.condition.notify()
+    
+    @contextmanager
+    def lease(self, page_load_timeout=30):
+        """Context manager that leases a session and always returns it"""
+        driver = self.acquire(page_load_timeout=page_load_timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+    
+    def reset_session(self, session):
+        """Clear cookies, storage and extra windows so the next lease starts clean
+        
+        Args:
+            session: The PooledSession being returned to the pool
+        
+        Returns:
+            bool: False if the session is unusable and should be quit
+        """
+        driver = session.driver
+        try:
+            # Close any tabs or popups the last lease left open; handle order
+            # isn't stable once tabs have come and gone, so keep the recorded one
+            for handle in driver.window_handles:
+                if handle != session.main_handle:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(session.main_handle)
+            
+            # Clear storage for the origin the session was last on
+            current_url = driver.current_url
+            origin = urlparse(current_url)
+            if origin.scheme in ("http", "https"):
+                try:
+                    driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                        "origin": f"{origin.scheme}://{origin.netloc}",
+                        "storageTypes": "all"
+                    })
+                except Exception:
+                    driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            
+            # Drop any resource blocking the last lease set up
+            try:
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+            except Exception:
+                pass
+            
+            # Clear cookies for every domain, not just the current one
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+            
+            driver.get("about:blank")
+            driver.set_window_size(1920, 1080)
+            return True
+        except Exception as e:
+            logger.warning(f"Error resetting browser session, discarding it: {str(e)}")
+            return False
+    
+    def reap_idle(self):
+        """Quit sessions that have been idle for longer than the idle timeout"""
+        now = time.time()
+        with self.condition:
+            expired = [s for s in self.idle if now - s.last_used > self.idle_timeout]
+            self.idle = [s for s in self.idle if s not in expired]
+        
+        for session in expired:
+            logger.info("Quitting idle Chrome session")
+            self.quit_driver(session.driver)
+    
+    def quit_driver(self, driver):
+        """Quit a WebDriver session, ignoring errors from already dead browsers"""
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting Chrome session: {str(e)}")
+    
+    def shutdown(self):
+        """Quit every session owned by the pool"""
+        with self.condition:
+            sessions = self.idle + list(self.leased.values())
+            self.idle = []
+            self.leased = {}
+        
+        for session in sessions:
+            self.quit_driver(session.driver)
+        
+        if sessions:
+            logger.info(f"Browser pool shut down, closed {len(sessions)} sessions")
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_browser_pool(headless=True):
+    """Get the process-wide browser pool"""
+    with _pools_lock:
+        if headless not in _pools:
+            _pools[headless] = BrowserPool(headless=headless)
+        return _pools[headless]
+
+def shutdown_browser_pools():
+    """Quit every pooled browser session in this process"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.shutdown()
+
+atexit.register(shutdown_browser_pools)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from ..config.scraping import STATE_DIR, get_scraping_config
+
+logger = logging.getLogger("circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS circuits (
+    host TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    outcomes TEXT NOT NULL,
+    opened_at REAL NOT NULL,
+    cooldown REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because its host's circuit is open"""
+
+class CircuitBreaker:
+    """Per-host circuit breaker shared by every fetch path and persisted across runs
+    
+    A host's circuit opens once enough of its recent requests failed, and
+    every request to it is refused for a cooldown. After the cooldown a single
+    probe request is let through: if it succeeds the circuit closes, otherwise
+    it opens again with a longer cooldown. Every transition is written to a
+    SQLite database as that host's row alone, so scraper processes sharing
+    the database never overwrite each other's hosts, and a transition saved
+    by one process is picked up by the others on their next check of the
+    host. A dead site is skipped by later scheduler runs too.
+    """
+    
+    def __init__(self, path, window=10, min_requests=4, failure_rate=0.5, cooldown=900, max_cooldown=21600):
+        """Initialize the circuit breaker
+        
+        Args:
+            path: SQLite database file, shared by every scraper process
+            window: Number of recent requests per host the failure rate is taken over
+            min_requests: Requests needed in the window before a circuit can open
+            failure_rate: Share of failed requests that opens a circuit
+            cooldown: Seconds a circuit stays open the first time
+            max_cooldown: Upper bound in seconds for repeated cooldowns
+        """
+        self.path = path
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.enabled = True
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.circuits = self.load()
+        self.probing = set()
+    
+    @staticmethod
+    def from_row(row):
+        state, outcomes, opened_at, cooldown, updated_at = row
+        return {"state": state, "outcomes": json.loads(outcomes), "opened_at": opened_at, "cooldown": cooldown, "updated_at": updated_at}
+    
+    def load(self):
+        """Load every host's circuit from the database"""
+        rows = self.connection.execute("SELECT host, state, outcomes, opened_at, cooldown, updated_at FROM circuits").fetchall()
+        return {row[0]: self.from_row(row[1:]) for row in rows}
+    
+    def refresh(self, host):
+        """Take a host's circuit from the database if another process changed it since this one last did
+        
+        Called with the lock held.
+        """
+        try:
+            row = self.connection.execute(
+                "SELECT state, outcomes, opened_at, cooldown, updated_at FROM circuits WHERE host = ?", (host,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read circuit state for {host}: {str(e)}")
+            return
+        
+        circuit = self.circuits.get(host)
+        if not row or (circuit and circuit.get("updated_at", 0) >= row[4]):
+            return
+        self.circuits[host] = self.from_row(row)
+        # A probe this process sent no longer decides the circuit
+        self.probing.discard(host)
+    
+    def save(self, host):
+        """Write one host's circuit to the database, leaving every other host's row alone
+        
+        Called with the lock held.
+        """
+        circuit = self.circuits[host]
+        circuit["updated_at"] = time.time()
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO circuits (host, state, outcomes, opened_at, cooldown, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (host, circuit["state"], json.dumps(circuit["outcomes"]), circuit["opened_at"], circuit["cooldown"], circuit["updated_at"])
+            )
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not save circuit breaker state for {host}: {str(e)}")
+    
+    def import_json(self, path):
+        """Load the JSON file circuit states were kept in before the database
+        
+        The file is renamed with an .imported suffix afterwards, so this
+        happens once. Hosts already in the database are left alone.
+        
+        Returns:
+            int: Number of hosts imported
+        """
+        if not os.path.exists(path):
+            return 0
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                circuits = json.load(f)
+        except:
+            circuits = {}
+        
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO circuits (host, state, outcomes, opened_at, cooldown, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (host, circuit.get("state", CLOSED), json.dumps(circuit.get("outcomes", [])), circuit.get("opened_at", 0),
+                     circuit.get("cooldown", self.cooldown), circuit.get("opened_at", 0))
+                    for host, circuit in circuits.items()
+                ]
+            )
+            self.connection.commit()
+            imported = self.connection.total_changes - before
+            self.circuits = self.load()
+        
+        os.replace(path, path + ".imported")
+        logger.info(f"Imported {imported} circuit states from {path}")
+        return imported
+    
+    def normalize_host(self, url):
+        """Get the host a URL counts against"""
+        host = urlparse(url).netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return host
+    
+    def get_circuit(self, host):
+        return self.circuits.setdefault(host, {"state": CLOSED, "outcomes": [], "opened_at": 0, "cooldown": self.cooldown, "updated_at": 0})
+    
+    def is_open(self, url):
+        """Check whether requests to a URL's host are currently being refused
+        
+        Unlike allow(), this doesn't take the half-open probe slot.
+        """
+        host = self.normalize_host(url)
+        if not self.enabled or not host:
+            return False
+        
+        with self.lock:
+            self.refresh(host)
+            circuit = self.circuits.get(host)
+            if not circuit or circuit["state"] == CLOSED:
+                return False
+            if circuit["state"] == OPEN and time.time() - circuit["opened_at"] < circuit["cooldown"]:
+                return True
+            # Cooled down: open for a probe unless one is already out
+            return host in self.probing
+    
+    def allow(self, url):
+        """Check whether a request may be sent, taking the probe slot of a cooled-down circuit
+        
+        Returns:
+            bool: False if the request should not be sent
+        """
+        host = self.normalize_host(url)
+        if not self.enabled or not host:
+            return True
+        
+        with self.lock:
+            self.refresh(host)
+            circuit = self.circuits.get(host)
+            if not circuit or circuit["state"] == CLOSED:
+                return True
+            if circuit["state"] == OPEN and time.time() - circuit["opened_at"] < circuit["cooldown"]:
+                return False
+            if host in self.probing:
+                return False
+            
+            circuit["state"] = HALF_OPEN
+            self.probing.add(host)
+        
+        logger.info(f"Sending probe request to {host}")
+        return True
+    
+    def record(self, url, success):
+        """Record the outcome of a request to a URL's host"""
+        host = self.normalize_host(url)
+        if not self.enabled or not host:
+            return
+        
+        with self.lock:
+            self.refresh(host)
+            circuit = self.get_circuit(host)
+            
+            if circuit["state"] == HALF_OPEN:
+                self.probing.discard(host)
+                if success:
+                    circuit.update({"state": CLOSED, "outcomes": [], "cooldown": self.cooldown})
+                    logger.info(f"Probe to {host} succeeded, closing circuit")
+                else:
+                    circuit["cooldown"] = min(circuit["cooldown"] * 2, self.max_cooldown)
+                    circuit.update({"state": OPEN, "opened_at": time.time()})
+                    logger.warning(f"Probe to {host} failed, circuit open for {circuit['cooldown']}s")
+                self.save(host)
+            
+            elif circuit["state"] == CLOSED:
+                circuit["outcomes"] = (circuit["outcomes"] + [1 if success else 0])[-self.window:]
+                outcomes = circuit["outcomes"]
+                failures = outcomes.count(0)
+                if len(outcomes) >= self.min_requests and failures / len(outcomes) >= self.failure_rate:
+                    circuit.update({"state": OPEN, "opened_at": time.time(), "cooldown": self.cooldown})
+                    logger.warning(f"{failures}/{len(outcomes)} recent requests to {host} failed, circuit open for {self.cooldown}s")
+                    self.save(host)
+    
+    def release(self, url):
+        """Give back the probe slot of a request whose outcome says nothing about the host, without recording it"""
+        host = self.normalize_host(url)
+        with self.lock:
+            self.probing.discard(host)
+    
+    def open_hosts(self):
+        """Get the hosts whose circuits are not closed, with seconds left in their cooldown"""
+        now = time.time()
+        with self.lock:
+            self.circuits.update(
+                (host, circuit) for host, circuit in self.load().items()
+                if circuit["updated_at"] > self.circuits.get(host, {}).get("updated_at", 0)
+            )
+            return {
+                host: max(0, round(circuit["opened_at"] + circuit["cooldown"] - now))
+                for host, circuit in self.circuits.items()
+                if circuit["state"] != CLOSED
+            }
+
+_circuit_breaker = None
+_circuit_breaker_lock = threading.Lock()
+
+def get_circuit_breaker():
+    """Get the process-wide circuit breaker"""
+    global _circuit_breaker
+    with _circuit_breaker_lock:
+        if _circuit_breaker is None:
+            config = get_scraping_config("circuit_breaker")
+            os.makedirs(STATE_DIR, exist_ok=True)
+            _circuit_breaker = CircuitBreaker(
+                os.path.join(STATE_DIR, "circuit_breakers.db"),
+                window=config.get("window", 10),
+                min_requests=config.get("min_requests", 4),
+                failure_rate=config.get("failure_rate", 0.5),
+                cooldown=config.get("cooldown", 900),
+                max_cooldown=config.get("max_cooldown", 21600)
+            )
+            _circuit_breaker.enabled = config.get("enabled", True)
+            _circuit_breaker.import_json(os.path.join(STATE_DIR, "circuit_breakers.json"))
+        return _circuit_breaker
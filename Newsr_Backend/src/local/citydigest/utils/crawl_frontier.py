@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+import logging
+import sqlite3
+import threading
+import time
+
+from .url_backfill import add_frontier_fetch_urls, merge_frontier_rows, rekey_table
+from .url_canonical import canonical_url, normalize_url
+
+logger = logging.getLogger("crawl_frontier")
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    fetch_url TEXT,
+    source TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    next_fetch_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    last_error TEXT,
+    discovered_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frontier_due ON frontier (source, next_fetch_at);
+CREATE INDEX IF NOT EXISTS frontier_status ON frontier (source, status);
+"""
+
+class CrawlFrontier:
+    """Persistent queue of every article URL a city's sources have linked to
+    
+    Each URL is stored once under its canonical_url() key, the same key the
+    state store, HTML cache and global index use, along with the normalized
+    form it was first linked as (what gets fetched), its status, priority,
+    the earliest time it may be fetched again, its attempt count and the
+    hash of the content it last produced. Scrapers add the links they find
+    and pull batches of due URLs, so links over a run's limit, failures
+    waiting out their backoff and expired leases are picked up by later runs
+    without rebuilding anything. Lookups go through SQLite indexes, so the
+    frontier stays fast with millions of URLs.
+    """
+    
+    def __init__(self, path, lease_seconds=3600, retry_backoff=900, max_attempts=5, recrawl_seconds=0):
+        """Initialize the frontier
+        
+        Args:
+            path: SQLite database file
+            lease_seconds: How long a pulled URL is reserved before another run may pull it again
+            retry_backoff: Seconds before a failed URL is retried, doubled after each attempt
+            max_attempts: Failed attempts after which a URL is given up on
+            recrawl_seconds: Seconds after which a scraped URL is due again (0 never recrawls)
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+        self.max_attempts = max_attempts
+        self.recrawl_seconds = recrawl_seconds
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.migrate()
+    
+    def migrate(self):
+        """Rekey a frontier written before rows had a fetch URL, when they were keyed by normalized URL"""
+        if not add_frontier_fetch_urls(self.connection):
+            return
+        
+        rewritten = rekey_table(self.connection, "frontier", "url", canonical_url, merge_frontier_rows)
+        logger.info(f"Rekeyed {rewritten} frontier rows by canonical URL")
+    
+    def add(self, urls, source_id, priority=0):
+        """Add newly discovered URLs; URLs already in the frontier, under any variant, are left as they are
+        
+        Returns:
+            int: Number of URLs that were new
+        """
+        now = time.time()
+        rows = [(canonical_url(url), normalize_url(url), source_id, PENDING, priority, now, now, now) for url in urls]
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO frontier (url, fetch_url, source, status, priority, next_fetch_at, discovered_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.connection.commit()
+            return self.connection.total_changes - before
+    
+    def next_batch(self, source_id, limit):
+        """Lease the source's next due URLs, highest priority first and then in discovery order
+        
+        Returns:
+            list: URLs to fetch, in the form they were linked as
+        """
+        now = time.time()
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT url, COALESCE(fetch_url, url) FROM frontier WHERE source = ? AND next_fetch_at <= ? "
+                "ORDER BY priority DESC, next_fetch_at, rowid LIMIT ?",
+                (source_id, now, limit)
+            ).fetchall()
+            self.connection.executemany(
+                "UPDATE frontier SET status = ?, next_fetch_at = ?, updated_at = ? WHERE url = ?",
+                [(LEASED, now + self.lease_seconds, now, key) for key, _ in rows]
+            )
+            self.connection.commit()
+        return [fetch_url for _, fetch_url in rows]
+    
+    def complete(self, url, content_hash=None, status=DONE):
+        """Record that a URL was processed, scheduling its recrawl if recrawling is enabled"""
+        now = time.time()
+        next_fetch_at = now + self.recrawl_seconds if self.recrawl_seconds else None
+        with self.lock:
+            self.connection.execute(
+                "UPDATE frontier SET status = ?, next_fetch_at = ?, attempts = 0, "
+                "content_hash = COALESCE(?, content_hash), last_error = NULL, updated_at = ? WHERE url = ?",
+                (status, next_fetch_at, content_hash, now, canonical_url(url))
+            )
+            self.connection.commit()
+    
+    def fail(self, url, error=""):
+        """Record a failed attempt, backing off exponentially until max_attempts"""
+        now = time.time()
+        key = canonical_url(url)
+        with self.lock:
+            row = self.connection.execute("SELECT attempts FROM frontier WHERE url = ?", (key,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            if attempts >= self.max_attempts:
+                status, next_fetch_at = FAILED, None
+                logger.info(f"Giving up on {key} after {attempts} failed attempts")
+            else:
+                status, next_fetch_at = PENDING, now + self.retry_backoff * 2 ** (attempts - 1)
+            self.connection.execute(
+                "UPDATE frontier SET status = ?, next_fetch_at = ?, attempts = ?, last_error = ?, updated_at = ? WHERE url = ?",
+                (status, next_fetch_at, attempts, str(error)[:500], now, key)
+            )
+            self.connection.commit()
+    
+    def block(self, url):
+        """Never fetch a URL again"""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE frontier SET status = ?, next_fetch_at = NULL, updated_at = ? WHERE url = ?",
+                (BLOCKED, time.time(), canonical_url(url))
+            )
+            self.connection.commit()
+    
+    def release(self, url):
+        """Return a leased URL unprocessed, so the next run pulls it without counting an attempt"""
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "UPDATE frontier SET status = ?, next_fetch_at = ?, updated_at = ? WHERE url = ? AND status = ?",
+                (PENDING, now, now, canonical_url(url), LEASED)
+            )
+            self.connection.commit()
+    
+    def status(self, url):
+        """Get the stored state of a URL, or None if it isn't in the frontier"""
+        with self.lock:
+            cursor = self.connection.execute("SELECT * FROM frontier WHERE url = ?", (canonical_url(url),))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([column[0] for column in cursor.description], row))
+    
+    def stats(self, source_id=None):
+        """Count URLs per status, for one source or the whole frontier"""
+        with self.lock:
+            if source_id:
+                rows = self.connection.execute(
+                    "SELECT status, COUNT(*) FROM frontier WHERE source = ? GROUP BY status", (source_id,)
+                ).fetchall()
+            else:
+                rows = self.connection.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall()
+        return dict(rows)
+    
+    def close(self):
+        with self.lock:
+            self.connection.close()
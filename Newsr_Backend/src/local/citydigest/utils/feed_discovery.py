@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from ..config.scraping import get_scraping_config
+
+logger = logging.getLogger("feed_discovery")
+
+def local_name(tag):
+    """Strip the XML namespace from a tag name"""
+    return tag.rsplit('}', 1)[-1] if '}' in tag else tag
+
+def parse_feed_date(value):
+    """Parse an RSS (RFC 822) or Atom/sitemap (ISO 8601) date into an aware datetime"""
+    if not value:
+        return None
+    value = value.strip()
+    
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def find_child(element, *names):
+    """Find the first nested child matching one of the local tag names, in order of preference"""
+    for name in names:
+        for child in element.iter():
+            if child is not element and local_name(child.tag) == name:
+                return child
+    return None
+
+def parse_feed(xml_text):
+    """Parse an RSS, Atom, news sitemap or sitemap index document
+    
+    Returns:
+        tuple: (entries, child_sitemaps) where entries is a list of (url, published)
+               and child_sitemaps lists the sitemaps of a sitemap index
+    """
+    root = ET.fromstring(xml_text.encode('utf-8') if isinstance(xml_text, str) else xml_text)
+    root_name = local_name(root.tag)
+    entries = []
+    child_sitemaps = []
+    
+    if root_name == "rss" or root_name == "RDF":
+        for item in root.iter():
+            if local_name(item.tag) != "item":
+                continue
+            link = find_child(item, "link")
+            date = find_child(item, "pubDate", "date")
+            if link is not None and (link.text or "").strip():
+                entries.append((link.text.strip(), parse_feed_date(date.text if date is not None else None)))
+    
+    elif root_name == "feed":
+        for entry in root:
+            if local_name(entry.tag) != "entry":
+                continue
+            href = None
+            for link in entry:
+                if local_name(link.tag) == "link" and link.get("rel", "alternate") == "alternate":
+                    href = link.get("href")
+                    break
+            date = find_child(entry, "published", "updated")
+            if href:
+                entries.append((href.strip(), parse_feed_date(date.text if date is not None else None)))
+    
+    elif root_name == "urlset":
+        for url in root:
+            if local_name(url.tag) != "url":
+                continue
+            loc = find_child(url, "loc")
+            # Prefer the news:publication_date of a news sitemap over lastmod
+            date = find_child(url, "publication_date", "lastmod")
+            if loc is not None and (loc.text or "").strip():
+                entries.append((loc.text.strip(), parse_feed_date(date.text if date is not None else None)))
+    
+    elif root_name == "sitemapindex":
+        for sitemap in root:
+            if local_name(sitemap.tag) != "sitemap":
+                continue
+            loc = find_child(sitemap, "loc")
+            date = find_child(sitemap, "lastmod")
+            if loc is not None and (loc.text or "").strip():
+                child_sitemaps.append((loc.text.strip(), parse_feed_date(date.text if date is not None else None)))
+    
+    return entries, child_sitemaps
+
+class FeedDiscovery:
+    """Link discovery from a source's RSS/Atom feed or news sitemap
+    
+    Sources opt in with a `feed_url` and/or `sitemap_url` in their config.
+    Only entries published since the last successful run of the source are
+    returned, newest first.
+    """
+    
+    def __init__(self, http_fetcher, state_path):
+        """Initialize feed discovery
+        
+        Args:
+            http_fetcher: HttpFetcher used to download feeds
+            state_path: JSON file with the last successful run time of each source
+        """
+        config = get_scraping_config("feeds")
+        self.http_fetcher = http_fetcher
+        self.state_path = state_path
+        self.lookback_hours = config.get("lookback_hours", 24)
+        self.max_child_sitemaps = config.get("max_child_sitemaps", 3)
+        self.last_runs = self.load()
+        self.pending = {}
+        self.lock = threading.Lock()
+    
+    def load(self):
+        """Load the last successful run time of each source"""
+        if not os.path.exists(self.state_path):
+            return {}
+        
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+    
+    def save(self):
+        """Write the last successful run time of each source"""
+        with self.lock:
+            last_runs = dict(self.last_runs)
+        
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(last_runs, f, ensure_ascii=False, indent=2)
+    
+    def has_feed(self, source_config):
+        """Check whether a source has a feed or sitemap configured"""
+        return bool(source_config.get("feed_url") or source_config.get("sitemap_url"))
+    
+    def fetch_entries(self, url, depth=0):
+        """Download and parse a feed, following a sitemap index one level down"""
+        response = self.http_fetcher.fetch(url)
+        if response is None or response.status_code != 200:
+            return None
+        
+        try:
+            entries, child_sitemaps = parse_feed(response.content)
+        except ET.ParseError as e:
+            logger.warning(f"Could not parse feed {url}: {str(e)}")
+            return None
+        
+        if child_sitemaps and depth == 0:
+            # Sitemap indexes list their newest sitemaps by lastmod; only read the most recent few
+            newest = datetime.min.replace(tzinfo=timezone.utc)
+            child_sitemaps.sort(key=lambda item: item[1] or newest, reverse=True)
+            for child_url, _ in child_sitemaps[:self.max_child_sitemaps]:
+                entries.extend(self.fetch_entries(child_url, depth=1) or [])
+        
+        return entries
+    
+    def discover(self, source_id, source_config):
+        """Get article links published since the last successful run
+        
+        Returns:
+            list: Article URLs, newest first, or None if no feed is available
+        """
+        started_at = datetime.now(timezone.utc)
+        
+        entries = None
+        for key in ("feed_url", "sitemap_url"):
+            url = source_config.get(key)
+            if not url:
+                continue
+            entries = self.fetch_entries(url)
+            if entries:
+                logger.info(f"Read {len(entries)} entries from {url}")
+                break
+        
+        if not entries:
+            return None
+        
+        last_run = self.last_runs.get(source_id)
+        since = parse_feed_date(last_run) if last_run else started_at - timedelta(hours=self.lookback_hours)
+        
+        # Entries without a date can't be filtered, so they are kept and left to URL dedup
+        recent = [(url, published) for url, published in entries if published is None or published > since]
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+        recent.sort(key=lambda item: item[1] or oldest, reverse=True)
+        
+        with self.lock:
+            self.pending[source_id] = started_at.isoformat()
+        
+        links = list(dict.fromkeys(url for url, _ in recent))
+        logger.info(f"{len(links)} feed entries for {source_id} since {since.isoformat()}")
+        return links
+    
+    def mark_success(self, source_id):
+        """Record that a source's feed entries were processed, so the next run starts from here"""
+        with self.lock:
+            started_at = self.pending.pop(source_id, None)
+            if started_at:
+                self.last_runs[source_id] = started_at
+        
+        if started_at:
+            self.save()
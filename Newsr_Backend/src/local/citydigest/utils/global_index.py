@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+from ..config.scraping import STATE_DIR, get_scraping_config
+from .url_canonical import canonical_url
+
+logger = logging.getLogger("global_index")
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    fingerprint TEXT PRIMARY KEY,
+    fields TEXT NOT NULL,
+    first_url TEXT NOT NULL,
+    scopes TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_age ON articles (updated_at);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS urls_fingerprint ON urls (fingerprint);
+CREATE TABLE IF NOT EXISTS savings (
+    day TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, scope, kind)
+);
+"""
+
+# Article fields kept for reuse by other scrapers
+SHARED_FIELDS = ("title", "content", "author", "published_date", "image_urls")
+
+def fingerprint(content, min_words=50):
+    """Get the fingerprint of an article body: a hash of its words, ignoring case, punctuation and spacing
+    
+    Returns:
+        str: Hex digest, or None if the body is too short to identify a story
+    """
+    words = WORD_PATTERN.findall((content or "").lower())
+    if len(words) < min_words:
+        return None
+    return hashlib.sha256(" ".join(words).encode('utf-8')).hexdigest()
+
+class GlobalArticleIndex:
+    """Body fingerprints of the articles every city and topic scraper has extracted
+    
+    Wire copy and network stories appear on many local sites, often under a
+    different URL on each. Every extracted article is stored once under the
+    fingerprint of its body, with the scopes (city codes or topics) that have
+    seen it, and every URL it was found under points at that fingerprint. A
+    scraper that comes across a known URL reuses the stored fields instead of
+    fetching the page, and one that extracts a known body under a new URL
+    adds that URL, so the next scraper to meet it skips the fetch. Avoided
+    fetches are counted per day and scope. URLs are keyed by canonical_url(),
+    so the AMP, mobile and tracking-tagged variants of a link all hit.
+    """
+    
+    def __init__(self, path, ttl_seconds=604800, min_words=50):
+        """Initialize the index
+        
+        Args:
+            path: SQLite database file, shared by every scraper process
+            ttl_seconds: How long an article is kept after it was last seen
+            min_words: Shortest body that is fingerprinted
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.min_words = min_words
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+    
+    def lookup_url(self, url):
+        """Get the stored fields of the article a URL led to, or None if no scraper has extracted it"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT a.fields, a.first_url, a.scopes FROM urls u JOIN articles a ON a.fingerprint = u.fingerprint "
+                "WHERE u.url = ? AND a.updated_at >= ?",
+                (canonical_url(url), time.time() - self.ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return None
+        
+        fields = json.loads(row[0])
+        fields["first_url"] = row[1]
+        fields["scopes"] = json.loads(row[2])
+        return fields
+    
+    def record(self, url, fields, scope, aliases=()):
+        """Record an extracted article, tagging it with the scope that found it
+        
+        Args:
+            url: URL the article was found under
+            fields: Dict with the SHARED_FIELDS of the article
+            scope: City code, or "topic:<code>" for topic scrapers
+            aliases: Other URLs of the same article, such as the canonical URL the page declares
+        
+        Returns:
+            dict: first_url and scopes of the earlier article when another
+                  scope had already extracted the same body, otherwise None
+        """
+        key = fingerprint(fields.get("content"), self.min_words)
+        if key is None:
+            return None
+        
+        now = time.time()
+        url = canonical_url(url)
+        urls = dict.fromkeys([url] + [canonical_url(alias) for alias in aliases if alias])
+        with self.lock:
+            row = self.connection.execute("SELECT first_url, scopes FROM articles WHERE fingerprint = ?", (key,)).fetchone()
+            if row is None:
+                shared = {field: fields.get(field) for field in SHARED_FIELDS}
+                self.connection.execute(
+                    "INSERT INTO articles (fingerprint, fields, first_url, scopes, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, json.dumps(shared, ensure_ascii=False), url, json.dumps([scope]), now, now)
+                )
+                earlier = None
+            else:
+                scopes = json.loads(row[1])
+                earlier = {"first_url": row[0], "scopes": list(scopes)} if any(other != scope for other in scopes) else None
+                if scope not in scopes:
+                    scopes.append(scope)
+                self.connection.execute(
+                    "UPDATE articles SET scopes = ?, updated_at = ? WHERE fingerprint = ?", (json.dumps(scopes), now, key)
+                )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO urls (url, fingerprint, seen_at) VALUES (?, ?, ?)", [(other, key, now) for other in urls]
+            )
+            self.connection.commit()
+        return earlier
+    
+    def tag(self, url, scope):
+        """Add a scope to the article a URL led to, when it is reused without extraction"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT a.fingerprint, a.scopes FROM urls u JOIN articles a ON a.fingerprint = u.fingerprint WHERE u.url = ?", (canonical_url(url),)
+            ).fetchone()
+            if row is None:
+                return
+            
+            scopes = json.loads(row[1])
+            if scope not in scopes:
+                scopes.append(scope)
+            self.connection.execute(
+                "UPDATE articles SET scopes = ?, updated_at = ? WHERE fingerprint = ?", (json.dumps(scopes), time.time(), row[0])
+            )
+            self.connection.commit()
+    
+    def count_avoided(self, scope, kind="fetch"):
+        """Count an article that didn't have to be fetched ("fetch") or that turned out to be a copy ("copy")"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO savings (day, scope, kind, count) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(day, scope, kind) DO UPDATE SET count = count + 1",
+                (date.today().isoformat(), scope, kind)
+            )
+            self.connection.commit()
+    
+    def daily_counts(self, days=7, scope=None):
+        """Get avoided fetches and copies per day for the last few days
+        
+        Returns:
+            dict: Day to {"fetch": ..., "copy": ...}
+        """
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        query = "SELECT day, kind, SUM(count) FROM savings WHERE day >= ?"
+        params = [since]
+        if scope:
+            query += " AND scope = ?"
+            params.append(scope)
+        with self.lock:
+            rows = self.connection.execute(query + " GROUP BY day, kind ORDER BY day", params).fetchall()
+        
+        counts = {}
+        for day, kind, count in rows:
+            counts.setdefault(day, {"fetch": 0, "copy": 0})[kind] = count
+        return counts
+    
+    def expire(self):
+        """Delete articles not seen within the TTL, and the URLs pointing at them
+        
+        Returns:
+            int: Number of articles deleted
+        """
+        before = time.time() - self.ttl_seconds
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM urls WHERE fingerprint IN (SELECT fingerprint FROM articles WHERE updated_at < ?)", (before,)
+            )
+            deleted = self.connection.execute("DELETE FROM articles WHERE updated_at < ?", (before,)).rowcount
+            self.connection.commit()
+            return deleted
+
+_global_index = None
+_global_index_lock = threading.Lock()
+
+def get_global_index():
+    """Get the process-wide cross-city article index, or None if it is disabled"""
+    global _global_index
+    config = get_scraping_config("global_dedup")
+    if not config.get("enabled", True):
+        return None
+    
+    with _global_index_lock:
+        if _global_index is None:
+            os.makedirs(STATE_DIR, exist_ok=True)
+            _global_index = GlobalArticleIndex(
+                os.path.join(STATE_DIR, "global_articles.db"),
+                ttl_seconds=config.get("ttl_days", 7) * 86400,
+                min_words=config.get("min_words", 50)
+            )
+            _global_index.expire()
+        return _global_index
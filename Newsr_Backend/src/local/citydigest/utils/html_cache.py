@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from ..config.scraping import HTML_CACHE_DIR, get_scraping_config
+from .url_canonical import canonical_url
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("html_cache")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    city TEXT,
+    source TEXT,
+    fetched_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_age ON pages (fetched_at);
+"""
+
+ENTRY_COLUMNS = ("hash", "codec", "size", "city", "source", "fetched_at")
+
+class HtmlCache:
+    """On-disk cache of raw fetched HTML, content-addressed by SHA-256
+    
+    Pages are stored compressed under objects/<hash[:2]>/<hash>.<codec>, so a
+    page fetched again with the same bytes costs no extra space. The SQLite
+    index.db maps each canonical URL to the hash of its latest fetch along
+    with the city, source and fetch time, which is what `reparse` uses to
+    find pages without network access. Every put() writes its own row, so
+    scraper processes sharing the cache never drop each other's entries and
+    eviction only ever sees objects some process has indexed.
+    """
+    
+    def __init__(self, root=HTML_CACHE_DIR, compression="zstd", ttl_days=30, max_megabytes=1024):
+        """Initialize the cache
+        
+        Args:
+            root: Cache directory
+            compression: 'zstd' or 'gzip'; zstd falls back to gzip if zstandard isn't installed
+            ttl_days: Days a page is kept after it was last fetched
+            max_megabytes: Upper bound on the compressed size of all stored pages
+        """
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.db")
+        self.codec = "zst" if compression == "zstd" and zstandard else "gz"
+        self.ttl = timedelta(days=ttl_days)
+        self.max_bytes = max_megabytes * 1024 * 1024
+        self.lock = threading.Lock()
+        
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.connection = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.import_json(os.path.join(root, "index.json"))
+    
+    def import_json(self, path):
+        """Load the JSON index the cache kept before index.db
+        
+        The file is renamed with an .imported suffix afterwards, so this
+        happens once. URLs already in the database are left alone.
+        
+        Returns:
+            int: Number of entries imported
+        """
+        if not os.path.exists(path):
+            return 0
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load HTML cache index {path}: {str(e)}")
+            index = {}
+        
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                f"INSERT OR IGNORE INTO pages (url, {', '.join(ENTRY_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(url, *(entry.get(column) for column in ENTRY_COLUMNS)) for url, entry in index.items()]
+            )
+            self.connection.commit()
+            imported = self.connection.total_changes - before
+        
+        os.replace(path, path + ".imported")
+        logger.info(f"Imported {imported} HTML cache entries from {path}")
+        return imported
+    
+    def close(self):
+        with self.lock:
+            self.connection.close()
+    
+    def object_path(self, content_hash, codec):
+        """Get the file path of a stored page"""
+        return os.path.join(self.objects_dir, content_hash[:2], f"{content_hash}.{codec}")
+    
+    def compress(self, data):
+        if self.codec == "zst":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+    
+    def decompress(self, data, codec):
+        if codec == "zst":
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read zstd-compressed cache entries")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+    
+    def put(self, url, html, city_code=None, source_id=None):
+        """Store the raw HTML of a fetched page
+        
+        Returns:
+            str: Content hash of the page
+        """
+        if not html:
+            return None
+        
+        data = html.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self.object_path(content_hash, self.codec)
+        
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(self.compress(data))
+                os.replace(temp_path, path)
+            
+            with self.lock:
+                self.connection.execute(
+                    f"INSERT OR REPLACE INTO pages (url, {', '.join(ENTRY_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (canonical_url(url), content_hash, self.codec, os.path.getsize(path), city_code, source_id, datetime.now().isoformat())
+                )
+                self.connection.commit()
+            return content_hash
+        except Exception as e:
+            logger.warning(f"Could not cache HTML for {url}: {str(e)}")
+            return None
+    
+    def get(self, url):
+        """Get the cached HTML of a URL, or None if it isn't cached"""
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT {', '.join(ENTRY_COLUMNS)} FROM pages WHERE url = ?", (canonical_url(url),)
+            ).fetchone()
+        if not row:
+            return None
+        return self.read(dict(zip(ENTRY_COLUMNS, row)))
+    
+    def read(self, entry):
+        """Read and decompress the page an index entry points at"""
+        path = self.object_path(entry["hash"], entry["codec"])
+        try:
+            with open(path, 'rb') as f:
+                return self.decompress(f.read(), entry["codec"]).decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Could not read cached page {entry['hash']}: {str(e)}")
+            return None
+    
+    def entries(self, city_code=None, since=None, until=None):
+        """List cached pages, optionally for one city and a fetch-time range
+        
+        Args:
+            city_code: Only include pages fetched for this city
+            since: Only include pages fetched at or after this datetime
+            until: Only include pages fetched before this datetime
+        
+        Returns:
+            list: (url, entry) pairs, oldest first
+        """
+        conditions = []
+        params = []
+        if city_code:
+            conditions.append("city = ?")
+            params.append(city_code)
+        if since:
+            conditions.append("fetched_at >= ?")
+            params.append(since.isoformat())
+        if until:
+            conditions.append("fetched_at < ?")
+            params.append(until.isoformat())
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT url, {', '.join(ENTRY_COLUMNS)} FROM pages{where} ORDER BY fetched_at", params
+            ).fetchall()
+        return [(row[0], dict(zip(ENTRY_COLUMNS, row[1:]))) for row in rows]
+    
+    def evict(self):
+        """Drop pages past their TTL, then the oldest pages until the cache fits its size limit
+        
+        Returns:
+            int: Number of index entries removed
+        """
+        cutoff = (datetime.now() - self.ttl).isoformat()
+        
+        with self.lock:
+            removed = self.connection.execute("DELETE FROM pages WHERE fetched_at < ?", (cutoff,)).rowcount
+            kept = self.connection.execute("SELECT url, hash, codec, size FROM pages ORDER BY fetched_at").fetchall()
+            
+            # Objects are shared between URLs with identical content, so count each once
+            sizes = {}
+            references = {}
+            for _, content_hash, codec, size in kept:
+                key = (content_hash, codec)
+                sizes[key] = size
+                references[key] = references.get(key, 0) + 1
+            total = sum(sizes.values())
+            
+            dropped = []
+            while kept and total > self.max_bytes:
+                url, content_hash, codec, _ = kept.pop(0)
+                dropped.append((url,))
+                key = (content_hash, codec)
+                references[key] -= 1
+                if references[key] == 0:
+                    total -= sizes.pop(key, 0)
+            
+            self.connection.executemany("DELETE FROM pages WHERE url = ?", dropped)
+            self.connection.commit()
+            removed += len(dropped)
+            
+            referenced = {
+                self.object_path(content_hash, codec)
+                for content_hash, codec in self.connection.execute("SELECT DISTINCT hash, codec FROM pages")
+            }
+        
+        # Delete objects no index entry points at any more, leaving recent writes
+        # alone since their index row may not have been committed yet
+        deleted = 0
+        recent = time.time() - 3600
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if path in referenced or filename.endswith(".tmp"):
+                    continue
+                if os.path.getmtime(path) > recent:
+                    continue
+                try:
+                    os.remove(path)
+                    deleted += 1
+                except OSError:
+                    pass
+        
+        if removed or deleted:
+            logger.info(f"Evicted {removed} cached pages and {deleted} stored objects")
+        return removed
+
+_html_cache = None
+_html_cache_lock = threading.Lock()
+
+def get_html_cache():
+    """Get the process-wide HTML cache, or None if it is disabled"""
+    global _html_cache
+    config = get_scraping_config("html_cache")
+    if not config.get("enabled", False):
+        return None
+    
+    with _html_cache_lock:
+        if _html_cache is None:
+            _html_cache = HtmlCache(
+                compression=config.get("compression", "zstd"),
+                ttl_days=config.get("ttl_days", 30),
+                max_megabytes=config.get("max_megabytes", 1024)
+            )
+        return _html_cache
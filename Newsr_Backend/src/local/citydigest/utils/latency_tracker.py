@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from ..config.scraping import STATE_DIR, get_scraping_config
+
+logger = logging.getLogger("latency_tracker")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_host ON samples (host, kind, id);
+"""
+
+KINDS = ("ttfb", "load")
+
+class LatencyTracker:
+    """Per-host response times, persisted across runs, that timeouts are derived from
+    
+    For every host it keeps the most recent time-to-first-byte and full-load
+    samples. Once a host has enough samples, its timeouts are its p95 times a
+    safety multiplier, clamped between a floor and a ceiling: a stalled fetch
+    from a fast site is abandoned early, while a slow site that does respond
+    is given the time it needs. Requests that time out are recorded at the
+    timeout they hit, so a site that keeps timing out gets longer timeouts up
+    to the ceiling. Samples are buffered in memory and appended to a SQLite
+    database by save(), which then reloads the hosts it wrote, so processes
+    sharing the database pool their samples instead of overwriting them.
+    """
+    
+    def __init__(self, path, window=100, min_samples=5, multiplier=2.0, request_bounds=(3, 30), page_load_bounds=(8, 60)):
+        """Initialize the tracker
+        
+        Args:
+            path: SQLite database file, shared by every scraper process
+            window: Recent samples kept per host and kind
+            min_samples: Samples a host needs before its own timeouts are used
+            multiplier: Timeout as a multiple of the host's p95
+            request_bounds: (floor, ceiling) in seconds for HTTP request timeouts
+            page_load_bounds: (floor, ceiling) in seconds for browser page-load timeouts
+        """
+        self.path = path
+        self.window = window
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.request_bounds = request_bounds
+        self.page_load_bounds = page_load_bounds
+        self.enabled = True
+        self.lock = threading.Lock()
+        self.pending = []
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.hosts = self.load()
+    
+    def load(self, hosts=None):
+        """Load the most recent samples per host and kind from the database
+        
+        Args:
+            hosts: Only load these hosts, or None for every host
+        """
+        query = "SELECT host, kind, seconds FROM samples"
+        params = []
+        if hosts is not None:
+            hosts = list(hosts)
+            query += f" WHERE host IN ({', '.join('?' for _ in hosts)})"
+            params = hosts
+        
+        loaded = {}
+        for host, kind, seconds in self.connection.execute(query + " ORDER BY id", params):
+            loaded.setdefault(host, {kind: [] for kind in KINDS}).setdefault(kind, []).append(seconds)
+        for entry in loaded.values():
+            for kind in entry:
+                entry[kind] = entry[kind][-self.window:]
+        return loaded
+    
+    def save(self):
+        """Append the samples recorded since the last save and pick up other processes' samples for the same hosts"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if not pending:
+                return
+            
+            touched = {(host, kind) for host, kind, _, _ in pending}
+            try:
+                self.connection.executemany(
+                    "INSERT INTO samples (host, kind, seconds, recorded_at) VALUES (?, ?, ?, ?)", pending
+                )
+                # Keep only the window of most recent samples per host and kind
+                self.connection.executemany(
+                    "DELETE FROM samples WHERE host = ? AND kind = ? AND id NOT IN "
+                    "(SELECT id FROM samples WHERE host = ? AND kind = ? ORDER BY id DESC LIMIT ?)",
+                    [(host, kind, host, kind, self.window) for host, kind in touched]
+                )
+                self.connection.commit()
+                self.hosts.update(self.load({host for host, _ in touched}))
+            except sqlite3.Error as e:
+                self.connection.rollback()
+                logger.warning(f"Could not save latency samples: {str(e)}")
+    
+    def import_json(self, path):
+        """Load the JSON file samples were kept in before the database
+        
+        The file is renamed with an .imported suffix afterwards, so this
+        happens once.
+        
+        Returns:
+            int: Number of samples imported
+        """
+        if not os.path.exists(path):
+            return 0
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                hosts = json.load(f)
+        except:
+            hosts = {}
+        
+        now = time.time()
+        rows = [
+            (host, kind, seconds, now)
+            for host, entry in hosts.items()
+            for kind in KINDS
+            for seconds in entry.get(kind, [])[-self.window:]
+        ]
+        with self.lock:
+            self.connection.executemany("INSERT INTO samples (host, kind, seconds, recorded_at) VALUES (?, ?, ?, ?)", rows)
+            self.connection.commit()
+            self.hosts = self.load()
+        
+        os.replace(path, path + ".imported")
+        logger.info(f"Imported {len(rows)} latency samples from {path}")
+        return len(rows)
+    
+    def normalize_host(self, url):
+        host = urlparse(url).netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return host
+    
+    def record(self, url, ttfb=None, load=None):
+        """Record how long a request took to its first byte and to finish loading, in seconds"""
+        host = self.normalize_host(url)
+        if not self.enabled or not host:
+            return
+        
+        now = time.time()
+        with self.lock:
+            entry = self.hosts.setdefault(host, {kind: [] for kind in KINDS})
+            for kind, seconds in (("ttfb", ttfb), ("load", load)):
+                if seconds is not None and seconds >= 0:
+                    entry[kind] = (entry.get(kind, []) + [round(seconds, 3)])[-self.window:]
+                    self.pending.append((host, kind, round(seconds, 3), now))
+    
+    def percentile(self, url, kind, percent):
+        """Get a percentile of a URL's host's samples in seconds, or None without enough samples"""
+        return self.host_percentile(self.normalize_host(url), kind, percent)
+    
+    def host_percentile(self, host, kind, percent):
+        with self.lock:
+            samples = sorted(self.hosts.get(host, {}).get(kind, []))
+        if len(samples) < self.min_samples:
+            return None
+        
+        # Nearest-rank percentile
+        rank = max(1, -(-len(samples) * percent // 100))
+        return samples[int(rank) - 1]
+    
+    def timeout(self, url, kind, bounds, default):
+        if not self.enabled:
+            return default
+        
+        p95 = self.percentile(url, kind, 95)
+        if p95 is None:
+            return default
+        
+        floor, ceiling = bounds
+        return round(min(max(p95 * self.multiplier, floor), ceiling), 1)
+    
+    def request_timeout(self, url, default):
+        """Get the HTTP timeout for a URL, based on the host's time to first byte"""
+        return self.timeout(url, "ttfb", self.request_bounds, default)
+    
+    def page_load_timeout(self, url, default):
+        """Get the browser page-load timeout for a URL, based on the host's full load times"""
+        return self.timeout(url, "load", self.page_load_bounds, default)
+    
+    def stats(self):
+        """Get p50/p95 time to first byte and load time per host, in seconds"""
+        with self.lock:
+            hosts = list(self.hosts)
+        
+        stats = {}
+        for host in hosts:
+            stats[host] = {
+                f"{kind}_{name}": self.host_percentile(host, kind, percent)
+                for kind in KINDS
+                for name, percent in (("p50", 50), ("p95", 95))
+            }
+        return stats
+
+_latency_tracker = None
+_latency_tracker_lock = threading.Lock()
+
+def get_latency_tracker():
+    """Get the process-wide latency tracker"""
+    global _latency_tracker
+    with _latency_tracker_lock:
+        if _latency_tracker is None:
+            config = get_scraping_config("latency")
+            os.makedirs(STATE_DIR, exist_ok=True)
+            _latency_tracker = LatencyTracker(
+                os.path.join(STATE_DIR, "latency.db"),
+                window=config.get("window", 100),
+                min_samples=config.get("min_samples", 5),
+                multiplier=config.get("multiplier", 2.0),
+                request_bounds=(config.get("request_floor", 3), config.get("request_ceiling", 30)),
+                page_load_bounds=(config.get("page_load_floor", 8), config.get("page_load_ceiling", 60))
+            )
+            _latency_tracker.enabled = config.get("enabled", True)
+            _latency_tracker.import_json(os.path.join(STATE_DIR, "latency.json"))
+        return _latency_tracker
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from .url_canonical import canonical_url
+
+logger = logging.getLogger("link_snapshots")
+
+class LinkSnapshots:
+    """Per-source snapshot of the article links seen on each listing page
+    
+    Each run diffs the links currently on a source's homepage against the
+    snapshot, so only links that newly appeared are fetched. Links that were
+    already seen are left alone, and new links that weren't processed this run
+    (over the source's article limit, or failed) stay new for the next run.
+    """
+    
+    def __init__(self, path, max_links=500):
+        """Initialize the snapshots
+        
+        Args:
+            path: JSON file the snapshots are persisted to
+            max_links: Links remembered per source, most recently seen first
+        """
+        self.path = path
+        self.max_links = max_links
+        self.snapshots = self.load()
+        self.lock = threading.Lock()
+    
+    def load(self):
+        """Load link snapshots from disk"""
+        if not os.path.exists(self.path):
+            return {}
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+    
+    def save(self):
+        """Write link snapshots to disk"""
+        with self.lock:
+            snapshots = dict(self.snapshots)
+        
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(snapshots, f, ensure_ascii=False, indent=2)
+    
+    def diff(self, source_id, links):
+        """Get the links that weren't on the source's listing before, in page order"""
+        with self.lock:
+            seen = {canonical_url(link) for link in self.snapshots.get(source_id, {}).get("links", [])}
+        return [link for link in links if canonical_url(link) not in seen]
+    
+    def commit(self, source_id, links, unprocessed=None):
+        """Mark the links on the listing as seen, except new ones that still need fetching
+        
+        Args:
+            source_id: Source the listing belongs to
+            links: All links currently on the listing, in page order
+            unprocessed: New links that weren't fetched this run
+        """
+        unprocessed = {canonical_url(link) for link in unprocessed or []}
+        with self.lock:
+            previous = self.snapshots.get(source_id, {}).get("links", [])
+            current = [link for link in links if canonical_url(link) not in unprocessed]
+            
+            # Keep links that dropped off the page for a while, since carousels and
+            # "most read" boxes bring old stories back
+            merged = list(dict.fromkeys(current + previous))[:self.max_links]
+            self.snapshots[source_id] = {
+                "links": merged,
+                "updated_at": datetime.now().isoformat()
+            }
+        
+        self.save()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+
+logger = logging.getLogger("listing_cache")
+
+HREF_PATTERN = re.compile(r'href\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+class ListingCache:
+    """Conditional-GET cache for source listing pages
+    
+    Stores the ETag, Last-Modified and a fingerprint of each listing page so
+    a run can tell that a source homepage hasn't changed since the last run
+    and skip link extraction for it. The fingerprint is taken over the page's
+    link targets rather than the raw bytes, because homepages embed per-request
+    tokens and timestamps that would make a byte hash change on every fetch.
+    """
+    
+    def __init__(self, path):
+        """Initialize the listing cache
+        
+        Args:
+            path: JSON file the cache is persisted to
+        """
+        self.path = path
+        self.entries = self.load()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def load(self):
+        """Load cached listing entries from disk"""
+        if not os.path.exists(self.path):
+            return {}
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+    
+    def save(self):
+        """Write cached listing entries to disk"""
+        with self.lock:
+            entries = dict(self.entries)
+        
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+    
+    def conditional_headers(self, url):
+        """Get If-None-Match / If-Modified-Since headers for a listing URL"""
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def fingerprint(self, html):
+        """Fingerprint a listing page by the set of links it contains"""
+        links = sorted(set(HREF_PATTERN.findall(html or "")))
+        return hashlib.sha256("\n".join(links).encode('utf-8')).hexdigest()
+    
+    def check(self, url, response):
+        """Check whether a listing page is unchanged since it was last processed
+        
+        The new validators are held back until commit() is called, so a source
+        that fails halfway through is not marked as up to date.
+        
+        Args:
+            url: Listing page URL
+            response: Response to a conditional GET for the URL
+            
+        Returns:
+            bool: True on a 304 or an identical fingerprint
+        """
+        entry = self.entries.get(url)
+        
+        if response.status_code == 304 and entry:
+            unchanged = True
+            fingerprint = entry.get("fingerprint")
+        else:
+            fingerprint = self.fingerprint(response.text)
+            unchanged = bool(entry) and entry.get("fingerprint") == fingerprint
+        
+        with self.lock:
+            if unchanged:
+                self.hits += 1
+            else:
+                self.misses += 1
+            
+            self.pending[url] = {
+                "etag": response.headers.get("ETag") or (entry or {}).get("etag"),
+                "last_modified": response.headers.get("Last-Modified") or (entry or {}).get("last_modified"),
+                "fingerprint": fingerprint,
+                "checked_at": datetime.now().isoformat()
+            }
+        
+        return unchanged
+    
+    def commit(self, url):
+        """Record the validators from the last check once the source was processed"""
+        with self.lock:
+            entry = self.pending.pop(url, None)
+            if entry:
+                self.entries[url] = entry
+        
+        if entry:
+            self.save()
+    
+    def discard(self, url):
+        """Drop the validators from the last check without recording them"""
+        with self.lock:
+            self.pending.pop(url, None)
+    
+    def stats(self):
+        """Get hit and miss counts for this run"""
+        return {"hits": self.hits, "misses": self.misses}
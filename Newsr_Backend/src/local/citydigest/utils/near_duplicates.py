@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+
+logger = logging.getLogger("near_duplicates")
+
+# Mersenne prime the permutation hashes are taken modulo
+PRIME = (1 << 61) - 1
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT,
+    title TEXT,
+    signature BLOB NOT NULL,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_age ON articles (seen_at);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    article_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_bucket ON bands (band, bucket);
+CREATE INDEX IF NOT EXISTS bands_article ON bands (article_id);
+"""
+
+class MinHasher:
+    """MinHash signatures over the word shingles of a text
+    
+    The share of equal positions in two signatures estimates the Jaccard
+    similarity of the two texts' shingle sets.
+    """
+    
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        """Initialize the hasher
+        
+        Args:
+            num_perm: Hash functions, i.e. signature length
+            shingle_size: Words per shingle
+            seed: Seed for the hash functions; signatures are only comparable with the same seed
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = random.Random(seed)
+        self.permutations = [(generator.randrange(1, PRIME), generator.randrange(0, PRIME)) for _ in range(num_perm)]
+    
+    def shingles(self, text):
+        """Get the hashed word shingles of a text, ignoring case and punctuation"""
+        words = WORD_PATTERN.findall(text.lower())
+        if not words:
+            return set()
+        
+        size = min(self.shingle_size, len(words))
+        return {
+            int.from_bytes(hashlib.blake2b(" ".join(words[i:i + size]).encode('utf-8'), digest_size=8).digest(), 'little')
+            for i in range(len(words) - size + 1)
+        }
+    
+    def signature(self, text):
+        """Get a text's MinHash signature, or None if it has no words"""
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        return [min((a * shingle + b) % PRIME for shingle in shingles) for a, b in self.permutations]
+
+def similarity(first, second):
+    """Estimate the Jaccard similarity of two texts from their signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+def pack_signature(signature):
+    return struct.pack(f"<{len(signature)}Q", *signature)
+
+def unpack_signature(data):
+    return list(struct.unpack(f"<{len(data) // 8}Q", data))
+
+class NearDuplicateIndex:
+    """SQLite-backed LSH index of article MinHash signatures
+    
+    Each signature is cut into `bands` bands, and every band is hashed to a
+    bucket. Articles sharing a bucket with a new one in any band are its
+    candidates; only those are compared signature to signature. Lookups are
+    one indexed query per band however many articles are stored. With
+    r rows per band, pairs are likely to become candidates above a
+    similarity of about (1/bands)^(1/r), so the band count should put that
+    somewhat below the match threshold.
+    """
+    
+    def __init__(self, path, bands=32, threshold=0.8):
+        """Initialize the index
+        
+        Args:
+            path: SQLite database file
+            bands: LSH bands each signature is cut into
+            threshold: Estimated Jaccard similarity at which articles count as duplicates
+        """
+        self.path = path
+        self.bands = bands
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+    
+    def band_buckets(self, signature):
+        """Get (band, bucket) for every band of a signature"""
+        rows = len(signature) // self.bands
+        buckets = []
+        for band in range(self.bands):
+            digest = hashlib.blake2b(pack_signature(signature[band * rows:(band + 1) * rows]), digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+        return buckets
+    
+    def find(self, signature, since=0):
+        """Find the stored article most similar to a signature, seen at or after since
+        
+        Returns:
+            dict: id, url, title, seen_at and similarity of the best match at
+                  or above the threshold, or None
+        """
+        best = None
+        checked = set()
+        with self.lock:
+            for band, bucket in self.band_buckets(signature):
+                rows = self.connection.execute(
+                    "SELECT a.id, a.url, a.title, a.signature, a.seen_at FROM bands b JOIN articles a ON a.id = b.article_id "
+                    "WHERE b.band = ? AND b.bucket = ? AND a.seen_at >= ?",
+                    (band, bucket, since)
+                ).fetchall()
+                for article_id, url, title, stored, seen_at in rows:
+                    if article_id in checked:
+                        continue
+                    checked.add(article_id)
+                    score = similarity(signature, unpack_signature(stored))
+                    if score >= self.threshold and (best is None or score > best["similarity"]):
+                        best = {"id": article_id, "url": url, "title": title, "seen_at": seen_at, "similarity": round(score, 3)}
+        return best
+    
+    def add(self, signature, url=None, title=None, seen_at=None):
+        """Store an article's signature
+        
+        Returns:
+            int: ID of the stored article
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "INSERT INTO articles (url, title, signature, seen_at) VALUES (?, ?, ?, ?)",
+                (url, title, pack_signature(signature), seen_at or time.time())
+            )
+            self.connection.executemany(
+                "INSERT INTO bands (band, bucket, article_id) VALUES (?, ?, ?)",
+                [(band, bucket, cursor.lastrowid) for band, bucket in self.band_buckets(signature)]
+            )
+            self.connection.commit()
+            return cursor.lastrowid
+    
+    def expire(self, before):
+        """Delete articles stored before a timestamp
+        
+        Returns:
+            int: Number of articles deleted
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM bands WHERE article_id IN (SELECT id FROM articles WHERE seen_at < ?)", (before,))
+            deleted = self.connection.execute("DELETE FROM articles WHERE seen_at < ?", (before,)).rowcount
+            self.connection.commit()
+            return deleted
+    
+    def close(self):
+        with self.lock:
+            self.connection.close()
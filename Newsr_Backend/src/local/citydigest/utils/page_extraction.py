@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import logging
+
+logger = logging.getLogger("page_extraction")
+
+# Evaluates every field's selector chain inside the page and returns all of
+# them in one object, so an article costs one WebDriver round trip instead of
+# a find_elements call plus a .text/get_attribute call per element.
+EXTRACT_FIELDS_SCRIPT = """
+var textFields = arguments[0], imageSelectors = arguments[1];
+var result = {fields: {}, matched: {}, image_urls: []};
+
+function selectAll(selector) {
+    try {
+        return Array.prototype.slice.call(document.querySelectorAll(selector));
+    } catch (e) {
+        return [];
+    }
+}
+
+for (var field in textFields) {
+    result.fields[field] = "";
+    result.matched[field] = null;
+    var chain = textFields[field];
+    for (var i = 0; i < chain.length; i++) {
+        var texts = selectAll(chain[i]).map(function (el) {
+            return (el.innerText || "").trim();
+        }).filter(function (text) { return text; });
+        if (texts.length) {
+            result.fields[field] = texts.join(" ");
+            result.matched[field] = chain[i];
+            break;
+        }
+    }
+}
+
+result.matched.image_urls = null;
+for (var j = 0; j < imageSelectors.length; j++) {
+    var urls = selectAll(imageSelectors[j]).map(function (el) {
+        return el.currentSrc || el.src || el.getAttribute("data-src") || "";
+    }).filter(function (src) {
+        return src.indexOf("http") === 0 && !/\\.svg$/.test(src);
+    });
+    if (urls.length) {
+        result.image_urls = urls;
+        result.matched.image_urls = imageSelectors[j];
+        break;
+    }
+}
+
+return result;
+"""
+
+def extract_fields(driver, text_selectors, image_selectors):
+    """Extract all article fields from the loaded page in a single script call
+    
+    Args:
+        driver: Selenium webdriver with the article loaded
+        text_selectors: Dict of field name to its selector chain, most specific first
+        image_selectors: Selector chain for article images
+    
+    Returns:
+        dict: {"fields": {field: text}, "matched": {field: selector or None}, "image_urls": [...]},
+              or None if the script could not run
+    """
+    try:
+        return driver.execute_script(EXTRACT_FIELDS_SCRIPT, text_selectors, image_selectors)
+    except Exception as e:
+        logger.warning(f"In-page field extraction failed: {str(e)}")
+        return None
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import logging
+import time
+
+from ..config.scraping import get_scraping_config
+
+logger = logging.getLogger("page_readiness")
+
+# Resolves as soon as every selector group has one matching selector, or once
+# the DOM and the network have both been quiet for quiet_ms after the document
+# finished loading.
+# DOM changes are watched with a MutationObserver and network activity with a
+# PerformanceObserver on resource timing entries.
+WAIT_FOR_READY_SCRIPT = """
+var groups = arguments[0], quietMs = arguments[1], timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var start = Date.now(), lastActivity = Date.now(), finished = false;
+var mutationObserver = null, resourceObserver = null, timer = null;
+
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    if (mutationObserver) mutationObserver.disconnect();
+    if (resourceObserver) resourceObserver.disconnect();
+    if (timer) clearInterval(timer);
+    done(result);
+}
+
+function matchGroup(selectors) {
+    for (var i = 0; i < selectors.length; i++) {
+        try {
+            if (document.querySelector(selectors[i])) return selectors[i];
+        } catch (e) {}
+    }
+    return null;
+}
+
+function matchSelector() {
+    if (!groups.length) return null;
+    var matched = [];
+    for (var i = 0; i < groups.length; i++) {
+        var selector = matchGroup(groups[i]);
+        if (!selector) return null;
+        matched.push(selector);
+    }
+    return matched.join(", ");
+}
+
+function check() {
+    var matched = matchSelector();
+    if (matched) return finish({state: "selector", selector: matched});
+    var now = Date.now();
+    if (document.readyState === "complete" && now - lastActivity >= quietMs) return finish({state: "idle"});
+    if (now - start >= timeoutMs) return finish({state: "timeout"});
+}
+
+mutationObserver = new MutationObserver(function () {
+    lastActivity = Date.now();
+    if (matchSelector()) check();
+});
+mutationObserver.observe(document.documentElement, {childList: true, subtree: true});
+
+if (window.PerformanceObserver) {
+    try {
+        resourceObserver = new PerformanceObserver(function () { lastActivity = Date.now(); });
+        resourceObserver.observe({entryTypes: ["resource"]});
+    } catch (e) {}
+}
+
+timer = setInterval(check, 50);
+check();
+"""
+
+# Scrolls one viewport at a time and stops as soon as a scroll loads no new
+# anchors within settle_ms, instead of always scrolling a fixed number of times.
+SCROLL_UNTIL_STABLE_SCRIPT = """
+var maxScrolls = arguments[0], settleMs = arguments[1];
+var done = arguments[arguments.length - 1];
+var scrolls = 0;
+
+function anchorCount() {
+    return document.getElementsByTagName("a").length;
+}
+
+function step() {
+    if (scrolls >= maxScrolls) return done({scrolls: scrolls, anchors: anchorCount(), stable: false});
+    var before = anchorCount();
+    var atBottom = window.innerHeight + window.scrollY >= document.body.scrollHeight - 2;
+    scrolls++;
+    window.scrollBy(0, window.innerHeight);
+    
+    var settled = false, observer = null, timeout = null;
+    function settle(grew) {
+        if (settled) return;
+        settled = true;
+        if (observer) observer.disconnect();
+        clearTimeout(timeout);
+        if (grew) {
+            // Give the rest of the batch a moment to render before the next scroll
+            setTimeout(step, 150);
+        } else {
+            done({scrolls: scrolls, anchors: anchorCount(), stable: true});
+        }
+    }
+    
+    observer = new MutationObserver(function () {
+        if (anchorCount() > before) settle(true);
+    });
+    observer.observe(document.body, {childList: true, subtree: true});
+    timeout = setTimeout(function () { settle(anchorCount() > before); }, atBottom ? settleMs / 2 : settleMs);
+}
+
+step();
+"""
+
+def wait_for_page_ready(driver, selectors=None, timeout=None, quiet_ms=None, groups=None):
+    """Wait until one of the selectors is present or the page goes idle
+    
+    Args:
+        driver: Selenium webdriver with a page loaded
+        selectors: CSS selectors that mean the page is ready, in order of preference
+        groups: Several such selector lists that must each have a match, instead of selectors
+        timeout: Maximum time to wait in seconds
+        quiet_ms: How long the DOM and network must be quiet to count as idle
+    
+    Returns:
+        dict: {"state": "selector" | "idle" | "timeout" | "error", "selector": ..., "seconds": ...}
+    """
+    config = get_scraping_config("page_readiness")
+    timeout = timeout if timeout is not None else config.get("ready_timeout", 10)
+    quiet_ms = quiet_ms if quiet_ms is not None else config.get("quiet_ms", 500)
+    
+    if groups is None:
+        groups = [selectors] if selectors else []
+    groups = [[selector for selector in group if selector] for group in groups]
+    
+    start = time.time()
+    try:
+        driver.set_script_timeout(timeout + 5)
+        result = driver.execute_async_script(WAIT_FOR_READY_SCRIPT, groups, quiet_ms, int(timeout * 1000))
+    except Exception as e:
+        logger.debug(f"Readiness check failed: {str(e)}")
+        result = {"state": "error"}
+    
+    result = dict(result or {"state": "error"})
+    result["seconds"] = round(time.time() - start, 2)
+    return result
+
+def scroll_until_stable(driver, max_scrolls=None, settle_ms=None):
+    """Scroll down the page until a scroll loads no new links
+    
+    Args:
+        driver: Selenium webdriver with a page loaded
+        max_scrolls: Upper bound on the number of scrolls
+        settle_ms: How long to wait for new links after each scroll
+    
+    Returns:
+        dict: {"scrolls": ..., "anchors": ..., "stable": ..., "seconds": ...}
+    """
+    config = get_scraping_config("page_readiness")
+    max_scrolls = max_scrolls if max_scrolls is not None else config.get("max_scrolls", 4)
+    settle_ms = settle_ms if settle_ms is not None else config.get("scroll_settle_ms", 1000)
+    
+    start = time.time()
+    try:
+        driver.set_script_timeout(max_scrolls * (settle_ms / 1000 + 1) + 5)
+        result = driver.execute_async_script(SCROLL_UNTIL_STABLE_SCRIPT, max_scrolls, settle_ms)
+    except Exception as e:
+        logger.debug(f"Scrolling failed: {str(e)}")
+        result = {"scrolls": 0, "anchors": 0, "stable": False}
+    
+    result = dict(result or {})
+    result["seconds"] = round(time.time() - start, 2)
+    return result
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from ..config.scraping import get_scraping_config
+
+logger = logging.getLogger("rate_limiter")
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking under its lock"""
+    
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self):
+        """Take a token and return how many seconds the caller has to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+class DomainRateLimiter:
+    """Per-host politeness scheduler shared by every fetch path
+    
+    Each host gets its own token bucket, so requests to different hosts run
+    back-to-back and only requests to the same host are spaced out. Rates come
+    from explicit per-host configuration, then the host's robots.txt
+    Crawl-delay, then the default rate.
+    """
+    
+    def __init__(self, default_rate=None, default_burst=None, hosts=None, respect_crawl_delay=None, max_crawl_delay=None, user_agent=None):
+        """Initialize the rate limiter
+        
+        Args:
+            default_rate: Requests per second allowed per host
+            default_burst: Requests a host may receive back-to-back before spacing kicks in
+            hosts: Per-host overrides as {host: {"rate": ..., "burst": ...}}
+            respect_crawl_delay: Whether to read Crawl-delay from robots.txt
+            max_crawl_delay: Upper bound in seconds for a robots.txt Crawl-delay
+            user_agent: User agent used to fetch and evaluate robots.txt
+        """
+        config = get_scraping_config("rate_limits")
+        self.default_rate = default_rate or config.get("default_rate", 1.0)
+        self.default_burst = default_burst or config.get("default_burst", 3)
+        self.hosts = hosts if hosts is not None else config.get("hosts", {})
+        self.respect_crawl_delay = respect_crawl_delay if respect_crawl_delay is not None else config.get("respect_crawl_delay", True)
+        self.max_crawl_delay = max_crawl_delay or config.get("max_crawl_delay", 30)
+        self.user_agent = user_agent or get_scraping_config("http").get("user_agent", "*")
+        
+        self.buckets = {}
+        self.lock = threading.Lock()
+        
+        # Turned off for offline replay runs, where there is no site to be polite to
+        self.enabled = True
+    
+    def normalize_host(self, url):
+        """Get the host a URL counts against"""
+        host = urlparse(url).netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return host
+    
+    def acquire(self, url):
+        """Block until a request to the URL's host is allowed
+        
+        Returns:
+            float: Seconds spent waiting
+        """
+        host = self.normalize_host(url)
+        if not host or not self.enabled:
+            return 0.0
+        
+        wait = self.get_bucket(host, url).reserve()
+        if wait > 0:
+            logger.debug(f"Waiting {wait:.2f}s before requesting {host}")
+            time.sleep(wait)
+        return wait
+    
+    def get_bucket(self, host, url):
+        """Get or create the token bucket for a host"""
+        with self.lock:
+            bucket = self.buckets.get(host)
+        if bucket:
+            return bucket
+        
+        rate, burst = self.get_host_limits(host, url)
+        with self.lock:
+            # Another thread may have created it while robots.txt was being read
+            bucket = self.buckets.setdefault(host, TokenBucket(rate, burst))
+        return bucket
+    
+    def get_host_limits(self, host, url):
+        """Work out the rate and burst for a host"""
+        override = self.hosts.get(host)
+        if override:
+            return override.get("rate", self.default_rate), override.get("burst", self.default_burst)
+        
+        if self.respect_crawl_delay:
+            crawl_delay = self.get_crawl_delay(url)
+            if crawl_delay:
+                crawl_delay = min(crawl_delay, self.max_crawl_delay)
+                logger.info(f"Using robots.txt crawl-delay of {crawl_delay}s for {host}")
+                return 1.0 / crawl_delay, 1
+        
+        return self.default_rate, self.default_burst
+    
+    def get_crawl_delay(self, url):
+        """Read the Crawl-delay for our user agent from a site's robots.txt"""
+        parsed = urlparse(url)
+        robots_url = f"{parsed.scheme or 'https'}://{parsed.netloc}/robots.txt"
+        try:
+            response = requests.get(robots_url, headers={"User-Agent": self.user_agent}, timeout=5)
+            if response.status_code != 200:
+                return None
+            
+            parser = RobotFileParser()
+            parser.parse(response.text.splitlines())
+            delay = parser.crawl_delay(self.user_agent) or parser.crawl_delay("*")
+            return float(delay) if delay else None
+        except Exception as e:
+            logger.debug(f"Could not read robots.txt from {robots_url}: {str(e)}")
+            return None
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Get the process-wide rate limiter"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = DomainRateLimiter()
+        return _rate_limiter
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+import gzip
+import logging
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+logger = logging.getLogger("replay_proxy")
+
+# Headers that describe a single connection or the wire encoding rather than the resource
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "proxy-connection",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade", "content-encoding", "content-length"
+}
+
+class WarcWriter:
+    """Appends request/response records to a gzipped WARC-style archive
+    
+    Each record is its own gzip member, as in .warc.gz files, so an
+    interrupted recording still leaves every finished exchange readable.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    
+    def write_record(self, record_type, url, content_type, block, concurrent_to=None):
+        """Write one WARC record and return its record ID"""
+        record_id = f"<urn:uuid:{uuid.uuid4()}>"
+        headers = [
+            "WARC/1.0",
+            f"WARC-Type: {record_type}",
+            f"WARC-Record-ID: {record_id}",
+            f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+            f"WARC-Target-URI: {url}",
+        ]
+        if concurrent_to:
+            headers.append(f"WARC-Concurrent-To: {concurrent_to}")
+        headers.append(f"Content-Type: {content_type}")
+        headers.append(f"Content-Length: {len(block)}")
+        
+        record = ("\r\n".join(headers) + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+        with self.lock:
+            with open(self.path, "ab") as f:
+                f.write(gzip.compress(record))
+        return record_id
+    
+    def write_exchange(self, method, url, request_headers, status, reason, response_headers, body):
+        """Record a request and the response it got"""
+        target = urlsplit(url)
+        path = target.path or "/"
+        if target.query:
+            path = f"{path}?{target.query}"
+        
+        request_block = f"{method} {path} HTTP/1.1\r\n".encode("utf-8")
+        request_block += "".join(f"{name}: {value}\r\n" for name, value in request_headers).encode("utf-8") + b"\r\n"
+        request_id = self.write_record("request", url, "application/http;msgtype=request", request_block)
+        
+        response_block = f"HTTP/1.1 {status} {reason}\r\n".encode("utf-8")
+        response_block += "".join(f"{name}: {value}\r\n" for name, value in response_headers).encode("utf-8") + b"\r\n"
+        response_block += body
+        self.write_record("response", url, "application/http;msgtype=response", response_block, concurrent_to=request_id)
+
+def read_warc(path):
+    """Iterate over (WARC headers, block) pairs in a WARC-style archive"""
+    with gzip.open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            
+            headers = {}
+            while True:
+                header_line = f.readline()
+                if not header_line or not header_line.strip():
+                    break
+                name, _, value = header_line.decode("utf-8").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            
+            block = f.read(int(headers.get("content-length", 0)))
+            yield headers, block
+
+def parse_http_response(block):
+    """Split a recorded HTTP response into status, reason, headers and body"""
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    _, status, reason = (lines[0].split(" ", 2) + [""])[:3]
+    headers = []
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers.append((name.strip(), value.strip()))
+    return int(status), reason, headers, body
+
+class WarcArchive:
+    """Recorded responses of an archive, looked up by URL"""
+    
+    def __init__(self, path):
+        self.responses = {}
+        for headers, block in read_warc(path):
+            if headers.get("warc-type") == "response":
+                # Later records win, matching what the last fetch of a URL saw
+                self.responses[headers.get("warc-target-uri")] = block
+        logger.info(f"Loaded {len(self.responses)} recorded responses from {path}")
+    
+    def lookup(self, url):
+        """Get the recorded (status, reason, headers, body) for a URL, or None"""
+        block = self.responses.get(url)
+        if block is None:
+            block = self.responses.get(url.split("#", 1)[0])
+        if block is None:
+            return None
+        return parse_http_response(block)
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    """Forward proxy that records to or replays from an archive
+    
+    HTTPS requests arrive as CONNECT tunnels and are terminated with a local
+    self-signed certificate, so clients must skip certificate verification
+    (Chrome with --ignore-certificate-errors, requests with verify=False).
+    """
+    
+    protocol_version = "HTTP/1.1"
+    
+    def __init__(self, request, client_address, server, tunnel_host=None):
+        self.tunnel_host = tunnel_host
+        super().__init__(request, client_address, server)
+    
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+    
+    def target_url(self):
+        """Get the absolute URL a proxied request is for"""
+        if self.tunnel_host:
+            host = self.tunnel_host[:-4] if self.tunnel_host.endswith(":443") else self.tunnel_host
+            return f"https://{host}{self.path}"
+        return self.path
+    
+    def do_CONNECT(self):
+        if not self.server.ssl_context:
+            self.send_error(502, "HTTPS replay is not available")
+            return
+        
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        self.wfile.flush()
+        
+        try:
+            tls_connection = self.server.ssl_context.wrap_socket(self.connection, server_side=True)
+        except (ssl.SSLError, OSError) as e:
+            logger.debug(f"TLS handshake failed for {self.path}: {str(e)}")
+            self.close_connection = True
+            return
+        
+        # Serve the requests sent through the tunnel, then close it
+        ProxyRequestHandler(tls_connection, self.client_address, self.server, tunnel_host=self.path)
+        self.close_connection = True
+    
+    def do_GET(self):
+        self.proxy_request()
+    
+    def do_HEAD(self):
+        self.proxy_request()
+    
+    def do_POST(self):
+        self.proxy_request()
+    
+    def proxy_request(self):
+        url = self.target_url()
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        body = self.rfile.read(length) if length else None
+        
+        if self.server.mode == "record":
+            result = self.server.forward(self.command, url, self.headers, body)
+        else:
+            result = self.server.replay(self.command, url)
+        
+        status, reason, headers, content = result
+        self.send_response(status, reason)
+        for name, value in headers:
+            if name.lower() not in HOP_BY_HOP_HEADERS:
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(content)
+
+class ReplayProxy(ThreadingHTTPServer):
+    """Local proxy the HTTP fetcher and Chrome share for record/replay runs
+    
+    In record mode every exchange is forwarded to the live site and appended
+    to a WARC-style archive. In replay mode responses are served from the
+    archive only, and requests that weren't recorded get a 404, so a run is
+    fully offline and repeatable.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, mode, archive_path, host="127.0.0.1", port=0):
+        """Initialize the proxy
+        
+        Args:
+            mode: 'record' or 'replay'
+            archive_path: .warc.gz archive to write or read
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown proxy mode: {mode}")
+        
+        super().__init__((host, port), ProxyRequestHandler)
+        self.mode = mode
+        self.archive_path = archive_path
+        self.ssl_context = self.create_ssl_context()
+        self.writer = WarcWriter(archive_path) if mode == "record" else None
+        self.archive = WarcArchive(archive_path) if mode == "replay" else None
+        self.upstream = requests.Session() if mode == "record" else None
+        self.thread = None
+        self.stats_lock = threading.Lock()
+        self.stats = {"exchanges": 0, "misses": 0, "errors": 0, "bytes": 0}
+    
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def create_ssl_context(self):
+        """Create a TLS context with a throwaway self-signed certificate for CONNECT tunnels"""
+        cert_dir = tempfile.mkdtemp(prefix="citydigest-proxy-")
+        cert_path = os.path.join(cert_dir, "proxy.crt")
+        key_path = os.path.join(cert_dir, "proxy.key")
+        
+        try:
+            subprocess.run(
+                ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2",
+                 "-subj", "/CN=citydigest-replay", "-keyout", key_path, "-out", cert_path],
+                check=True, capture_output=True
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.error(f"Could not create a certificate with openssl, HTTPS will not be proxied: {str(e)}")
+            return None
+        
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_path, key_path)
+        return context
+    
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+    
+    def forward(self, method, url, request_headers, body):
+        """Send a request to the live site and record the exchange"""
+        headers = [(name, value) for name, value in request_headers.items() if name.lower() not in HOP_BY_HOP_HEADERS]
+        try:
+            response = self.upstream.request(method, url, headers=dict(headers), data=body, allow_redirects=False, timeout=30)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Upstream request failed for {url}: {str(e)}")
+            self.count("errors")
+            return 502, "Bad Gateway", [], b""
+        
+        # requests has already decoded the body, so drop the encoding headers with it
+        response_headers = [(name, value) for name, value in response.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS]
+        self.writer.write_exchange(method, url, headers, response.status_code, response.reason or "", response_headers, response.content)
+        self.count("exchanges")
+        self.count("bytes", len(response.content))
+        return response.status_code, response.reason or "", response_headers, response.content
+    
+    def replay(self, method, url):
+        """Serve a recorded response, or a 404 if the URL wasn't recorded"""
+        recorded = self.archive.lookup(url)
+        if recorded is None:
+            logger.debug(f"No recording for {method} {url}")
+            self.count("misses")
+            return 404, "Not Recorded", [("Content-Type", "text/plain")], b""
+        
+        self.count("exchanges")
+        self.count("bytes", len(recorded[3]))
+        return recorded
+    
+    def start(self):
+        """Serve in a background thread and make this the proxy new clients use"""
+        global _active_proxy
+        self.thread = threading.Thread(target=self.serve_forever, name="replay-proxy", daemon=True)
+        self.thread.start()
+        _active_proxy = self
+        logger.info(f"{self.mode.capitalize()} proxy listening on {self.url} ({self.archive_path})")
+        return self
+    
+    def stop(self):
+        """Stop serving and stop routing new clients through the proxy"""
+        global _active_proxy
+        if _active_proxy is self:
+            _active_proxy = None
+        self.shutdown()
+        self.server_close()
+        if self.upstream:
+            self.upstream.close()
+
+_active_proxy = None
+
+def get_active_proxy():
+    """Get the URL of the running record/replay proxy, or None outside a harness run"""
+    return _active_proxy.url if _active_proxy else None
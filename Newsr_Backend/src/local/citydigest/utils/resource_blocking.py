@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import logging
+
+from ..config.scraping import get_scraping_config
+
+logger = logging.getLogger("resource_blocking")
+
+# Bytes transferred, time to first byte and load time of the current page,
+# from the Navigation and Resource Timing APIs. Cross-origin resources without Timing-Allow-Origin
+# report a transfer size of 0, so this is a lower bound.
+PAGE_METRICS_SCRIPT = """
+var navigation = performance.getEntriesByType("navigation")[0];
+var resources = performance.getEntriesByType("resource");
+var bytes = navigation ? (navigation.transferSize || navigation.encodedBodySize || 0) : 0;
+for (var i = 0; i < resources.length; i++) {
+    bytes += resources[i].transferSize || resources[i].encodedBodySize || 0;
+}
+var loadMs = 0, ttfbMs = 0;
+if (navigation) {
+    loadMs = navigation.loadEventEnd > 0 ? navigation.loadEventEnd : navigation.domContentLoadedEventEnd;
+    ttfbMs = navigation.responseStart;
+}
+return {bytes: bytes, requests: resources.length + 1, load_ms: Math.round(loadMs), ttfb_ms: Math.round(ttfbMs)};
+"""
+
+def with_query_variants(patterns):
+    """Add a query-string variant of every file-extension pattern
+    
+    Network.setBlockedURLs matches the whole URL, so "*.jpg" misses
+    "photo.jpg?w=800", which is how most news CDNs serve resized assets.
+    """
+    expanded = []
+    for pattern in patterns:
+        expanded.append(pattern)
+        if pattern.startswith("*.") and "*" not in pattern[1:]:
+            expanded.append(pattern + "?*")
+    return expanded
+
+def get_block_patterns(source_config=None):
+    """Get the URL patterns to block for a source
+    
+    Args:
+        source_config: Source configuration, which may set "block_profile"
+    
+    Returns:
+        tuple: (profile name, list of URL patterns)
+    """
+    config = get_scraping_config("resource_blocking")
+    if not config.get("enabled", False):
+        return "none", []
+    
+    profile = (source_config or {}).get("block_profile", config.get("default_profile", "none"))
+    profiles = config.get("profiles", {})
+    if profile not in profiles:
+        logger.warning(f"Unknown block profile {profile}, not blocking any resources")
+        return "none", []
+    
+    return profile, with_query_variants(profiles[profile])
+
+def apply_block_patterns(driver, patterns):
+    """Block requests matching the patterns in a Chrome session via DevTools
+    
+    Returns:
+        bool: True if the patterns were applied
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        return True
+    except Exception as e:
+        logger.warning(f"Could not set blocked URLs: {str(e)}")
+        return False
+
+def measure_page_load(driver):
+    """Get bytes transferred, request count, time to first byte and load time of the current page
+    
+    Returns:
+        dict: {"bytes": ..., "requests": ..., "load_ms": ..., "ttfb_ms": ...}, or None if unavailable
+    """
+    try:
+        return driver.execute_script(PAGE_METRICS_SCRIPT)
+    except Exception as e:
+        logger.debug(f"Could not read page metrics: {str(e)}")
+        return None
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger("seen_filter")
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings
+    
+    Sized for `capacity` keys at a false-positive rate of `error_rate`; it
+    keeps working past capacity, with a rising false-positive rate.
+    """
+    
+    def __init__(self, capacity, error_rate, bits=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def positions(self, key):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+    
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+    
+    def estimated_error_rate(self):
+        """Current false-positive probability, from the share of bits set"""
+        set_bits = sum(bin(byte).count("1") for byte in self.bits)
+        return (set_bits / self.size) ** self.hash_count
+
+class SeenFilter:
+    """Time-partitioned Bloom filter of the keys seen within a sliding window
+    
+    The window is split into `partitions` consecutive time slices, each with
+    its own Bloom filter. A key is added to the slice of the time it was seen
+    and looked up in every live slice; slices that fall out of the window are
+    dropped whole, which is how entries expire without deletes. A miss means
+    the key was definitely not seen in the window, so only possible hits need
+    to be confirmed against authoritative storage.
+    
+    Confirmations are counted with confirm(), so the false-positive rate
+    actually observed can be reported next to the estimated one.
+    """
+    
+    def __init__(self, path, window_seconds=172800, partitions=4, capacity=10000, error_rate=0.01):
+        """Initialize the filter, restoring it from its checkpoint when one exists
+        
+        Args:
+            path: Checkpoint file
+            window_seconds: How long a key counts as seen
+            partitions: Time slices the window is split into
+            capacity: Keys per time slice the filters are sized for
+            error_rate: Target false-positive rate per slice
+        """
+        self.path = path
+        self.window_seconds = window_seconds
+        self.partition_seconds = max(1, window_seconds // partitions)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.filters = {}
+        self.saved_at = None
+        self.checks = 0
+        self.possible_hits = 0
+        self.false_positives = 0
+        self.load()
+    
+    def load(self):
+        """Restore the filters from the checkpoint, unless its sizing no longer matches the config"""
+        if not os.path.exists(self.path):
+            return
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            if [checkpoint["partition_seconds"], checkpoint["capacity"], checkpoint["error_rate"]] != [self.partition_seconds, self.capacity, self.error_rate]:
+                logger.info("Seen-URL filter settings changed, rebuilding instead of restoring checkpoint")
+                return
+            
+            for slot, entry in checkpoint["filters"].items():
+                bloom = BloomFilter(self.capacity, self.error_rate, bits=bytearray(base64.b64decode(entry["bits"])))
+                bloom.count = entry["count"]
+                self.filters[int(slot)] = bloom
+            self.saved_at = checkpoint["saved_at"]
+        except:
+            self.filters = {}
+            self.saved_at = None
+    
+    def save(self):
+        """Checkpoint the live filters to disk"""
+        with self.lock:
+            self.expire()
+            checkpoint = {
+                "saved_at": time.time(),
+                "partition_seconds": self.partition_seconds,
+                "capacity": self.capacity,
+                "error_rate": self.error_rate,
+                "filters": {
+                    str(slot): {"count": bloom.count, "bits": base64.b64encode(bytes(bloom.bits)).decode('ascii')}
+                    for slot, bloom in self.filters.items()
+                }
+            }
+        
+        try:
+            # Written to a temporary file first so a crash never leaves half a checkpoint
+            with open(self.path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f)
+            os.replace(self.path + ".tmp", self.path)
+            self.saved_at = checkpoint["saved_at"]
+        except Exception as e:
+            logger.warning(f"Could not save seen-URL filter: {str(e)}")
+    
+    def expire(self):
+        oldest_slot = int((time.time() - self.window_seconds) // self.partition_seconds)
+        for slot in [slot for slot in self.filters if slot < oldest_slot]:
+            del self.filters[slot]
+    
+    def add(self, key, seen_at=None):
+        """Record a key as seen at seen_at (now by default)"""
+        seen_at = seen_at or time.time()
+        if seen_at < time.time() - self.window_seconds:
+            return
+        
+        slot = int(seen_at // self.partition_seconds)
+        with self.lock:
+            bloom = self.filters.get(slot)
+            if bloom is None:
+                bloom = self.filters[slot] = BloomFilter(self.capacity, self.error_rate)
+                self.expire()
+            bloom.add(key)
+    
+    def clear(self):
+        """Drop every key, e.g. before rebuilding from storage"""
+        with self.lock:
+            self.filters = {}
+    
+    def add_many(self, rows):
+        """Record (key, seen_at) pairs, e.g. when rebuilding from storage"""
+        added = 0
+        for key, seen_at in rows:
+            self.add(key, seen_at)
+            added += 1
+        return added
+    
+    def might_contain(self, key):
+        """Check whether a key may have been seen in the window; False is certain"""
+        with self.lock:
+            self.checks += 1
+            hit = any(key in bloom for bloom in self.filters.values())
+            if hit:
+                self.possible_hits += 1
+            return hit
+    
+    def confirm(self, seen):
+        """Record what authoritative storage said about the last possible hit"""
+        if not seen:
+            with self.lock:
+                self.false_positives += 1
+    
+    def stats(self):
+        """Get lookup counts with the observed and estimated false-positive rates"""
+        with self.lock:
+            self.expire()
+            keys = sum(bloom.count for bloom in self.filters.values())
+            # A key is a false positive if any live slice matches it
+            miss_all = 1.0
+            for bloom in self.filters.values():
+                miss_all *= 1 - bloom.estimated_error_rate()
+            negatives = self.checks - (self.possible_hits - self.false_positives)
+            return {
+                "keys": keys,
+                "partitions": len(self.filters),
+                "checks": self.checks,
+                "possible_hits": self.possible_hits,
+                "false_positives": self.false_positives,
+                "observed_fp_rate": round(self.false_positives / negatives, 5) if negatives else None,
+                "estimated_fp_rate": round(1 - miss_all, 5)
+            }
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+logger = logging.getLogger("selector_cache")
+
+class SelectorCache:
+    """Learned record of which selector in a fallback chain finds each field
+    
+    For every source, page template and field it remembers which selectors
+    produced content and on which run they last did. Later runs try the proven
+    selector first and drop tiers that haven't matched in `drop_after_runs`
+    runs, so a page doesn't wait on selectors that never match. Every
+    `reprobe_every` runs the full chain is tried again in case a site changed.
+    """
+    
+    def __init__(self, path, drop_after_runs=5, reprobe_every=10):
+        """Initialize the selector cache
+        
+        Args:
+            path: JSON file the cache is persisted to
+            drop_after_runs: Runs without a match before a selector is skipped
+            reprobe_every: Try every selector again once every this many runs
+        """
+        self.path = path
+        self.drop_after_runs = drop_after_runs
+        self.reprobe_every = reprobe_every
+        self.entries = self.load()
+        self.session = {}
+        self.lock = threading.Lock()
+    
+    def load(self):
+        """Load learned selectors from disk"""
+        if not os.path.exists(self.path):
+            return {}
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+    
+    def save(self):
+        """Write learned selectors to disk"""
+        with self.lock:
+            entries = json.loads(json.dumps(self.entries))
+        
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+    
+    def page_template(self, url):
+        """Group pages by URL shape, e.g. /news/2025/04/some-story -> news/{n}/{n}/*"""
+        segments = [segment for segment in urlparse(url).path.split("/") if segment]
+        if not segments:
+            return "root"
+        
+        shape = []
+        for segment in segments[:-1]:
+            shape.append("{n}" if re.fullmatch(r"\d+", segment) else segment)
+        shape.append("*")
+        return "/".join(shape[:4])
+    
+    def begin_run(self, source_id):
+        """Count a new run for a source, which ages selectors that don't match"""
+        with self.lock:
+            source = self.entries.setdefault(source_id, {"runs": 0, "templates": {}})
+            source["runs"] += 1
+    
+    def is_reprobe_run(self, source_id):
+        """Check whether this run should try every selector again"""
+        with self.lock:
+            runs = self.entries.get(source_id, {}).get("runs", 0)
+        return self.reprobe_every > 0 and runs % self.reprobe_every == 0
+    
+    def order(self, source_id, template, field, chain):
+        """Order a fallback chain with the proven selector first and stale ones dropped
+        
+        Args:
+            source_id: Source the page belongs to
+            template: Page template from page_template(), or 'listing'
+            field: Field being extracted
+            chain: Configured selectors, most specific first
+        
+        Returns:
+            list: Selectors to try, in order
+        """
+        with self.lock:
+            source = self.entries.get(source_id, {})
+            runs = source.get("runs", 0)
+            field_stats = source.get("templates", {}).get(template, {}).get(field, {})
+            since_run = field_stats.get("since_run", runs)
+            stats = {selector: dict(entry) for selector, entry in field_stats.get("selectors", {}).items()}
+        
+        if not stats:
+            return list(chain)
+        
+        # Proven selectors first, most hits first; unproven ones keep their configured order
+        ranked = sorted(
+            chain,
+            key=lambda selector: (-stats.get(selector, {}).get("hits", 0), chain.index(selector))
+        )
+        
+        if self.is_reprobe_run(source_id):
+            return ranked
+        
+        # Skip tiers that haven't matched in a while, as long as something still matches
+        recent = [
+            selector for selector in ranked
+            if runs - max(stats.get(selector, {}).get("last_hit_run", 0), since_run) < self.drop_after_runs
+        ]
+        return recent or ranked
+    
+    def record(self, source_id, template, field, selector):
+        """Record which selector produced a field, or None if none of them did"""
+        with self.lock:
+            source = self.entries.setdefault(source_id, {"runs": 0, "templates": {}})
+            fields = source["templates"].setdefault(template, {})
+            stats = fields.setdefault(field, {"since_run": source["runs"], "selectors": {}})
+            
+            if selector:
+                entry = stats["selectors"].setdefault(selector, {"hits": 0, "last_hit_run": 0})
+                entry["hits"] += 1
+                entry["last_hit_run"] = source["runs"]
+                entry["last_hit_at"] = datetime.now().isoformat()
+            
+            counts = self.session.setdefault(source_id, {}).setdefault(field, {"attempts": 0, "hits": 0})
+            counts["attempts"] += 1
+            if selector:
+                counts["hits"] += 1
+    
+    def hit_rates(self):
+        """Get the share of pages each field was found on this run, per source
+        
+        Returns:
+            dict: {source_id: {field: {"attempts": ..., "hits": ..., "rate": ...}}}
+        """
+        with self.lock:
+            rates = {}
+            for source_id, fields in self.session.items():
+                rates[source_id] = {}
+                for field, counts in fields.items():
+                    rates[source_id][field] = {
+                        "attempts": counts["attempts"],
+                        "hits": counts["hits"],
+                        "rate": round(counts["hits"] / counts["attempts"], 2) if counts["attempts"] else 0.0
+                    }
+        return rates
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .url_canonical import canonical_url
+
+logger = logging.getLogger("state_store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scraped_urls (
+    url TEXT PRIMARY KEY,
+    scraped_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scraped_urls_age ON scraped_urls (scraped_at);
+CREATE TABLE IF NOT EXISTS content_hashes (
+    hash TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS content_hashes_age ON content_hashes (seen_at);
+CREATE TABLE IF NOT EXISTS failed_urls (
+    url TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocklist (
+    url TEXT PRIMARY KEY,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Tables whose writes are batched, with their key and timestamp columns
+BATCHED_TABLES = {
+    "scraped_urls": ("url", "scraped_at"),
+    "content_hashes": ("hash", "seen_at")
+}
+
+# Files the store replaces, in the scraper's output directory
+JSON_STATE_FILES = ("scraped_urls.json", "content_hashes.json", "failed_url_count.json", "blocklist.json")
+
+class StateStore:
+    """Per-city scrape history: scraped URLs, content hashes, failure counts and the blocklist
+    
+    Every lookup is a primary-key read instead of parsing a JSON file.
+    Scraped URLs and content hashes are buffered in memory and written in one
+    short transaction per `commit_every` writes or `commit_seconds`,
+    whichever comes first, so the write lock is never held between batches;
+    failure counts and the blocklist are committed at once. The database
+    runs in WAL mode, so another process reading or writing the same city's
+    state waits on SQLite's locks instead of overwriting a file under it.
+    Old entries are removed by expire(), an indexed delete. URLs are stored
+    under canonical_url(), so every variant of a link shares one row.
+    """
+    
+    def __init__(self, path, commit_every=50, commit_seconds=5):
+        """Initialize the store
+        
+        Args:
+            path: SQLite database file
+            commit_every: Writes batched into one transaction
+            commit_seconds: Longest time a write stays buffered
+        """
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_seconds = commit_seconds
+        self.pending = {table: {} for table in BATCHED_TABLES}
+        self.last_commit = time.time()
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+    
+    def buffer(self, table, key, seen_at):
+        """Buffer a batched write, committing the batch once it is large or old enough"""
+        self.pending[table][key] = seen_at
+        if sum(len(rows) for rows in self.pending.values()) >= self.commit_every or time.time() - self.last_commit >= self.commit_seconds:
+            self.commit()
+    
+    def commit(self):
+        for table, rows in self.pending.items():
+            if rows:
+                key_column, time_column = BATCHED_TABLES[table]
+                self.connection.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({key_column}, {time_column}) VALUES (?, ?)", rows.items()
+                )
+                rows.clear()
+        self.connection.commit()
+        self.last_commit = time.time()
+    
+    def flush(self):
+        """Commit any batched writes"""
+        with self.lock:
+            if any(self.pending.values()):
+                self.commit()
+    
+    def seen_within(self, table, key, window_seconds):
+        """Check whether a key was seen within the window, buffered writes included
+        
+        Called with the lock held.
+        """
+        key_column, time_column = BATCHED_TABLES[table]
+        seen_at = self.pending[table].get(key)
+        if seen_at is None:
+            row = self.connection.execute(
+                f"SELECT {time_column} FROM {table} WHERE {key_column} = ?", (key,)
+            ).fetchone()
+            seen_at = row[0] if row else None
+        return seen_at is not None and time.time() - seen_at < window_seconds
+    
+    def mark_if_new(self, table, key, window_seconds):
+        """Record a key as seen unless it was already seen within the window
+        
+        Returns:
+            bool: True if the key was seen within the window
+        """
+        with self.lock:
+            if self.seen_within(table, key, window_seconds):
+                return True
+            
+            self.buffer(table, key, time.time())
+            return False
+    
+    def check_scraped(self, url, window_seconds):
+        """Check whether a URL was scraped within the window, recording it as scraped now if not"""
+        return self.mark_if_new("scraped_urls", canonical_url(url), window_seconds)
+    
+    def was_scraped(self, url, window_seconds):
+        """Check whether a URL was scraped within the window without recording anything"""
+        with self.lock:
+            return self.seen_within("scraped_urls", canonical_url(url), window_seconds)
+    
+    def mark_scraped(self, url):
+        """Record a URL as scraped now without checking it first"""
+        with self.lock:
+            self.buffer("scraped_urls", canonical_url(url), time.time())
+    
+    def scraped_since(self, since):
+        """Get (canonical URL, scraped_at) for every URL scraped at or after a timestamp"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT url, scraped_at FROM scraped_urls WHERE scraped_at >= ?", (since,)
+            ).fetchall()
+            return rows + [(url, scraped_at) for url, scraped_at in self.pending["scraped_urls"].items() if scraped_at >= since]
+    
+    def check_content_hash(self, content_hash, window_seconds):
+        """Check whether content with this hash was seen within the window, recording it if not"""
+        return self.mark_if_new("content_hashes", content_hash, window_seconds)
+    
+    def record_failure(self, url):
+        """Count a failed scrape of a URL
+        
+        Returns:
+            int: Failures recorded for the URL so far
+        """
+        url = canonical_url(url)
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO failed_urls (url, failures, updated_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(url) DO UPDATE SET failures = failures + 1, updated_at = excluded.updated_at",
+                (url, time.time())
+            )
+            failures = self.connection.execute("SELECT failures FROM failed_urls WHERE url = ?", (url,)).fetchone()[0]
+            self.connection.commit()
+            return failures
+    
+    def block(self, url):
+        """Add a URL to the blocklist"""
+        with self.lock:
+            self.connection.execute("INSERT OR IGNORE INTO blocklist (url, added_at) VALUES (?, ?)", (canonical_url(url), time.time()))
+            # Blocking is rare and should reach other processes straight away
+            self.connection.commit()
+    
+    def is_blocked(self, url):
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM blocklist WHERE url = ?", (canonical_url(url),)).fetchone() is not None
+    
+    def expire(self, scraped_ttl_seconds, hash_ttl_seconds):
+        """Delete scraped URLs and content hashes older than their TTLs
+        
+        Returns:
+            int: Number of rows deleted
+        """
+        now = time.time()
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.execute("DELETE FROM scraped_urls WHERE scraped_at < ?", (now - scraped_ttl_seconds,))
+            self.connection.execute("DELETE FROM content_hashes WHERE seen_at < ?", (now - hash_ttl_seconds,))
+            self.connection.commit()
+            return self.connection.total_changes - before
+    
+    def import_json(self, directory):
+        """Load the JSON state files a scraper kept in its output directory before this store
+        
+        Each file is renamed with an .imported suffix once its rows are in the
+        store, so the import happens once and the originals stay around.
+        
+        Returns:
+            int: Number of rows imported
+        """
+        paths = {name: os.path.join(directory, name) for name in JSON_STATE_FILES}
+        if not any(os.path.exists(path) for path in paths.values()):
+            return 0
+        
+        def load(name, default):
+            try:
+                with open(paths[name], 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except:
+                return default
+        
+        now = time.time()
+        scraped = {canonical_url(url): scraped_at for url, scraped_at in load("scraped_urls.json", {}).get("urls", {}).items()}
+        hash_data = load("content_hashes.json", {})
+        hashes = list(zip(hash_data.get("hashes", []), hash_data.get("timestamps", [])))
+        failures = load("failed_url_count.json", {})
+        blocklist = load("blocklist.json", [])
+        
+        with self.lock:
+            before = self.connection.total_changes
+            # Rows already in the store are newer than the files, so they win
+            self.connection.executemany("INSERT OR IGNORE INTO scraped_urls (url, scraped_at) VALUES (?, ?)", scraped.items())
+            self.connection.executemany("INSERT OR IGNORE INTO content_hashes (hash, seen_at) VALUES (?, ?)", hashes)
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO failed_urls (url, failures, updated_at) VALUES (?, ?, ?)",
+                [(canonical_url(url), count, now) for url, count in failures.items()]
+            )
+            self.connection.executemany("INSERT OR IGNORE INTO blocklist (url, added_at) VALUES (?, ?)", [(canonical_url(url), now) for url in blocklist])
+            self.connection.commit()
+            imported = self.connection.total_changes - before
+        
+        for path in paths.values():
+            if os.path.exists(path):
+                os.replace(path, path + ".imported")
+        
+        logger.info(f"Imported {imported} rows of JSON scrape state from {directory}")
+        return imported
+    
+    def import_json_dirs(self, directories):
+        """Import the JSON state files anywhere under a scraper's old output directories, once per store
+        
+        The scheduler gave every run its own dated directory, so each one is
+        walked recursively, newest date first so the most recent copy of a
+        row is the one kept. The walk is recorded in the store and not
+        repeated on later runs.
+        
+        Returns:
+            int: Number of rows imported
+        """
+        with self.lock:
+            if self.connection.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                return 0
+        
+        imported = 0
+        for directory in directories:
+            for dirpath, dirnames, filenames in os.walk(directory):
+                dirnames.sort(reverse=True)
+                if any(name in filenames for name in JSON_STATE_FILES):
+                    imported += self.import_json(dirpath)
+        
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)", (str(time.time()),))
+            self.connection.commit()
+        return imported
+    
+    def stats(self):
+        """Count rows per table"""
+        with self.lock:
+            return {
+                table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("scraped_urls", "content_hashes", "failed_urls", "blocklist")
+            }
+    
+    def close(self):
+        with self.lock:
+            self.commit()
+            self.connection.close()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+import html as html_lib
+import json
+import logging
+import re
+from datetime import datetime
+
+logger = logging.getLogger("structured_data")
+
+JSON_LD_PATTERN = re.compile(r'<script[^>]*type\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.I | re.S)
+META_PATTERN = re.compile(r'<meta\s[^>]*>', re.I)
+ATTRIBUTE_PATTERN = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.S)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# schema.org types that describe a single article
+ARTICLE_TYPES = {
+    "Article", "NewsArticle", "ReportageNewsArticle", "AnalysisNewsArticle", "OpinionNewsArticle",
+    "BackgroundNewsArticle", "ReviewNewsArticle", "AskPublicNewsArticle", "BlogPosting", "LiveBlogPosting", "Report"
+}
+
+def clean_value(value):
+    """Unescape entities and strip markup from a structured-data string"""
+    if not isinstance(value, str):
+        return ""
+    text = TAG_PATTERN.sub(" ", html_lib.unescape(value))
+    return re.sub(r'[ \t\r\f\v]+', " ", text).strip()
+
+def normalize_date(value):
+    """Convert an ISO 8601 date from structured data to datetime.isoformat(), leaving other formats as they are"""
+    value = clean_value(value)
+    if not value:
+        return ""
+    
+    candidate = value.replace("Z", "+00:00")
+    # Offsets written without a colon (-0500) aren't accepted by fromisoformat before Python 3.11
+    candidate = re.sub(r'([+-]\d{2})(\d{2})$', r'\1:\2', candidate)
+    try:
+        return datetime.fromisoformat(candidate).isoformat()
+    except ValueError:
+        return value
+
+def normalize_authors(value):
+    """Get author names from a string, Person/Organization object or list of them"""
+    if isinstance(value, list):
+        names = []
+        for item in value:
+            for name in normalize_authors(item).split(", "):
+                if name and name not in names:
+                    names.append(name)
+        return ", ".join(names)
+    if isinstance(value, dict):
+        return clean_value(value.get("name", ""))
+    return clean_value(value)
+
+def normalize_images(value):
+    """Get image URLs from a string, ImageObject or list of them"""
+    if isinstance(value, list):
+        urls = []
+        for item in value:
+            for url in normalize_images(item):
+                if url not in urls:
+                    urls.append(url)
+        return urls
+    if isinstance(value, dict):
+        return normalize_images(value.get("url") or value.get("contentUrl"))
+    if isinstance(value, str) and value.startswith("http") and not value.endswith(".svg"):
+        return [value]
+    return []
+
+def iter_nodes(data):
+    """Walk every object in a JSON-LD document, including @graph members and nested values"""
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        for key, value in data.items():
+            if key in ("@graph", "mainEntity", "mainEntityOfPage", "itemListElement") or isinstance(value, list):
+                yield from iter_nodes(value)
+
+def is_article_node(node):
+    types = node.get("@type", [])
+    if isinstance(types, str):
+        types = [types]
+    return any(isinstance(t, str) and t.split("/")[-1] in ARTICLE_TYPES for t in types)
+
+def parse_json_ld(html):
+    """Get the article objects from a page's JSON-LD blocks, most complete first"""
+    articles = []
+    for block in JSON_LD_PATTERN.findall(html):
+        try:
+            data = json.loads(block.strip(), strict=False)
+        except ValueError:
+            # Some sites leave a trailing comma or HTML comment in the block
+            try:
+                data = json.loads(re.sub(r',\s*([}\]])', r'\1', block.strip().strip("<!-->")), strict=False)
+            except ValueError:
+                continue
+        articles.extend(node for node in iter_nodes(data) if is_article_node(node))
+    
+    articles.sort(key=lambda node: len(node.get("articleBody") or ""), reverse=True)
+    return articles
+
+def parse_meta_tags(html):
+    """Get OpenGraph, article: and plain meta tag values by property or name, first occurrence wins"""
+    meta = {}
+    for tag in META_PATTERN.findall(html):
+        attributes = {name.lower(): first or second for name, first, second in ATTRIBUTE_PATTERN.findall(tag)}
+        key = (attributes.get("property") or attributes.get("name") or attributes.get("itemprop") or "").lower()
+        if key and "content" in attributes and key not in meta:
+            meta[key] = html_lib.unescape(attributes["content"]).strip()
+    return meta
+
+def extract_structured_fields(html):
+    """Extract article fields from JSON-LD, falling back to OpenGraph and meta tags
+    
+    Works on the raw HTML with regular expressions, so no DOM is built.
+    
+    Returns:
+        dict: title, content, author, published_date and image_urls (empty
+              when not found), plus "structured_source" naming where the
+              title and content came from
+    """
+    fields = {"title": "", "content": "", "author": "", "published_date": "", "image_urls": [], "structured_source": None}
+    if not html:
+        return fields
+    
+    for node in parse_json_ld(html):
+        fields["title"] = fields["title"] or clean_value(node.get("headline") or node.get("name"))
+        if not fields["content"] and node.get("articleBody"):
+            # Keep paragraph breaks, which some sites encode as newlines in articleBody
+            paragraphs = [clean_value(part) for part in re.split(r'\n\s*\n|</p>', html_lib.unescape(node["articleBody"]))]
+            fields["content"] = "\n\n".join(part for part in paragraphs if part)
+        fields["author"] = fields["author"] or normalize_authors(node.get("author"))
+        fields["published_date"] = fields["published_date"] or normalize_date(node.get("datePublished") or node.get("dateCreated"))
+        fields["image_urls"] = fields["image_urls"] or normalize_images(node.get("image") or node.get("thumbnailUrl"))
+        if fields["title"] and fields["content"]:
+            fields["structured_source"] = "json-ld"
+    
+    meta = parse_meta_tags(html)
+    fields["title"] = fields["title"] or clean_value(meta.get("og:title") or meta.get("twitter:title"))
+    fields["author"] = fields["author"] or clean_value(meta.get("article:author") or meta.get("author") or meta.get("parsely-author"))
+    fields["published_date"] = fields["published_date"] or normalize_date(
+        meta.get("article:published_time") or meta.get("datepublished") or meta.get("parsely-pub-date")
+    )
+    fields["image_urls"] = fields["image_urls"] or normalize_images(meta.get("og:image") or meta.get("twitter:image"))
+    
+    # Profile links aren't author names
+    if fields["author"].startswith("http"):
+        fields["author"] = ""
+    
+    return fields
+
+def has_required_fields(fields, min_content_length=200):
+    """Check whether structured data alone is good enough to skip selector extraction
+    
+    Teaser-length articleBody values (paywalls, AMP stubs) don't count.
+    """
+    return bool(fields.get("title")) and len(fields.get("content") or "") >= min_content_length
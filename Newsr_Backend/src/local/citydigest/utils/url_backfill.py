@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import glob
+import logging
+import os
+import sqlite3
+
+from ..config.scraping import HTML_CACHE_DIR, STATE_DIR
+from .html_cache import HtmlCache
+from .url_canonical import canonical_url
+
+logger = logging.getLogger("url_backfill")
+
+# Frontier rows merged into one keep the most settled status
+FRONTIER_STATUS_RANK = {"done": 5, "duplicate": 4, "blocked": 3, "failed": 2, "leased": 1, "pending": 0}
+
+# Supabase tables keyed on a URL column, and whether that column is unique
+SUPABASE_URL_COLUMNS = (
+    ("scraped_urls", "url", True),
+    ("article_archive", "url", True),
+    ("scraped_articles", "url", True),
+    ("political_articles", "source_url", False)
+)
+
+def rekey_table(connection, table, key_column, key_function, merge, dry_run=False):
+    """Rewrite the URL keys of a SQLite table, merging rows whose keys collide
+    
+    Args:
+        connection: Open SQLite connection
+        table: Table to rewrite
+        key_column: URL primary key column
+        key_function: Function from a stored URL to its key, e.g. canonical_url
+        merge: Function from a list of row dicts sharing a key to the row to keep
+        dry_run: Count the changes without writing them
+    
+    Returns:
+        int: Number of rows rewritten or merged away
+    """
+    cursor = connection.execute(f"SELECT * FROM {table}")
+    columns = [column[0] for column in cursor.description]
+    groups = {}
+    for row in cursor.fetchall():
+        row = dict(zip(columns, row))
+        groups.setdefault(key_function(row[key_column]), []).append(row)
+    
+    changed = {key: rows for key, rows in groups.items() if len(rows) > 1 or rows[0][key_column] != key}
+    rewritten = sum(len(rows) for rows in changed.values())
+    if dry_run or not changed:
+        return rewritten
+    
+    placeholders = ", ".join("?" for _ in columns)
+    with connection:
+        for key, rows in changed.items():
+            kept = dict(merge(rows))
+            kept[key_column] = key
+            connection.executemany(f"DELETE FROM {table} WHERE {key_column} = ?", [(row[key_column],) for row in rows])
+            connection.execute(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                [kept[column] for column in columns]
+            )
+    return rewritten
+
+def merge_failures(rows):
+    """Add up the failure counts of merged failed_urls rows"""
+    merged = dict(max(rows, key=lambda row: row["updated_at"]))
+    merged["failures"] = sum(row["failures"] for row in rows)
+    return merged
+
+def backfill_state_store(path, dry_run=False):
+    """Rekey a city's scraped URLs, failure counts and blocklist by canonical URL"""
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        return {
+            "scraped_urls": rekey_table(
+                connection, "scraped_urls", "url", canonical_url, lambda rows: max(rows, key=lambda row: row["scraped_at"]), dry_run
+            ),
+            "failed_urls": rekey_table(connection, "failed_urls", "url", canonical_url, merge_failures, dry_run),
+            "blocklist": rekey_table(
+                connection, "blocklist", "url", canonical_url, lambda rows: min(rows, key=lambda row: row["added_at"]), dry_run
+            )
+        }
+    finally:
+        connection.close()
+
+def add_frontier_fetch_urls(connection):
+    """Give a frontier written before rows had a fetch URL that column, filled with the old URL keys
+    
+    Returns:
+        bool: True if the column was added, so the rows still need rekeying
+    """
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(frontier)")}
+    if "fetch_url" in columns:
+        return False
+    
+    with connection:
+        connection.execute("ALTER TABLE frontier ADD COLUMN fetch_url TEXT")
+        connection.execute("UPDATE frontier SET fetch_url = url")
+    return True
+
+def merge_frontier_rows(rows):
+    """Keep the most settled of the frontier rows sharing a key"""
+    return max(rows, key=lambda row: (FRONTIER_STATUS_RANK.get(row["status"], 0), row["updated_at"]))
+
+def backfill_frontier(path, dry_run=False):
+    """Rekey a city's crawl frontier by canonical URL, keeping the most settled row of each"""
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        if not dry_run:
+            add_frontier_fetch_urls(connection)
+        return {
+            "frontier": rekey_table(
+                connection, "frontier", "url", canonical_url, merge_frontier_rows, dry_run
+            )
+        }
+    finally:
+        connection.close()
+
+def backfill_global_index(path, dry_run=False):
+    """Rekey the URLs of the cross-city article index by canonical URL"""
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        return {
+            "global_urls": rekey_table(
+                connection, "urls", "url", canonical_url, lambda rows: max(rows, key=lambda row: row["seen_at"]), dry_run
+            )
+        }
+    finally:
+        connection.close()
+
+def backfill_html_cache(root=HTML_CACHE_DIR, dry_run=False):
+    """Rekey the HTML cache index by canonical URL, keeping the latest fetch of each page"""
+    if not any(os.path.exists(os.path.join(root, name)) for name in ("index.db", "index.json")):
+        return {"html_cache": 0}
+    
+    cache = HtmlCache(root)
+    try:
+        with cache.lock:
+            return {
+                "html_cache": rekey_table(
+                    cache.connection, "pages", "url", canonical_url, lambda rows: max(rows, key=lambda row: row["fetched_at"]), dry_run
+                )
+            }
+    finally:
+        cache.close()
+
+def backfill_supabase(supabase_client, dry_run=False, page_size=1000):
+    """Rewrite the URL columns of the Supabase tables to canonical URLs
+    
+    On tables where the URL is unique, a variant whose canonical URL already
+    has a row is deleted instead of renamed, since the existing row holds the
+    same article.
+    """
+    counts = {}
+    for table, column, unique in SUPABASE_URL_COLUMNS:
+        urls = []
+        try:
+            start = 0
+            while True:
+                response = supabase_client.table(table).select(column).order(column).range(start, start + page_size - 1).execute()
+                urls.extend(item[column] for item in response.data or [] if item.get(column))
+                if len(response.data or []) < page_size:
+                    break
+                start += page_size
+        except Exception as e:
+            logger.error(f"Error reading {table}.{column} from Supabase: {str(e)}")
+            continue
+        
+        existing = set(urls)
+        renames = [(url, canonical_url(url)) for url in dict.fromkeys(urls) if canonical_url(url) != url]
+        counts[table] = len(renames)
+        if dry_run:
+            continue
+        
+        for url, key in renames:
+            try:
+                if unique and key in existing:
+                    supabase_client.table(table).delete().eq(column, url).execute()
+                else:
+                    supabase_client.table(table).update({column: key}).eq(column, url).execute()
+                    existing.add(key)
+            except Exception as e:
+                logger.warning(f"Error rewriting {url} in {table}: {str(e)}")
+    return counts
+
+def backfill_url_keys(state_dir=STATE_DIR, html_cache_root=HTML_CACHE_DIR, supabase_client=None, dry_run=False):
+    """Rewrite every stored URL key to its canonical form
+    
+    Covers each city's state store and crawl frontier, the cross-city article
+    index, the HTML cache index and, when a client is given, the Supabase
+    tables keyed on URLs. Seen-URL filter checkpoints are deleted, so the next
+    run rebuilds them from the rekeyed state stores. Scrapers should not be
+    running while this runs.
+    
+    Args:
+        state_dir: Directory holding the per-city state databases
+        html_cache_root: HTML cache directory
+        supabase_client: Supabase client, or None to leave Supabase alone
+        dry_run: Only count what would be rewritten
+    
+    Returns:
+        dict: Store name to rows rewritten or merged
+    """
+    totals = {}
+    
+    def add(counts):
+        for name, count in counts.items():
+            totals[name] = totals.get(name, 0) + count
+    
+    for path in sorted(glob.glob(os.path.join(state_dir, "*_state.db"))):
+        add(backfill_state_store(path, dry_run))
+    for path in sorted(glob.glob(os.path.join(state_dir, "*_frontier.db"))):
+        add(backfill_frontier(path, dry_run))
+    
+    global_index_path = os.path.join(state_dir, "global_articles.db")
+    if os.path.exists(global_index_path):
+        add(backfill_global_index(global_index_path, dry_run))
+    
+    add(backfill_html_cache(html_cache_root, dry_run))
+    
+    checkpoints = glob.glob(os.path.join(state_dir, "*_seen_urls.json"))
+    if not dry_run:
+        for path in checkpoints:
+            os.remove(path)
+    totals["seen_filter_checkpoints"] = len(checkpoints)
+    
+    if supabase_client:
+        add(backfill_supabase(supabase_client, dry_run))
+    
+    for name, count in totals.items():
+        logger.info(f"{'Would rewrite' if dry_run else 'Rewrote'} {count} {name} entries")
+    return totals
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+import html as html_lib
+import logging
+import re
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from .structured_data import ATTRIBUTE_PATTERN, parse_meta_tags
+
+logger = logging.getLogger("url_canonical")
+
+LINK_PATTERN = re.compile(r'<link\s[^>]*>', re.I)
+
+# Query parameters that only track where a click came from
+TRACKING_PREFIXES = ("utm_", "__twitter_impression", "_hs")
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid", "twclid", "mc_cid", "mc_eid",
+    "cmpid", "ocid", "smid", "smtyp", "ncid", "sr_share", "ref_src", "ref_url", "taid", "_ga", "_gl",
+    "amp", "amp_js_v", "amp_gsa", "usqp", "outputtype"
+}
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# Host prefixes for the mobile and AMP editions of a site
+EDITION_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+# Google's AMP cache serves publisher pages under /c/ (HTML) or /v/ (viewer), with s/ for https
+AMP_CACHE_PATTERN = re.compile(r'^/[cv]/(s/)?(.+)$')
+AMP_PATH_PATTERN = re.compile(r'(^/amp(?=/)|/amp/?$|\.amp(?=\.html?$)|\.amp$)', re.I)
+
+def normalize_url(url, base_url=None):
+    """Get the form of a URL to fetch and store: the same page without noise
+    
+    Resolves relative links, lowercases the scheme and host, drops default
+    ports, fragments and tracking parameters, sorts the query and unwraps
+    Google AMP cache links to the publisher's URL. The result still points
+    at the page that was linked, so it is what gets fetched.
+    
+    Args:
+        url: URL as found in a page, feed or database
+        base_url: Page the URL was found on, for relative links
+    
+    Returns:
+        str: Normalized URL; anything that isn't http(s) comes back stripped but unchanged
+    """
+    if not url:
+        return url
+    
+    url = html_lib.unescape(url.strip())
+    if base_url:
+        url = urljoin(base_url, url)
+    
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+    
+    host = parts.hostname.rstrip(".")
+    if parts.port and str(parts.port) != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+    
+    path = parts.path or "/"
+    if host.endswith(".cdn.ampproject.org"):
+        match = AMP_CACHE_PATTERN.match(path)
+        if match:
+            publisher_url = ("https://" if match.group(1) else "http://") + match.group(2)
+            if parts.query:
+                publisher_url += "?" + parts.query
+            return normalize_url(publisher_url)
+    
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(name)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def canonical_url(url):
+    """Get the key a URL is deduplicated, cached and stored under
+    
+    On top of normalize_url(), http and https count as the same page, the
+    www., m., mobile. and amp. editions of a host are folded into the bare
+    host, AMP path markers (/amp/..., .../amp, .amp.html) are removed and so
+    is a trailing slash. Every variant of a link maps to one https URL, which
+    is usually the desktop page the others redirect to.
+    
+    Returns:
+        str: Canonical https URL; anything that isn't http(s) comes back normalized
+    """
+    url = normalize_url(url)
+    if not url:
+        return url
+    
+    parts = urlsplit(url)
+    if parts.scheme not in DEFAULT_PORTS:
+        return url
+    
+    host = parts.netloc
+    for prefix in EDITION_HOST_PREFIXES:
+        # Keep the prefix when nothing but a TLD would be left
+        if host.startswith(prefix) and "." in host[len(prefix):]:
+            host = host[len(prefix):]
+            break
+    
+    path = AMP_PATH_PATTERN.sub("", parts.path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return urlunsplit(("https", host, path or "/", parts.query, ""))
+
+def same_site(url, other_url):
+    """Check whether two URLs are on the same host once editions are folded together"""
+    return urlsplit(canonical_url(url)).netloc == urlsplit(canonical_url(other_url)).netloc
+
+def unique_urls(urls, base_url=None):
+    """Normalize a list of links and drop the ones that are variants of an earlier link
+    
+    Returns:
+        list: Normalized URLs with distinct canonical keys, in their original order
+    """
+    unique = {}
+    for url in urls:
+        normalized = normalize_url(url, base_url)
+        if normalized:
+            unique.setdefault(canonical_url(normalized), normalized)
+    return list(unique.values())
+
+def extract_canonical_link(html, base_url):
+    """Get the canonical URL a page declares for itself
+    
+    Reads <link rel="canonical">, falling back to og:url, with regular
+    expressions on the raw HTML. A canonical pointing at the site's homepage
+    is a common template mistake and is ignored.
+    
+    Args:
+        html: Page HTML
+        base_url: URL the page was fetched from, for relative canonicals
+    
+    Returns:
+        str: Normalized canonical URL, or None if the page declares none
+    """
+    if not html:
+        return None
+    
+    declared = None
+    for tag in LINK_PATTERN.findall(html):
+        attributes = {name.lower(): first or second for name, first, second in ATTRIBUTE_PATTERN.findall(tag)}
+        if "canonical" in attributes.get("rel", "").lower().split() and attributes.get("href"):
+            declared = attributes["href"]
+            break
+    if not declared:
+        declared = parse_meta_tags(html).get("og:url")
+    if not declared:
+        return None
+    
+    canonical = normalize_url(declared, base_url)
+    if not canonical or not canonical.startswith("http") or urlsplit(canonical).path in ("", "/"):
+        return None
+    return canonical
@@ -7,9 +7,14 @@ from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 import uuid
 from dotenv import load_dotenv
-import time
 import hashlib
 import random
+from pathlib import Path
+
+# Share the per-host rate limiter with the city and topic scrapers
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from src.local.citydigest.utils.rate_limiter import get_rate_limiter
+from src.local.citydigest.utils.url_canonical import canonical_url, normalize_url
 
 # Load environment variables
 load_dotenv()
@@ -86,9 +91,9 @@ def get_existing_articles():
         # Get articles from the last 7 days
         seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
         
-        # Get existing source URLs
+        # Get existing source URLs, as keys so variants of the same link match
         result = supabase_client.table("political_articles").select("source_url").gte("created_at", seven_days_ago).execute()
-        existing_urls = [item["source_url"] for item in result.data] if result.data else []
+        existing_urls = [canonical_url(item["source_url"]) for item in result.data if item.get("source_url")] if result.data else []
         
         # Get existing titles
         result = supabase_client.table("political_articles").select("title").gte("created_at", seven_days_ago).execute()
@@ -133,7 +138,7 @@ def generate_content_hash(content):
 def is_duplicate(article, existing_urls, existing_titles, content_hashes):
     """Check if an article is a duplicate based on URL, title, or content"""
     # Check URL
-    if article["source_url"] in existing_urls:
+    if canonical_url(article["source_url"]) in existing_urls:
         return True
         
     # Check title (exact match)
@@ -193,6 +198,9 @@ def scrape_articles():
     # Randomize sources to get a good mix
     random.shuffle(SOURCES)
     
+    # Requests to the same host are spaced out, different hosts run back-to-back
+    rate_limiter = get_rate_limiter()
+    
     for source in SOURCES:
         try:
             print(f"Scraping {source['name']} from {source['url']}...")
@@ -210,6 +218,7 @@ def scrape_articles():
             timeout = source.get("timeout", 10)
             
             try:
+                rate_limiter.acquire(source["url"])
                 response = requests.get(source["url"], headers=headers, timeout=timeout)
                 print(f"Response status: {response.status_code}")
                 
@@ -261,9 +270,10 @@ def scrape_articles():
                         
                     if not article_url.startswith("http"):
                         article_url = source["base_url"] + article_url
+                    article_url = normalize_url(article_url)
                     
                     # Check if URL already exists in our database
-                    if article_url in existing_urls:
+                    if canonical_url(article_url) in existing_urls:
                         print(f"Skipping already scraped article: {title}")
                         continue
                     
@@ -271,7 +281,7 @@ def scrape_articles():
                     
                     # Get article content with timeout
                     try:
-                        time.sleep(1)  # Be nice to the server
+                        rate_limiter.acquire(article_url)  # Be nice to the server
                         article_response = requests.get(article_url, headers=headers, timeout=timeout)
                         
                         if article_response.status_code != 200:
@@ -309,7 +319,7 @@ def scrape_articles():
                         "title": title,
                         "content": content,
                         "source": source["name"],
-                        "source_url": article_url,  # Changed from sourceUrl to source_url
+                        "source_url": canonical_url(article_url),  # Changed from sourceUrl to source_url
                         "image_url": image_url,     # Changed from imageUrl to image_url
                         "author": None,
                         "published_at": datetime.now().isoformat(),
@@ -328,7 +338,7 @@ def scrape_articles():
                     if not is_duplicate(article, existing_urls, existing_titles, content_hashes):
                         articles.append(article)
                         # Add to our existing lists to prevent duplicates within this run
-                        existing_urls.append(article_url)
+                        existing_urls.append(canonical_url(article_url))
                         existing_titles.append(title)
                         print(f"Successfully processed article: {title}")
                         articles_processed += 1
@@ -10,8 +10,6 @@ from pathlib import Path
 import importlib
 from urllib.parse import urlparse
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -21,6 +19,13 @@ from bs4 import BeautifulSoup
 # Import topic configuration system
 from ..config.topics import TOPICS, get_topic_config
 
+# Browser sessions are shared with the city scrapers
+from src.local.citydigest.utils.browser_pool import get_browser_pool
+from src.local.citydigest.utils.global_index import get_global_index
+from src.local.citydigest.utils.latency_tracker import get_latency_tracker
+from src.local.citydigest.utils.page_readiness import wait_for_page_ready
+from src.local.citydigest.utils.rate_limiter import get_rate_limiter
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -45,6 +50,15 @@ class BaseTopicScraper:
         
         self.headless = headless
         self.driver = None
+        self.rate_limiter = get_rate_limiter()
+        
+        # Page-load timeouts follow each host's observed load times, shared with the city scrapers
+        self.latency = get_latency_tracker()
+        self.page_load_timeout = 30
+        
+        # Articles the city and other topic scrapers already extracted, reused instead of fetched
+        self.global_index = get_global_index()
+        self.dedup_scope = f"topic:{topic_code}"
         
         # Set up output directory
         if output_dir:
@@ -62,33 +76,46 @@ class BaseTopicScraper:
         self.initialize_driver()
     
     def initialize_driver(self):
-        """Initialize the Selenium webdriver"""
-        options = Options()
-        
-        if self.headless:
-            options.add_argument("--headless")
-        
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-notifications")
-        options.add_argument("--disable-popup-blocking")
-        
-        # Add user agent
-        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36")
+        """Lease a Chrome session from the shared browser pool"""
+        self.driver = get_browser_pool(self.headless).acquire(page_load_timeout=30)
+        self.page_load_timeout = 30
         
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.set_page_load_timeout(30)
-        
-        logger.info("Initialized Chrome webdriver")
+        logger.info("Leased Chrome webdriver from browser pool")
+    
+    def navigate(self, url):
+        """Load a URL in the browser once the host's rate limit allows it and wait for it to settle"""
+        page_load_timeout = self.latency.page_load_timeout(url, 30)
+        if page_load_timeout != self.page_load_timeout:
+            self.driver.set_page_load_timeout(page_load_timeout)
+            self.page_load_timeout = page_load_timeout
+        
+        self.rate_limiter.acquire(url)
+        started = time.time()
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            self.latency.record(url, load=page_load_timeout)
+            raise
+        self.latency.record(url, load=time.time() - started)
+        wait_for_page_ready(self.driver)
     
     def close_driver(self):
-        """Close the webdriver"""
+        """Return the webdriver to the browser pool"""
         if self.driver:
-            self.driver.quit()
+            get_browser_pool(self.headless).release(self.driver)
             self.driver = None
-            logger.info("Closed Chrome webdriver")
+            logger.info("Returned Chrome webdriver to browser pool")
+        self.latency.save()
+    
+    def share_article(self, url, article, reused=False):
+        """Add an accepted article to the cross-city index, or tag the entry it was reused from"""
+        if not self.global_index:
+            return
+        
+        if reused:
+            self.global_index.tag(url, self.dedup_scope)
+        else:
+            self.global_index.record(url, article, self.dedup_scope)
     
     def is_relevant_to_topic(self, text):
         """Check if the text is relevant to the topic based on keywords"""
@@ -1,13 +1,10 @@
 #!/usr/bin/env python3
 from src.topics.scrapers.base_topic_scraper import BaseTopicScraper
+from src.local.citydigest.utils.structured_data import extract_structured_fields, has_required_fields
+from src.local.citydigest.utils.url_canonical import unique_urls
 import logging
-import time
 from datetime import datetime
 from bs4 import BeautifulSoup
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from urllib.parse import urlparse
 
 # Configure logging
@@ -63,11 +60,8 @@ class PoliticsNewsScraper(BaseTopicScraper):
             try:
                 logger.info(f"Scraping politics news from: {source_url}")
                 
-                # Navigate to the page
-                self.driver.get(source_url)
-                
-                # Wait for the page to load
-                time.sleep(2)
+                # Navigate to the page (spaced out per host by the shared rate limiter)
+                self.navigate(source_url)
                 
                 # Get the page source and parse with BeautifulSoup
                 soup = BeautifulSoup(self.driver.page_source, 'html.parser')
@@ -102,8 +96,8 @@ class PoliticsNewsScraper(BaseTopicScraper):
                     if self.is_from_known_source(href):
                         article_links.append(href)
                 
-                # Remove duplicates
-                article_links = list(set(article_links))
+                # Remove duplicates, including AMP, mobile and tracking-tagged variants of the same link
+                article_links = unique_urls(article_links)
                 
                 # Limit number of articles per source
                 article_links = article_links[:10]
@@ -113,41 +107,55 @@ class PoliticsNewsScraper(BaseTopicScraper):
                     try:
                         logger.info(f"Processing article: {url}")
                         
-                        # Navigate to the article page
-                        self.driver.get(url)
-                        
-                        # Wait for the page to load
-                        time.sleep(2)
-                        
-                        # Get the page source and parse with BeautifulSoup
-                        article_soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                        
-                        # Extract title
-                        title_elem = article_soup.find('h1')
-                        title = title_elem.text.strip() if title_elem else "No title found"
+                        # Reuse the article if a city or topic scraper already extracted it
+                        shared = self.global_index.lookup_url(url) if self.global_index else None
+                        if shared:
+                            logger.info(f"Reusing article already extracted for {', '.join(shared['scopes'])}: {url}")
+                            self.global_index.count_avoided(self.dedup_scope)
+                            structured = shared
+                        else:
+                            # Navigate to the article page
+                            self.navigate(url)
+                            
+                            # Get the page source
+                            html = self.driver.page_source
+                            structured = extract_structured_fields(html)
                         
                         # Extract domain for source identification
                         domain = urlparse(url).netloc.replace('www.', '')
                         
-                        # Extract content - try different strategies
-                        # First, look for article or main content tags
-                        content_elem = article_soup.find('article')
-                        
-                        # If no article tag, try main tag
-                        if not content_elem:
-                            content_elem = article_soup.find('main')
-                        
-                        # Extract content text
-                        content = ""
-                        if content_elem:
-                            # Get all paragraphs within the content
-                            paragraphs = content_elem.find_all('p')
-                            content = "\n\n".join([p.text.strip() for p in paragraphs])
-                        
-                        # If still no content, take a more aggressive approach
-                        if not content:
-                            paragraphs = article_soup.find_all('p')
-                            content = "\n\n".join([p.text.strip() for p in paragraphs if len(p.text.strip()) > 100])
+                        # Reused articles and ones that describe themselves in JSON-LD need no parsing
+                        complete = bool(shared) or has_required_fields(structured)
+                        if complete:
+                            title = structured["title"]
+                            content = structured["content"]
+                        else:
+                            # Otherwise parse the page with BeautifulSoup
+                            article_soup = BeautifulSoup(html, 'html.parser')
+                            
+                            # Extract title
+                            title_elem = article_soup.find('h1')
+                            title = title_elem.text.strip() if title_elem else "No title found"
+                            
+                            # Extract content - try different strategies
+                            # First, look for article or main content tags
+                            content_elem = article_soup.find('article')
+                            
+                            # If no article tag, try main tag
+                            if not content_elem:
+                                content_elem = article_soup.find('main')
+                            
+                            # Extract content text
+                            content = ""
+                            if content_elem:
+                                # Get all paragraphs within the content
+                                paragraphs = content_elem.find_all('p')
+                                content = "\n\n".join([p.text.strip() for p in paragraphs])
+                            
+                            # If still no content, take a more aggressive approach
+                            if not content:
+                                paragraphs = article_soup.find_all('p')
+                                content = "\n\n".join([p.text.strip() for p in paragraphs if len(p.text.strip()) > 100])
                         
                         # Extract source name from URL
                         source = domain
@@ -157,6 +165,8 @@ class PoliticsNewsScraper(BaseTopicScraper):
                             'url': url,
                             'title': title,
                             'content': content or "No content extracted",
+                            'author': structured["author"] or None,
+                            'published_date': structured["published_date"] or None,
                             'source': source,
                             'topic': 'politics',
                             'scraped_at': self.get_current_datetime()
@@ -166,12 +176,16 @@ class PoliticsNewsScraper(BaseTopicScraper):
                         if self.is_relevant_to_topic(title + " " + content):
                             self.articles.append(article)
                             logger.info(f"Added article: {title}")
+                            
+                            # Let city and other topic scrapers reuse it, unless its body was scraped from bare paragraphs
+                            if complete:
+                                self.share_article(url, article, reused=bool(shared))
                         else:
                             logger.info(f"Skipped irrelevant article: {title}")
-                        
+                    
                     except Exception as e:
                         logger.error(f"Error processing article {url}: {str(e)}")
-                
+            
             except Exception as e:
                 logger.error(f"Error scraping {source_url}: {str(e)}")
         